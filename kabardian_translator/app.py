@@ -35,10 +35,17 @@ import atexit
 import signal
 import sys
 import gc
+import json
+import threading
+from contextlib import ExitStack, contextmanager
 
 # FIXED IMPORTS - ADDED "."
 from .translation_service import TranslationService
 from .tts_service import TTSService
+from .inference_executor import InferenceExecutor, QueueFull
+from .cancellation import ActiveRequests, CancellationToken, Cancelled, cancellation_scope, watch_disconnect
+from .model_registry import ModelRegistry
+from .preload import Preloader
 from .transliterator import transliterator
 
 # FIXED TEMPLATE PATH
@@ -73,8 +80,36 @@ print(f"🖥️  Device: {device}")
 # Clean memory before loading
 cleanup_memory()
 
-translator = TranslationService(device)
-tts_service = TTSService(device)  # TTS will load on first use
+# One executor owns model access for translation and TTS (bounded queues, 503 when full)
+inference_executor = InferenceExecutor()
+# One registry holds all loaded models (each is loaded once, loading state in /health;
+# optional memory budget / idle TTL evict models, which are reloaded on demand)
+model_registry = ModelRegistry()
+translator = TranslationService(device, executor=inference_executor, registry=model_registry)
+tts_service = TTSService(device, executor=inference_executor, registry=model_registry)  # TTS will load on first use
+
+# Running requests: a client disconnect, or a newer request with the same
+# client_id, cancels a request at its next checkpoint (decode step, chunk, queue wait)
+active_requests = ActiveRequests()
+
+# Largest item list accepted by /translate/batch
+MAX_BATCH_ITEMS = 1000
+
+# Set by start_preload() when models are loaded eagerly at startup
+preloader = None
+
+def start_preload(warmup=True, background=True):
+    """
+    Load and warm up all models (in the background by default); /health reports
+    ready afterwards. The pre-fork server loads in the foreground before forking.
+    """
+    global preloader
+    preloader = Preloader(translator, tts_service, warmup=warmup)
+    if background:
+        preloader.start()
+    else:
+        preloader.run()
+    return preloader
 
 # UI translations
 UI_TRANSLATIONS = {
@@ -839,6 +874,8 @@ HTML_TEMPLATE = '''
         let sourceLang = 'rus_Cyrl';
         let targetLang = 'kbd_Cyrl';
         let currentAudio = null;
+        // Identifies this tab: a new request cancels the server-side work of the previous one
+        const clientId = Math.random().toString(36).slice(2) + Date.now().toString(36);
         let languages = {};
         let languageGroups = {};
         let ttsSpeakers = {};
@@ -1243,7 +1280,8 @@ HTML_TEMPLATE = '''
             hideInfo();
             
             try {
-                const response = await fetch('/translate', {
+                // Sentences arrive one NDJSON line at a time and are shown as they come
+                const response = await fetch('/translate/stream', {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json',
@@ -1251,23 +1289,55 @@ HTML_TEMPLATE = '''
                     body: JSON.stringify({
                         text: text,
                         source_lang: sourceLang,
-                        target_lang: targetLang
+                        target_lang: targetLang,
+                        client_id: clientId
                     })
                 });
                 
-                const data = await response.json();
+                if (!response.ok) {
+                    const data = await response.json();
+                    // A newer translation replaced this one: nothing to report
+                    if (!data.cancelled) {
+                        showError(data.error || uiTranslations[currentUILanguage].translation_error);
+                    }
+                    return;
+                }
                 
-                if (response.ok) {
-                    targetText.value = data.translation;
-                    translationTime.textContent = data.time_ms;
-                    updateTextLengths();
-                    
-                    // Show cascade translation info
-                    if (data.cascade) {
-                        showInfo(uiTranslations[currentUILanguage].cascade_translation);
+                const sentences = [];
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                targetText.value = '';
+                
+                const handleEvent = (data) => {
+                    if (data.type === 'sentence') {
+                        sentences[data.index] = data.translation + data.separator;
+                        targetText.value = sentences.map(s => s || '… ').join('').trim();
+                        updateTextLengths();
+                    } else if (data.type === 'done') {
+                        targetText.value = data.translation;
+                        translationTime.textContent = data.time_ms;
+                        updateTextLengths();
+                        
+                        // Show cascade translation info
+                        if (data.cascade) {
+                            showInfo(uiTranslations[currentUILanguage].cascade_translation);
+                        }
+                    } else if (data.type === 'error' && !data.cancelled) {
+                        showError(data.error || uiTranslations[currentUILanguage].translation_error);
                     }
-                } else {
-                    showError(data.error || uiTranslations[currentUILanguage].translation_error);
+                };
+                
+                while (true) {
+                    const { done, value } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+                    const lines = buffer.split('\\n');
+                    buffer = lines.pop();
+                    lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+                }
+                if (buffer.trim()) {
+                    handleEvent(JSON.parse(buffer));
                 }
                 
             } catch (error) {
@@ -1324,7 +1394,8 @@ HTML_TEMPLATE = '''
                     body: JSON.stringify({
                         text: text,
                         speaker: speaker,  // Pass correct speaker
-                        lang_code: langCode  // Pass language code for transliteration
+                        lang_code: langCode,  // Pass language code for transliteration
+                        client_id: clientId
                     })
                 });
                 
@@ -1500,6 +1571,41 @@ HTML_TEMPLATE = '''
 </html>
 '''
 
+def queue_full_response(error):
+    """503 for requests rejected by the inference queue"""
+    print(f"🚦 Rejected: {error}")
+    response = jsonify({'error': str(error), 'retry': True})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def cancelled_response(error):
+    """499 (client closed request) for cancelled requests; the client has usually gone already"""
+    print(f"🛑 Cancelled: {error}")
+    return jsonify({'error': f'Request cancelled: {error}', 'cancelled': True}), 499
+
+@contextmanager
+def request_cancellation(kind, data):
+    """
+    Cancellation token of the current HTTP request, current in this thread for
+    the block. It is cancelled when the client disconnects or sends a newer
+    `kind` request with the same client_id (body field or X-Client-Id header).
+    """
+    token = CancellationToken()
+    client_id = (data or {}).get('client_id') or request.headers.get('X-Client-Id')
+    client_key = (kind, client_id) if client_id else None
+    
+    done = threading.Event()
+    sock = request.environ.get('werkzeug.socket')
+    if sock is not None:
+        watch_disconnect(sock, token, done)
+    active_requests.begin(token, client_key)
+    try:
+        with cancellation_scope(token):
+            yield token
+    finally:
+        done.set()
+        active_requests.end(token, client_key)
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -1511,13 +1617,183 @@ def translate():
         text = data.get('text', '').strip()
         source_lang = data.get('source_lang', 'rus_Cyrl')
         target_lang = data.get('target_lang', 'kbd_Cyrl')
+        tier = data.get('tier')
         
         if not text:
             return jsonify({'error': 'Enter text to translate'}), 400
         
-        result = translator.translate(text, source_lang, target_lang)
+        if tier and tier not in translator.QUALITY_TIERS:
+            return jsonify({'error': f'Unknown quality tier: {tier}'}), 400
+        
+        with request_cancellation('translate', data):
+            result = translator.translate(text, source_lang, target_lang, tier=tier)
         return jsonify(result)
+    
+    except Cancelled as e:
+        return cancelled_response(e)
+    except QueueFull as e:
+        return queue_full_response(e)
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+def ndjson_response(first, events, token, cleanup):
+    """
+    Stream `first` and the remaining events as NDJSON lines (errors become a
+    final 'error' line). A client that goes away cancels `token`; `cleanup`
+    (an ExitStack) is closed when the stream ends.
+    """
+    def generate():
+        try:
+            yield json.dumps(first, ensure_ascii=False) + '\n'
+            for event in events:
+                yield json.dumps(event, ensure_ascii=False) + '\n'
+        except GeneratorExit:
+            # The server closes the response early when the client has disconnected
+            token.cancel('client disconnected')
+            raise
+        except Cancelled as e:
+            print(f"🛑 Cancelled: {e}")
+            yield json.dumps({'type': 'error', 'error': f'Request cancelled: {e}', 'cancelled': True}) + '\n'
+        except QueueFull as e:
+            print(f"🚦 Rejected: {e}")
+            yield json.dumps({'type': 'error', 'error': str(e), 'retry': True}) + '\n'
+        except Exception as e:
+            yield json.dumps({'type': 'error', 'error': f'Server error: {str(e)}'}) + '\n'
+        finally:
+            events.close()
+            cleanup.close()
+
+    response = Response(generate(), mimetype='application/x-ndjson')
+    # Keep proxies from buffering the stream
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def start_translation_stream(stream):
+    """
+    Common part of the streaming endpoints: validate the /translate body, run
+    `stream` up to its first event (so a full queue is still a plain 503) and
+    return the NDJSON response.
+    """
+    # Held until the stream ends, not just until this function returns
+    cancellation = ExitStack()
+    try:
+        data = request.get_json()
+        text = data.get('text', '').strip()
+        source_lang = data.get('source_lang', 'rus_Cyrl')
+        target_lang = data.get('target_lang', 'kbd_Cyrl')
+        tier = data.get('tier')
+
+        if not text:
+            return jsonify({'error': 'Enter text to translate'}), 400
+
+        if tier and tier not in translator.QUALITY_TIERS:
+            return jsonify({'error': f'Unknown quality tier: {tier}'}), 400
+
+        token = cancellation.enter_context(request_cancellation('translate', data))
+        events = stream(text, source_lang, target_lang, tier=tier)
+        first = next(events)
+
+    except Cancelled as e:
+        cancellation.close()
+        return cancelled_response(e)
+    except QueueFull as e:
+        cancellation.close()
+        return queue_full_response(e)
+    except Exception as e:
+        cancellation.close()
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+    return ndjson_response(first, events, token, cancellation)
+
+@app.route('/translate/stream', methods=['POST'])
+def translate_stream():
+    """Like /translate, streamed as NDJSON: one line per translated sentence, then a 'done' summary"""
+    return start_translation_stream(translator.translate_stream)
+
+@app.route('/translate/tokens', methods=['POST'])
+def translate_tokens():
+    """Like /translate/stream, with 'delta' lines carrying each sentence's text as it is decoded (greedy)"""
+    tier = (request.get_json(silent=True) or {}).get('tier')
+    if tier and tier != 'fast':
+        return jsonify({'error': f"Token streaming decodes greedily: only the 'fast' tier is available, not '{tier}'"}), 400
+    return start_translation_stream(translator.translate_tokens)
+
+@app.route('/translate/multi', methods=['POST'])
+def translate_multi():
+    """Translate one text into several target languages (source encoded once)"""
+    try:
+        data = request.get_json()
+        text = data.get('text', '').strip()
+        source_lang = data.get('source_lang', 'rus_Cyrl')
+        target_langs = data.get('target_langs') or []
+        tier = data.get('tier')
+        
+        if not text:
+            return jsonify({'error': 'Enter text to translate'}), 400
+        
+        if not isinstance(target_langs, list) or not target_langs:
+            return jsonify({'error': 'target_langs must be a non-empty list'}), 400
+        
+        if not isinstance(source_lang, str) or not all(isinstance(t, str) for t in target_langs):
+            return jsonify({'error': 'Language codes must be strings'}), 400
         
+        if tier and tier not in translator.QUALITY_TIERS:
+            return jsonify({'error': f'Unknown quality tier: {tier}'}), 400
+        
+        with request_cancellation('translate', data):
+            result = translator.translate_multi(text, source_lang, target_langs, tier=tier)
+        return jsonify(result)
+    
+    except Cancelled as e:
+        return cancelled_response(e)
+    except QueueFull as e:
+        return queue_full_response(e)
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+@app.route('/translate/batch', methods=['POST'])
+def translate_batch():
+    """
+    Translate a list of texts in one request. Items are strings (using the
+    body's source_lang/target_lang) or {text, source_lang, target_lang}
+    objects; results come back in input order with per-item errors.
+    """
+    try:
+        data = request.get_json()
+        items = data.get('items', data.get('texts'))
+        source_lang = data.get('source_lang', 'rus_Cyrl')
+        target_lang = data.get('target_lang', 'kbd_Cyrl')
+        tier = data.get('tier')
+
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'items must be a non-empty list'}), 400
+
+        if len(items) > MAX_BATCH_ITEMS:
+            return jsonify({'error': f'At most {MAX_BATCH_ITEMS} items per batch'}), 400
+
+        if tier and tier not in translator.QUALITY_TIERS:
+            return jsonify({'error': f'Unknown quality tier: {tier}'}), 400
+
+        batch = []
+        for item in items:
+            if isinstance(item, dict):
+                batch.append((
+                    item.get('text'),
+                    item.get('source_lang', source_lang),
+                    item.get('target_lang', target_lang),
+                ))
+            else:
+                batch.append((item, source_lang, target_lang))
+
+        with request_cancellation('translate_batch', data):
+            result = translator.translate_many(batch, tier=tier)
+        return jsonify(result)
+
+    except Cancelled as e:
+        return cancelled_response(e)
+    except QueueFull as e:
+        return queue_full_response(e)
     except Exception as e:
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
@@ -1537,28 +1813,33 @@ def synthesize():
         # ALWAYS use accent for supported languages
         use_accent = True
         
-        # Use transliteration if language code provided AND transliteration needed
-        if lang_code and transliterator.needs_transliteration(lang_code):
-            print(f"🔤 Applying transliteration for {lang_code}")
-            result = tts_service.synthesize(
-                text=text, 
-                speaker=speaker, 
-                lang_code=lang_code,
-                use_accent=use_accent
-            )
-        else:
-            # For languages without transliteration
-            print(f"🔊 Direct TTS for {lang_code} with speaker {speaker}")
-            # Pass lang_code even for non-transliteration to apply accents
-            result = tts_service.synthesize(
-                text=text, 
-                speaker=speaker, 
-                lang_code=lang_code,
-                use_accent=use_accent
-            )
+        with request_cancellation('synthesize', data):
+            # Use transliteration if language code provided AND transliteration needed
+            if lang_code and transliterator.needs_transliteration(lang_code):
+                print(f"🔤 Applying transliteration for {lang_code}")
+                result = tts_service.synthesize(
+                    text=text, 
+                    speaker=speaker, 
+                    lang_code=lang_code,
+                    use_accent=use_accent
+                )
+            else:
+                # For languages without transliteration
+                print(f"🔊 Direct TTS for {lang_code} with speaker {speaker}")
+                # Pass lang_code even for non-transliteration to apply accents
+                result = tts_service.synthesize(
+                    text=text, 
+                    speaker=speaker, 
+                    lang_code=lang_code,
+                    use_accent=use_accent
+                )
         
         return jsonify(result)
-        
+    
+    except Cancelled as e:
+        return cancelled_response(e)
+    except QueueFull as e:
+        return queue_full_response(e)
     except Exception as e:
         print(f"❌ Synthesis error: {e}")
         return jsonify({'error': f'Synthesis error: {str(e)}'}), 500
@@ -1664,7 +1945,19 @@ def health_check():
     health['transliteration_enabled'] = True
     health['transliteration_languages'] = ['tur_Latn', 'azj_Latn', 'kat_Geor', 'hye_Armn']
     health['ui_languages'] = ['ru', 'en']
-    return jsonify(health)
+    health['requests'] = active_requests.get_stats()
+    
+    if preloader:
+        health['preload'] = preloader.get_status()
+        if preloader.failed:
+            # Requests still load models lazily: stay in rotation, report the error
+            health['preload']['fallback'] = 'lazy loading'
+        elif not preloader.ready and health['status'] == 'healthy':
+            health['status'] = 'warming_up'
+    health['ready'] = health['status'] == 'healthy'
+    
+    # Load balancers hold traffic during preload/warmup and first model loads, not reloads
+    return jsonify(health), 200 if health['ready'] else 503
 
 # Cleanup on shutdown
 def cleanup_on_shutdown():
@@ -0,0 +1,201 @@
+# batch_scheduler.py
+# Cross-request micro-batching scheduler for translation models
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import os
+import queue
+import time
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from .cancellation import CancellationToken, Cancelled, cancellation_scope, current_token
+
+
+class MicroBatchScheduler:
+    """
+    Collects sentences from concurrent requests that share a batch key
+    (model, direction, preset) and decodes them in one batched call.
+
+    A group is dispatched when its collection window expires or when it
+    reaches the token budget, whichever comes first. Each request gets its
+    own results back in the order it submitted them.
+
+    Requests cancelled while queued are dropped from their batch; a running
+    batch is stopped only when every request in it has been cancelled.
+
+    Due groups are handed to one worker thread per batch key, so a long
+    NLLB-200 batch does not hold up MarianMT batches (and vice versa);
+    batches of the same key run one after another.
+    """
+
+    def __init__(self, run_batch, window_ms=10, max_batch_tokens=512):
+        """
+        Args:
+            run_batch: callable(key, sentences) -> list of results, one per sentence
+            window_ms: how long to wait for other requests after the first one arrives
+            max_batch_tokens: dispatch early once a group reaches this many tokens
+        """
+        self.run_batch = run_batch
+        self.window = window_ms / 1000.0
+        self.max_batch_tokens = max_batch_tokens
+
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        # {batch key: queue of item lists}, served by one worker thread per key
+        self._workers = {}
+        self._stats_lock = threading.Lock()
+
+        self.stats = {
+            'batches': 0,
+            'requests': 0,
+            'sentences': 0,
+            'max_requests_per_batch': 0,
+            'cancelled_requests': 0,
+        }
+
+    def _estimate_tokens(self, sentences):
+        """Cheap token estimate (whitespace words) used for the batch budget"""
+        return sum(len(s.split()) + 1 for s in sentences)
+
+    def _ensure_dispatcher(self):
+        # Threads do not survive fork(), so a worker process starts its own dispatcher
+        if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._workers = {}
+            self._thread = threading.Thread(
+                target=self._dispatch_loop, name="micro-batch-dispatcher", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, key, sentences):
+        """Queue sentences for the next batch of `key`; returns a Future with their results"""
+        future = Future()
+        if not sentences:
+            future.set_result([])
+            return future
+
+        with self._cond:
+            self._ensure_dispatcher()
+            group = self._pending.get(key)
+            if group is None:
+                group = {
+                    'deadline': time.monotonic() + self.window,
+                    'tokens': 0,
+                    'items': [],
+                }
+                self._pending[key] = group
+            group['items'].append((list(sentences), future, current_token()))
+            group['tokens'] += self._estimate_tokens(sentences)
+            self._cond.notify()
+
+        return future
+
+    def translate(self, key, sentences):
+        """Blocking helper: submit sentences and wait for their results (or the request's cancellation)"""
+        future = self.submit(key, sentences)
+        token = current_token()
+        if token is None:
+            return future.result()
+        while True:
+            try:
+                return future.result(timeout=0.05)
+            except FutureTimeout:
+                token.check()
+
+    def _next_ready_group(self):
+        """Wait until some group is due and pop it (called with the condition held)"""
+        while True:
+            while not self._pending:
+                self._cond.wait()
+
+            now = time.monotonic()
+            ready = [
+                key for key, group in self._pending.items()
+                if group['deadline'] <= now or group['tokens'] >= self.max_batch_tokens
+            ]
+            if ready:
+                key = min(ready, key=lambda k: self._pending[k]['deadline'])
+                return key, self._pending.pop(key)
+
+            next_deadline = min(group['deadline'] for group in self._pending.values())
+            self._cond.wait(timeout=max(next_deadline - now, 0))
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                key, group = self._next_ready_group()
+            self._worker_queue(key).put(group['items'])
+
+    def _worker_queue(self, key):
+        """Queue of the worker running batches of `key`, started on first use (dispatcher thread only)"""
+        batches = self._workers.get(key)
+        if batches is None:
+            batches = self._workers[key] = queue.SimpleQueue()
+            threading.Thread(
+                target=self._worker_loop, args=(key, batches),
+                name="micro-batch-worker", daemon=True
+            ).start()
+        return batches
+
+    def _worker_loop(self, key, batches):
+        while True:
+            self._dispatch(key, batches.get())
+
+    def _dispatch(self, key, items):
+        live = []
+        for item in items:
+            token = item[2]
+            if token is not None and token.cancelled:
+                item[1].set_exception(Cancelled(token.reason))
+                with self._stats_lock:
+                    self.stats['cancelled_requests'] += 1
+            else:
+                live.append(item)
+        items = live
+        if not items:
+            return
+
+        sentences = [s for item_sentences, _, _ in items for s in item_sentences]
+
+        with self._stats_lock:
+            self.stats['batches'] += 1
+            self.stats['requests'] += len(items)
+            self.stats['sentences'] += len(sentences)
+            self.stats['max_requests_per_batch'] = max(self.stats['max_requests_per_batch'], len(items))
+
+        if len(items) > 1:
+            print(f"📦 Micro-batch {key}: {len(items)} requests, {len(sentences)} sentence(s)")
+
+        try:
+            with cancellation_scope(CancellationToken.all_of(token for _, _, token in items)):
+                results = self.run_batch(key, sentences)
+        except Cancelled:
+            # Every request of the batch was cancelled: each keeps its own reason
+            for _, future, token in items:
+                future.set_exception(Cancelled(token.reason if token is not None else 'cancelled'))
+            return
+        except Exception as e:
+            for _, future, _ in items:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for item_sentences, future, _ in items:
+            future.set_result(results[offset:offset + len(item_sentences)])
+            offset += len(item_sentences)
+
+    def get_stats(self):
+        """Scheduler counters for health reporting"""
+        with self._cond:
+            queued = sum(len(group['items']) for group in self._pending.values())
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['window_ms'] = round(self.window * 1000, 2)
+        stats['max_batch_tokens'] = self.max_batch_tokens
+        stats['queued_requests'] = queued
+        if stats['batches']:
+            stats['avg_sentences_per_batch'] = round(stats['sentences'] / stats['batches'], 2)
+        return stats
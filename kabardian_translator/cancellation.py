@@ -0,0 +1,213 @@
+# cancellation.py
+# Cooperative cancellation of in-flight requests (client disconnects, superseded requests)
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import select
+import socket
+import ssl
+import threading
+from contextlib import contextmanager
+
+import torch
+
+
+class Cancelled(BaseException):
+    """
+    Raised at a cancellation checkpoint of a cancelled request.
+
+    Like asyncio.CancelledError it is not an Exception, so the generic
+    error handlers that turn failures into error responses let it through.
+    """
+
+
+class CancellationToken:
+    """
+    Cancellation flag of one request, set from another thread (the
+    disconnect watcher or a newer request of the same client) and checked
+    cooperatively: between chunks, while waiting for a model and after
+    every decoding step.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.reason = None
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason='cancelled'):
+        """Cancel the request (idempotent)"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback):
+        """Call callback() once when the token is cancelled (right away if it already is)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def check(self):
+        """Raise Cancelled if the token is cancelled"""
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+    def wait(self, timeout=None):
+        """Block until cancelled or timeout; returns True if cancelled"""
+        return self._event.wait(timeout)
+
+    @classmethod
+    def all_of(cls, tokens):
+        """
+        Token for work shared by several requests: cancelled once every one of
+        `tokens` is cancelled. None if any participant cannot be cancelled.
+        """
+        tokens = list(tokens)
+        if not tokens or any(token is None for token in tokens):
+            return None
+        if len(tokens) == 1:
+            return tokens[0]
+
+        combined = cls()
+
+        def update(token):
+            # The last participant's reason (client disconnected, superseded) carries over
+            if all(t.cancelled for t in tokens):
+                combined.cancel(token.reason)
+
+        for token in tokens:
+            token.on_cancel(lambda token=token: update(token))
+        return combined
+
+
+_local = threading.local()
+
+
+def current_token():
+    """Cancellation token of the request handled by this thread, or None"""
+    return getattr(_local, 'token', None)
+
+
+@contextmanager
+def cancellation_scope(token):
+    """Make `token` the current token of this thread for the duration of the block"""
+    previous = current_token()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+def check_cancelled():
+    """Raise Cancelled if the current request has been cancelled"""
+    token = current_token()
+    if token is not None:
+        token.check()
+
+
+class CancelOnToken:
+    """StoppingCriteria for generate(): stop all sequences once any of the tokens is cancelled"""
+
+    def __init__(self, *tokens):
+        self.tokens = [token for token in tokens if token is not None]
+
+    def __call__(self, input_ids, scores, **kwargs):
+        stop = any(token.cancelled for token in self.tokens)
+        return torch.full((input_ids.shape[0],), stop, dtype=torch.bool, device=input_ids.device)
+
+
+def stopping_kwargs(*tokens):
+    """
+    generate() kwargs stopping the decode at the next step once the current
+    request (or any of `tokens`) is cancelled; empty outside a request.
+    """
+    tokens = [token for token in (current_token(),) + tokens if token is not None]
+    if not tokens:
+        return {}
+    from transformers import StoppingCriteriaList
+    return {'stopping_criteria': StoppingCriteriaList([CancelOnToken(*tokens)])}
+
+
+class ActiveRequests:
+    """
+    Tracks running requests. A request registered under a client key (e.g.
+    the endpoint and the client id the frontend sends) supersedes, i.e.
+    cancels, the previous request still running under that key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_client = {}
+        self._running = 0
+        self._cancelled = {}
+
+    def begin(self, token, client_key=None):
+        """Register a request, cancelling the client's previous one"""
+        with self._lock:
+            self._running += 1
+            previous = self._by_client.get(client_key) if client_key is not None else None
+            if client_key is not None:
+                self._by_client[client_key] = token
+        if previous is not None:
+            previous.cancel('superseded')
+
+    def end(self, token, client_key=None):
+        """Forget a finished request and count it if it was cancelled"""
+        with self._lock:
+            self._running -= 1
+            if client_key is not None and self._by_client.get(client_key) is token:
+                del self._by_client[client_key]
+            if token.cancelled:
+                self._cancelled[token.reason] = self._cancelled.get(token.reason, 0) + 1
+
+    def get_stats(self):
+        """Running requests and cancellations by reason for health reporting"""
+        with self._lock:
+            return {'running': self._running, 'cancelled': dict(self._cancelled)}
+
+
+def watch_disconnect(sock, token, done, interval=0.1):
+    """
+    Cancel `token` when the client closes the connection `sock` before
+    `done` is set. Runs in a daemon thread; returns the thread.
+    """
+    duplicate = None
+    if isinstance(sock, ssl.SSLSocket):
+        # TLS sockets refuse recv() flags: peek at the encrypted stream
+        # through a duplicate of the raw descriptor instead
+        sock = duplicate = socket.fromfd(sock.fileno(), sock.family, sock.type)
+
+    def watch():
+        try:
+            while not done.wait(interval):
+                readable, _, _ = select.select([sock], [], [], 0)
+                if not readable:
+                    continue
+                # Readable with no data pending means the peer closed the connection
+                if sock.recv(1, socket.MSG_PEEK) == b'':
+                    token.cancel('client disconnected')
+                return
+        except OSError:
+            token.cancel('client disconnected')
+        except ValueError:
+            # The server closed the socket itself (request finished)
+            pass
+        finally:
+            if duplicate is not None:
+                duplicate.close()
+
+    thread = threading.Thread(target=watch, name="disconnect-watcher", daemon=True)
+    thread.start()
+    return thread
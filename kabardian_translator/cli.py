@@ -27,6 +27,7 @@ Usage examples:
   kabardian-translator                    # Start server on port 5500
   kabardian-translator --port 8080        # Start server on port 8080
   kabardian-translator --host localhost   # Local access only
+  kabardian-translator --batch-window-ms 10   # Batch sentences across concurrent requests
   
   # Command to download models:
   kabardian-download-models               # Download all models (~1.7GB)
@@ -44,6 +45,64 @@ Usage examples:
                        help="Flask debug mode")
     parser.add_argument("--version", action="store_true",
                        help="Show version information")
+    parser.add_argument("--batch-window-ms", type=float, default=0,
+                       help="Collect sentences from concurrent requests for this many ms "
+                            "and translate them in one batch (default: 0, disabled)")
+    parser.add_argument("--max-batch-tokens", type=int, default=512,
+                       help="Dispatch a micro-batch early once it reaches this many tokens (default: 512)")
+    parser.add_argument("--pack-tokens", type=int, default=0,
+                       help="Pack adjacent short sentences into one translation chunk of up to this many "
+                            "tokens; packed sentences are cached and streamed together (default: 0, off)")
+    parser.add_argument("--cache-size", type=int, default=10000,
+                       help="Sentences kept in the in-memory translation cache (default: 10000, 0 disables)")
+    parser.add_argument("--cache-ttl", type=float, default=None,
+                       help="Expire cached translations after this many seconds (default: never)")
+    parser.add_argument("--precision", choices=["auto", "fp32", "fp16", "bf16", "int8"], default="auto",
+                       help="Model precision: auto (fp16 on GPU/MPS, fp32 on CPU), fp32, fp16, bf16, "
+                            "or int8 dynamic quantization for CPU servers (default: auto)")
+    parser.add_argument("--marian-backend", choices=["torch", "onnx"], default="torch",
+                       help="Inference engine for MarianMT (onnx requires "
+                            "'kabardian-download-models --export-onnx'; default: torch)")
+    parser.add_argument("--nllb-trimmed-vocab", action="store_true",
+                       help="Serve NLLB-200 from the vocabulary-trimmed build "
+                            "(models/nllb200_trimmed, see 'kabardian-trim-nllb')")
+    parser.add_argument("--nllb-shortlist", action="store_true",
+                       help="Decode NLLB-200 over a per-target-language token shortlist "
+                            "(models/nllb200/shortlists.json, see 'kabardian-trim-nllb shortlists')")
+    parser.add_argument("--shortlist-min-score", type=float, default=None,
+                       help="Score shortlisted translations under the full vocabulary and decode "
+                            "again with it when the average token log-probability is below this, "
+                            "e.g. -1.0 (default: no scoring, no retry)")
+    parser.add_argument("--translation-memory", metavar="PATH",
+                       help="Persistent SQLite translation memory shared by all worker processes")
+    parser.add_argument("--translation-memory-size-mb", type=float, default=256,
+                       help="Size budget of the translation memory (default: 256)")
+    parser.add_argument("--tier", choices=["fast", "balanced", "best"], default="balanced",
+                       help="Default quality tier for requests that do not choose one (default: balanced)")
+    parser.add_argument("--downgrade-threshold", type=int, default=None,
+                       help="Downgrade quality tiers when more translations than this are in flight "
+                            "(default: never)")
+    parser.add_argument("--max-queue", type=int, default=32,
+                       help="Requests allowed to wait per model before answering 503 (default: 32)")
+    parser.add_argument("--queue-timeout", type=float, default=30.0,
+                       help="Maximum wait for a model in seconds before answering 503 (default: 30)")
+    parser.add_argument("--model-concurrency", type=int, default=1,
+                       help="Inference calls running at once per model (default: 1)")
+    parser.add_argument("--preload", action="store_true",
+                       help="Load and warm up all models in the background at startup "
+                            "(/health reports ready when done)")
+    parser.add_argument("--no-warmup", action="store_true",
+                       help="With --preload: only load the models, skip warmup generations")
+    parser.add_argument("--model-memory-mb", type=float, default=None,
+                       help="Memory budget for loaded models; least recently used idle models "
+                            "are evicted and reloaded on demand (default: unlimited)")
+    parser.add_argument("--model-idle-ttl", type=float, default=None,
+                       help="Evict models unused for this many seconds (default: never)")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Worker processes; with more than 1, models are loaded once before "
+                            "forking and shared copy-on-write (CPU only, default: 1)")
+    parser.add_argument("--torch-threads", type=int, default=None,
+                       help="Torch intra-op threads per worker (default: CPU cores / workers)")
     
     args = parser.parse_args()
     
@@ -55,12 +114,63 @@ Usage examples:
     
     # Import here to avoid slowing down CLI startup
     try:
-        from kabardian_translator.app import app as flask_app
+        from kabardian_translator.app import (
+            app as flask_app, translator, inference_executor, model_registry,
+            start_preload, cleanup_on_shutdown, device
+        )
     except ImportError as e:
         print(f"❌ Import error: {e}")
         print("💡 Make sure all files are in current directory")
         sys.exit(1)
     
+    inference_executor.configure(args.max_queue, args.queue_timeout, args.model_concurrency)
+    if args.model_memory_mb or args.model_idle_ttl:
+        model_registry.configure(args.model_memory_mb, args.model_idle_ttl)
+    translator.configure_precision(args.precision)
+    if args.marian_backend != "torch":
+        translator.configure_backends({
+            'marian_ru_kbd': args.marian_backend,
+            'marian_kbd_ru': args.marian_backend,
+        })
+    if args.nllb_trimmed_vocab:
+        translator.configure_nllb_vocabulary(True)
+    if args.nllb_shortlist:
+        translator.configure_shortlist(True, args.shortlist_min_score)
+    if args.pack_tokens:
+        translator.configure_chunking(args.pack_tokens)
+    translator.configure_cache(args.cache_size, args.cache_ttl)
+    translator.configure_quality(args.tier, args.downgrade_threshold)
+    if args.translation_memory:
+        translator.configure_translation_memory(args.translation_memory, args.translation_memory_size_mb)
+    if args.batch_window_ms > 0:
+        translator.enable_micro_batching(args.batch_window_ms, args.max_batch_tokens)
+    
+    if args.workers > 1 and device != "cpu":
+        print(f"⚠️ --workers needs the CPU device ({device} does not survive fork); using 1 worker")
+        args.workers = 1
+    
+    if args.workers > 1:
+        from kabardian_translator.prefork import PreforkServer
+        
+        server = PreforkServer(
+            flask_app, args.host, args.port,
+            workers=args.workers,
+            torch_threads=args.torch_threads,
+            cleanup=cleanup_on_shutdown
+        )
+        print("🚀 Starting Kabardian Translator (NLLB-200 Edition) in multi-process mode...")
+        print("⚡ Press Ctrl+C to stop")
+        print("-" * 50)
+        # Workers share the weights only if the models are loaded before forking
+        server.serve(before_fork=lambda: start_preload(warmup=not args.no_warmup, background=False))
+        return
+    
+    if args.torch_threads:
+        import torch
+        torch.set_num_threads(args.torch_threads)
+    if args.preload:
+        start_preload(warmup=not args.no_warmup)
+    
     print("🚀 Starting Kabardian Translator (NLLB-200 Edition)...")
     print(f"🌐 Server will be available at: http://{args.host}:{args.port}")
     print("⚡ Press Ctrl+C to stop")
@@ -113,6 +223,12 @@ Available languages:
     parser.add_argument("--source", required=True, help="Source language code")
     parser.add_argument("--target", required=True, help="Target language code")
     parser.add_argument("--output", help="Output file (default: stdout)")
+    parser.add_argument("--precision", choices=["auto", "fp32", "fp16", "bf16", "int8"], default="auto",
+                       help="Model precision (int8 = dynamic quantization, CPU only)")
+    parser.add_argument("--marian-backend", choices=["torch", "onnx"], default="torch",
+                       help="Inference engine for MarianMT (default: torch)")
+    parser.add_argument("--tier", choices=["fast", "balanced", "best"], default="balanced",
+                       help="Quality tier: fast (greedy), balanced or best (wider beam search)")
     
     args = parser.parse_args()
     
@@ -136,13 +252,16 @@ Available languages:
     try:
         # Import translation service
         from kabardian_translator.translation_service import TranslationService
-        translator = TranslationService()
+        translator = TranslationService(
+            precision=args.precision,
+            backends={'marian_ru_kbd': args.marian_backend, 'marian_kbd_ru': args.marian_backend}
+        )
         
         print(f"🌐 Translating: {args.source} → {args.target}")
         print(f"📝 Text: {text[:100]}..." if len(text) > 100 else f"📝 Text: {text}")
         
         # Perform translation
-        result = translator.translate(text, args.source, args.target)
+        result = translator.translate(text, args.source, args.target, tier=args.tier)
         
         if result.get('error'):
             print(f"❌ Translation error: {result['error']}")
@@ -153,7 +272,7 @@ Available languages:
         model_used = result.get('model_used', 'unknown')
         
         print(f"✅ Translation complete ({time_ms}ms)")
-        print(f"🤖 Model: {model_used}")
+        print(f"🤖 Model: {model_used} [{result.get('tier')}]")
         
         if args.output:
             with open(args.output, 'w', encoding='utf-8') as f:
@@ -330,6 +330,107 @@ This provides complete functionality:
         print("   Kabardian ↔ Russian should still work.")
         return False
 
+def export_onnx_models():
+    """Export downloaded MarianMT models to ONNX for the ONNX Runtime backend (offline)"""
+    print_progress("EXPORTING MARIANMT MODELS TO ONNX")
+    
+    try:
+        from .inference_backends import export_marian_to_onnx
+    except ImportError:
+        from inference_backends import export_marian_to_onnx
+    
+    models = ["models/marian_ru_kbd", "models/marian_kbd_ru"]
+    success_count = 0
+    
+    for model_dir in models:
+        if not os.path.exists(os.path.join(model_dir, "config.json")):
+            print(f"⚠️  {model_dir}: not found, download it first")
+            continue
+        try:
+            export_marian_to_onnx(model_dir)
+            success_count += 1
+        except ImportError as e:
+            print(f"❌ ONNX export requires optimum[onnxruntime]: {e}")
+            print("💡 Install with: pip install kabardian-translator[onnx]")
+            return False
+        except Exception as e:
+            print(f"❌ Failed to export {model_dir}: {e}")
+    
+    if success_count:
+        print(f"\n✅ Exported {success_count}/{len(models)} MarianMT models")
+        print("   Start the server with: kabardian-translator --marian-backend onnx")
+    return success_count == len(models)
+
+def convert_models_to_safetensors(remove_bin=False):
+    """Convert downloaded models to safetensors weights and report the load speedup (offline)"""
+    print_progress("CONVERTING MODELS TO SAFETENSORS")
+    
+    try:
+        from .inference_backends import convert_to_safetensors
+    except ImportError:
+        from inference_backends import convert_to_safetensors
+    
+    models = ["models/marian_ru_kbd", "models/marian_kbd_ru", "models/nllb200"]
+    results = {}
+    
+    for model_dir in models:
+        if not os.path.exists(os.path.join(model_dir, "config.json")):
+            print(f"⚠️  {model_dir}: not found, skipping")
+            continue
+        try:
+            results[model_dir] = convert_to_safetensors(model_dir, remove_bin=remove_bin)
+        except Exception as e:
+            print(f"❌ Failed to convert {model_dir}: {e}")
+    
+    if results:
+        print("\n📊 Model load (fresh process)        time      peak RSS")
+        for model_dir, result in results.items():
+            for label in ('before', 'after'):
+                m = result[label]
+                if not m:
+                    continue
+                if 'error' in m:
+                    print(f"   {model_dir:<24} {m.get('weights', label):<11} error: {m['error']}")
+                    continue
+                print(f"   {model_dir:<24} {m['weights']:<11} {m['load_seconds']:>6.2f}s  {m['peak_rss_mb']:>8.0f}MB")
+        print(f"\n✅ Converted {len(results)} model(s); the server now loads safetensors weights")
+    return len(results) > 0
+
+def optimize_models():
+    """Write fp16/bf16/int8 variants, fast tokenizers and variant manifests for downloaded models (offline)"""
+    print_progress("OPTIMIZING MODELS FOR SERVING")
+    
+    try:
+        from .inference_backends import optimize_model
+    except ImportError:
+        from inference_backends import optimize_model
+    
+    models = {
+        "marian_ru_kbd": "models/marian_ru_kbd",
+        "marian_kbd_ru": "models/marian_kbd_ru",
+        "nllb200": "models/nllb200",
+    }
+    success_count = 0
+    found = 0
+    
+    for model_name, model_dir in models.items():
+        if not os.path.exists(os.path.join(model_dir, "config.json")):
+            print(f"⚠️  {model_dir}: not found, skipping")
+            continue
+        found += 1
+        try:
+            manifest = optimize_model(model_dir, model_name)
+            for name, variant in manifest['variants'].items():
+                print(f"      {name:<5} {variant['size_mb']:>8.0f}MB")
+            success_count += 1
+        except Exception as e:
+            print(f"❌ Failed to optimize {model_dir}: {e}")
+    
+    if success_count:
+        print(f"\n✅ Optimized {success_count}/{found} models")
+        print("   The server picks the variant for its device and --precision at startup")
+    return found > 0 and success_count == found
+
 def main():
     """Main CLI function"""
     parser = argparse.ArgumentParser(
@@ -342,12 +443,18 @@ Download options:
   --full:       All models for complete functionality (~1.7GB)
   --base-only:  Only base NLLB-200 for other languages (~1.2GB)
   --check:      Check installed models
+  --export-onnx: Export downloaded MarianMT models to ONNX (offline)
+  --to-safetensors: Convert downloaded models to safetensors for faster loading (offline)
+  --optimize:   Write fp16/bf16/int8 variants and fast tokenizers (offline, combinable)
 
 Examples:
   kabardian-download-models           # Interactive menu
   kabardian-download-models --minimal # MarianMT only
   kabardian-download-models --full    # All models
   kabardian-download-models --check   # Check installation
+  kabardian-download-models --export-onnx  # ONNX Runtime backend for MarianMT
+  kabardian-download-models --to-safetensors  # Faster startup, lower peak memory while loading
+  kabardian-download-models --minimal --optimize  # Download, then write serving variants
         """
     )
     
@@ -359,6 +466,17 @@ Examples:
                        help="Download only base NLLB-200 (~1.2GB)")
     parser.add_argument("--check", action="store_true",
                        help="Check installed models")
+    parser.add_argument("--export-onnx", action="store_true",
+                       help="Export downloaded MarianMT models to ONNX (no network needed)")
+    parser.add_argument("--to-safetensors", action="store_true",
+                       help="Convert downloaded models to safetensors and measure load time/peak RSS "
+                            "before and after (no network needed)")
+    parser.add_argument("--remove-bin", action="store_true",
+                       help="With --to-safetensors: delete the original pytorch_model.bin files "
+                            "after a successful conversion (kept by default)")
+    parser.add_argument("--optimize", action="store_true",
+                       help="Write fp16/bf16 safetensors, int8 weights, fast tokenizers and a variant "
+                            "manifest next to the downloaded models (no network needed)")
     
     args = parser.parse_args()
     
@@ -366,15 +484,28 @@ Examples:
         print("🔍 Checking installed models...")
         return verify_installation()
     
+    if args.export_onnx:
+        return export_onnx_models()
+    
+    if args.to_safetensors:
+        return convert_models_to_safetensors(remove_bin=args.remove_bin)
+    
     if args.minimal:
-        return download_minimal_models()
+        success = download_minimal_models()
     elif args.full:
-        return download_all_models()
+        success = download_all_models()
     elif args.base_only:
-        return download_base_nllb()
+        success = download_base_nllb()
+    elif args.optimize:
+        return optimize_models()
     else:
         # Interactive mode
         return interactive_menu()
+    
+    # Optimize step after a download
+    if success and args.optimize:
+        success = optimize_models()
+    return success
 
 def interactive_menu():
     """Interactive download menu"""
@@ -0,0 +1,517 @@
+# inference_backends.py
+# Pluggable inference backends for the translation models
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import torch
+
+# Supported inference precisions ('auto' keeps the per-model defaults)
+PRECISIONS = ('auto', 'fp32', 'fp16', 'bf16', 'int8')
+
+# Directory (inside a model directory) holding its ONNX export
+ONNX_SUBDIR = "onnx"
+
+# Directory (inside a model directory) holding the variants written by
+# 'kabardian-download-models --optimize', described by its manifest
+OPTIMIZED_SUBDIR = "optimized"
+VARIANTS_MANIFEST = "manifest.json"
+INT8_WEIGHTS = "model_int8.pt"
+FAST_TOKENIZER_SUBDIR = "tokenizer"
+
+# Weight files written by save_pretrained (single file or sharded index)
+SAFETENSORS_FILES = ("model.safetensors", "model.safetensors.index.json")
+PYTORCH_BIN_FILES = ("pytorch_model.bin", "pytorch_model.bin.index.json")
+
+
+def has_safetensors(path):
+    """True if a local model directory has safetensors weights"""
+    return any((Path(path) / name).exists() for name in SAFETENSORS_FILES)
+
+
+def _resolve_precision(precision, device, default_dtype):
+    """Return (torch_dtype, quantize_int8) for a requested precision on a device"""
+    if precision == 'fp32':
+        return torch.float32, False
+    if precision == 'fp16':
+        return torch.float16, False
+    if precision == 'bf16':
+        return torch.bfloat16, False
+    if precision == 'int8':
+        if device == 'cpu':
+            return torch.float32, True
+        print(f"⚠️ int8 dynamic quantization is CPU-only, using default precision on {device}")
+    return default_dtype, False
+
+
+def load_variant_manifest(model_dir):
+    """Manifest of the optimized variants of a model directory, or None"""
+    manifest_path = Path(model_dir) / OPTIMIZED_SUBDIR / VARIANTS_MANIFEST
+    if not manifest_path.exists():
+        return None
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable variant manifest {manifest_path}: {e}")
+        return None
+
+
+def tokenizer_path(model_dir, manifest):
+    """Directory to load a model's tokenizer from: the optimized fast tokenizer if there is one"""
+    if manifest and manifest.get('tokenizer_path'):
+        path = Path(model_dir) / OPTIMIZED_SUBDIR / manifest['tokenizer_path']
+        if path.exists():
+            return path
+    return Path(model_dir)
+
+
+def select_variant(manifest, device, precision, default_dtype):
+    """
+    Name of the optimized variant serving a precision on a device ('fp16',
+    'bf16', 'int8') or None to load the original weights.
+    """
+    if not manifest:
+        return None
+    dtype, quantize = _resolve_precision(precision, device, default_dtype)
+    name = 'int8' if quantize else DTYPE_NAMES.get(dtype)
+    return name if name in manifest.get('variants', {}) else None
+
+
+def _model_size_bytes(model):
+    """Approximate resident size of a model's weights (tied tensors counted once)"""
+    seen = set()
+    total = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        if id(tensor) in seen:
+            continue
+        seen.add(id(tensor))
+        total += tensor.numel() * tensor.element_size()
+
+    # Dynamically quantized Linear layers keep packed int8 weights outside parameters()
+    for module in model.modules():
+        packed = getattr(module, '_packed_params', None)
+        if packed is not None and hasattr(module, 'weight') and callable(module.weight):
+            weight = module.weight()
+            total += weight.numel() * weight.element_size()
+    return total
+
+
+def _quantize_int8(model, name):
+    """
+    Apply dynamic int8 quantization to the Linear layers of a seq2seq model.
+    Only the encoder/decoder stack is quantized: lm_head shares its weights
+    with the embeddings, so quantizing it would add a copy instead of saving memory.
+    Returns precision stats for health reporting.
+    """
+    size_before = _model_size_bytes(model)
+    model.model = torch.ao.quantization.quantize_dynamic(
+        model.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+    size_after = _model_size_bytes(model)
+
+    saved_mb = round((size_before - size_after) / 1024 / 1024, 1)
+    print(f"🗜️ {name}: int8 dynamic quantization applied, saved ~{saved_mb}MB")
+    return {
+        'precision': 'int8',
+        'size_mb_before': round(size_before / 1024 / 1024, 1),
+        'size_mb': round(size_after / 1024 / 1024, 1),
+        'saved_mb': saved_mb,
+    }
+
+
+DTYPE_NAMES = {torch.float16: 'fp16', torch.bfloat16: 'bf16', torch.float32: 'fp32'}
+
+
+def _precision_stats(model, dtype):
+    size_mb = round(_model_size_bytes(model) / 1024 / 1024, 1)
+    return {
+        'precision': DTYPE_NAMES.get(dtype, 'fp32'),
+        'size_mb_before': size_mb,
+        'size_mb': size_mb,
+        'saved_mb': 0.0,
+    }
+
+
+class TorchBackend:
+    """HuggingFace PyTorch models with generate()"""
+
+    name = 'torch'
+
+    def load(self, model_cls, path, device, precision, default_dtype, label, variants=None, **kwargs):
+        """
+        Load a seq2seq model for inference. With a variant manifest (see
+        optimize_model), a pre-converted variant matching the precision is
+        loaded instead of converting the original weights at startup.
+
+        Returns:
+            tuple: (model exposing generate(), precision stats dict)
+        """
+        dtype, quantize = _resolve_precision(precision, device, default_dtype)
+        kwargs.setdefault('local_files_only', True)
+
+        variant = select_variant(variants, device, precision, default_dtype)
+        if variant == 'int8':
+            return self._load_int8_variant(model_cls, path, device, label, variants)
+        if variant:
+            path = Path(path) / OPTIMIZED_SUBDIR / variants['variants'][variant]['path']
+            print(f"📦 {label}: loading pre-converted {variant} variant")
+
+        # safetensors are read straight from a memory-mapped file (no unpickling
+        # and no second full copy), which loads faster with a lower peak RSS. The
+        # weights still end up in private process memory: worker processes share
+        # them only when forked after loading (see prefork.py)
+        weights = 'safetensors' if has_safetensors(path) else 'bin'
+        if weights == 'safetensors':
+            kwargs.setdefault('use_safetensors', True)
+        elif Path(path).is_dir():
+            print(f"💡 {label}: no safetensors weights in {path}, "
+                  "run 'kabardian-download-models --to-safetensors' for faster loading")
+
+        model = model_cls.from_pretrained(
+            path, dtype=dtype, low_cpu_mem_usage=True, **kwargs
+        ).to(device)
+        model.eval()
+
+        if quantize:
+            stats = _quantize_int8(model, label)
+        else:
+            stats = _precision_stats(model, dtype)
+        stats['backend'] = self.name
+        stats['weights'] = weights
+        stats['variant'] = variant
+        return model, stats
+
+    def _load_int8_variant(self, model_cls, path, device, label, variants):
+        """Rebuild the dynamically quantized model and load its saved int8 weights"""
+        from transformers import AutoConfig, GenerationConfig
+
+        entry = variants['variants']['int8']
+        variant_dir = Path(path) / OPTIMIZED_SUBDIR / entry['path']
+        config = AutoConfig.from_pretrained(variant_dir, local_files_only=True)
+
+        try:
+            from transformers.modeling_utils import no_init_weights
+        except ImportError:
+            from contextlib import nullcontext as no_init_weights
+        # The weights are overwritten by the state dict, so skip random initialization
+        with no_init_weights():
+            model = model_cls.from_config(config) if hasattr(model_cls, 'from_config') else model_cls(config)
+        model.model = torch.ao.quantization.quantize_dynamic(
+            model.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+        # Packed int8 parameters are not plain tensors; the file was written locally by optimize_model
+        state_dict = torch.load(variant_dir / entry.get('file', INT8_WEIGHTS), map_location='cpu', weights_only=False)
+        model.load_state_dict(state_dict)
+        # from_config() only derives generation defaults from the config: restore the
+        # saved ones (bad_words_ids, max_length, num_beams) so int8 decodes like fp32
+        if (variant_dir / "generation_config.json").exists():
+            model.generation_config = GenerationConfig.from_pretrained(variant_dir, local_files_only=True)
+        model.to(device)
+        model.eval()
+        print(f"📦 {label}: loaded pre-quantized int8 variant")
+
+        size_mb = round(_model_size_bytes(model) / 1024 / 1024, 1)
+        return model, {
+            'precision': 'int8',
+            'size_mb_before': entry.get('source_size_mb', size_mb),
+            'size_mb': size_mb,
+            'saved_mb': round(entry.get('source_size_mb', size_mb) - size_mb, 1),
+            'backend': self.name,
+            'weights': 'int8',
+            'variant': 'int8',
+        }
+
+
+class OnnxRuntimeBackend:
+    """
+    ONNX Runtime (CPU) seq2seq models exported with past-key-value caching.
+    The optimum ORTModelForSeq2SeqLM wrapper provides the same generate() API
+    as the PyTorch models, so decoding code and outputs stay unchanged.
+    """
+
+    name = 'onnx'
+
+    def load(self, model_cls, path, device, precision, default_dtype, label, **kwargs):
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise RuntimeError(
+                f"ONNX backend requires optimum[onnxruntime] ({e}). "
+                "Install with: pip install kabardian-translator[onnx]"
+            )
+
+        if device != 'cpu':
+            print(f"⚠️ {label}: ONNX backend runs on CPU (requested device: {device})")
+        if precision not in ('auto', 'fp32'):
+            print(f"⚠️ {label}: precision '{precision}' is not applied to ONNX models, using fp32")
+
+        onnx_path = Path(path) / ONNX_SUBDIR
+        if not (onnx_path / "config.json").exists():
+            raise RuntimeError(
+                f"ONNX export not found in {onnx_path}. "
+                "Run: kabardian-download-models --export-onnx"
+            )
+
+        # Match ONNX Runtime's thread pool to torch so workers do not oversubscribe cores
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = torch.get_num_threads()
+
+        model = ORTModelForSeq2SeqLM.from_pretrained(
+            onnx_path,
+            use_cache=True,
+            provider="CPUExecutionProvider",
+            session_options=session_options,
+            local_files_only=True,
+        )
+        print(f"⚡ {label}: ONNX Runtime backend loaded from {onnx_path}")
+
+        size_bytes = sum(f.stat().st_size for f in onnx_path.glob("*.onnx*"))
+        size_mb = round(size_bytes / 1024 / 1024, 1)
+        return model, {
+            'precision': 'fp32',
+            'size_mb_before': size_mb,
+            'size_mb': size_mb,
+            'saved_mb': 0.0,
+            'backend': self.name,
+        }
+
+
+BACKENDS = {
+    'torch': TorchBackend,
+    'onnx': OnnxRuntimeBackend,
+}
+
+# Models that can run on each backend
+BACKEND_MODELS = {
+    'torch': ('marian_ru_kbd', 'marian_kbd_ru', 'nllb200'),
+    'onnx': ('marian_ru_kbd', 'marian_kbd_ru'),
+}
+
+
+def get_backend(name):
+    """Backend instance by name"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}', expected one of {tuple(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+def validate_backends(backends):
+    """Check a {model_name: backend_name} mapping"""
+    for model_name, backend_name in backends.items():
+        if backend_name not in BACKENDS:
+            raise ValueError(f"Unknown inference backend '{backend_name}', expected one of {tuple(BACKENDS)}")
+        if model_name not in BACKEND_MODELS[backend_name]:
+            raise ValueError(f"Backend '{backend_name}' is not available for {model_name}")
+
+
+def export_marian_to_onnx(model_dir):
+    """
+    Export a downloaded MarianMT directory to ONNX (encoder, decoder and
+    decoder-with-past) into <model_dir>/onnx. Works offline.
+    """
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    from transformers import MarianTokenizer
+
+    model_dir = Path(model_dir)
+    if not (model_dir / "config.json").exists():
+        raise RuntimeError(f"MarianMT model not found in {model_dir}")
+
+    output_dir = model_dir / ONNX_SUBDIR
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+    print(f"   ⏳ Exporting {model_dir} to ONNX...")
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        model_dir, export=True, use_cache=True, local_files_only=True
+    )
+    model.save_pretrained(output_dir)
+    MarianTokenizer.from_pretrained(model_dir, local_files_only=True).save_pretrained(output_dir)
+
+    size_mb = sum(f.stat().st_size for f in output_dir.glob("*.onnx*")) / 1024 / 1024
+    print(f"   ✅ ONNX export saved to {output_dir} ({size_mb:.0f}MB)")
+    return output_dir
+
+
+def measure_load(model_dir, use_safetensors):
+    """
+    Load a seq2seq model the way TorchBackend does and report load time and
+    peak RSS of this process. Meant to run in a fresh subprocess (see
+    benchmark_load), so the peak belongs to this load alone.
+    """
+    import resource
+    import time
+    from transformers import AutoModelForSeq2SeqLM
+
+    start = time.perf_counter()
+    model = AutoModelForSeq2SeqLM.from_pretrained(
+        model_dir, use_safetensors=use_safetensors, low_cpu_mem_usage=True, local_files_only=True
+    )
+    model.eval()
+    load_seconds = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    return {
+        'weights': 'safetensors' if use_safetensors else 'bin',
+        'load_seconds': round(load_seconds, 2),
+        'peak_rss_mb': round(peak_mb, 1),
+    }
+
+
+def benchmark_load(model_dir, use_safetensors):
+    """Run measure_load in a subprocess; returns its result dict (or {'error': ...})"""
+    code = (
+        "import json, sys\n"
+        "from kabardian_translator.inference_backends import measure_load\n"
+        "print(json.dumps(measure_load(sys.argv[1], sys.argv[2] == 'safetensors')))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code, str(model_dir), 'safetensors' if use_safetensors else 'bin'],
+        capture_output=True, text=True, env={**os.environ, "HF_HUB_OFFLINE": "1"}
+    )
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed'}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def convert_to_safetensors(model_dir, remove_bin=False):
+    """
+    Rewrite the weights of a downloaded seq2seq model directory as safetensors
+    (offline). Load time and peak RSS are measured in subprocesses before and
+    after the conversion. The original pytorch_model.bin files are kept (the
+    safetensors weights take precedence when loading) unless `remove_bin` is set.
+
+    Returns:
+        dict: {'before': measurement or None, 'after': measurement}
+    """
+    from transformers import AutoModelForSeq2SeqLM
+
+    model_dir = Path(model_dir)
+    if not (model_dir / "config.json").exists():
+        raise RuntimeError(f"Model not found in {model_dir}")
+
+    before = None
+    if not has_safetensors(model_dir):
+        before = benchmark_load(model_dir, use_safetensors=False)
+
+        print(f"   ⏳ Converting {model_dir} to safetensors...")
+        model = AutoModelForSeq2SeqLM.from_pretrained(
+            model_dir, low_cpu_mem_usage=True, local_files_only=True
+        )
+        model.save_pretrained(model_dir, safe_serialization=True)
+        del model
+    else:
+        print(f"   ✅ {model_dir} already has safetensors weights")
+
+    if not has_safetensors(model_dir):
+        raise RuntimeError(f"Conversion of {model_dir} did not produce safetensors weights")
+
+    after = benchmark_load(model_dir, use_safetensors=True)
+    if 'error' in after:
+        raise RuntimeError(f"Converted model in {model_dir} does not load: {after['error']}")
+
+    if remove_bin:
+        for name in PYTORCH_BIN_FILES:
+            for path in model_dir.glob(name.replace("pytorch_model", "pytorch_model*")):
+                path.unlink()
+
+    return {'before': before, 'after': after}
+
+
+def optimize_model(model_dir, model_name, variants=('fp16', 'bf16', 'int8')):
+    """
+    Write serving-ready variants of a downloaded seq2seq model (offline) into
+    <model_dir>/optimized: fp16/bf16 safetensors, dynamically quantized int8
+    weights, and a fast tokenizer (tokenizer.json) where the tokenizer has a
+    fast implementation. The original files are left untouched, so removing
+    the optimized directory rolls everything back. The manifest written last
+    is what the translation service reads to pick a variant per device.
+
+    Returns:
+        dict: the manifest
+    """
+    import time
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    model_dir = Path(model_dir)
+    if not (model_dir / "config.json").exists():
+        raise RuntimeError(f"Model not found in {model_dir}")
+
+    output_dir = model_dir / OPTIMIZED_SUBDIR
+    output_dir.mkdir(exist_ok=True)
+    manifest = {
+        'model': model_name,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'variants': {},
+        'fast_tokenizer': False,
+    }
+
+    def _dir_size_mb(path):
+        return round(sum(f.stat().st_size for f in Path(path).rglob('*') if f.is_file()) / 1024 / 1024, 1)
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_dir, low_cpu_mem_usage=True, local_files_only=True)
+    model.eval()
+    source_size_mb = round(_model_size_bytes(model) / 1024 / 1024, 1)
+
+    for name, dtype in (('fp16', torch.float16), ('bf16', torch.bfloat16)):
+        if name not in variants:
+            continue
+        print(f"   ⏳ {model_name}: writing {name} safetensors...")
+        variant = AutoModelForSeq2SeqLM.from_pretrained(
+            model_dir, dtype=dtype, low_cpu_mem_usage=True, local_files_only=True
+        )
+        variant.save_pretrained(output_dir / name, safe_serialization=True)
+        del variant
+        manifest['variants'][name] = {
+            'path': name,
+            'format': 'safetensors',
+            'dtype': str(dtype).replace('torch.', ''),
+            'size_mb': _dir_size_mb(output_dir / name),
+        }
+
+    if 'int8' in variants:
+        print(f"   ⏳ {model_name}: writing int8 dynamically quantized weights...")
+        int8_dir = output_dir / 'int8'
+        int8_dir.mkdir(exist_ok=True)
+        model.config.save_pretrained(int8_dir)
+        if getattr(model, 'generation_config', None) is not None:
+            model.generation_config.save_pretrained(int8_dir)
+        model.model = torch.ao.quantization.quantize_dynamic(
+            model.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+        torch.save(model.state_dict(), int8_dir / INT8_WEIGHTS)
+        manifest['variants']['int8'] = {
+            'path': 'int8',
+            'format': 'torch_dynamic_int8',
+            'file': INT8_WEIGHTS,
+            'dtype': 'qint8',
+            'device': 'cpu',
+            'size_mb': _dir_size_mb(int8_dir),
+            'source_size_mb': source_size_mb,
+        }
+    del model
+
+    # Fast (Rust) tokenizers load from tokenizer.json, which AutoTokenizer prefers when present
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(model_dir, use_fast=True, local_files_only=True)
+        if getattr(tokenizer, 'is_fast', False):
+            tokenizer.save_pretrained(output_dir / FAST_TOKENIZER_SUBDIR)
+            manifest['fast_tokenizer'] = True
+            manifest['tokenizer_path'] = FAST_TOKENIZER_SUBDIR
+            print(f"   ✅ {model_name}: fast tokenizer saved")
+        else:
+            print(f"   💡 {model_name}: no fast tokenizer implementation, keeping the slow one")
+    except Exception as e:
+        print(f"   ⚠️ {model_name}: fast tokenizer conversion failed ({e}), keeping the slow one")
+
+    with open(output_dir / VARIANTS_MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(f"   ✅ {model_name}: variants {', '.join(manifest['variants'])} written to {output_dir}")
+    return manifest
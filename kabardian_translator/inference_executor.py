@@ -0,0 +1,138 @@
+# inference_executor.py
+# Per-model access control and bounded request queues for inference
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import threading
+import time
+from contextlib import contextmanager
+
+from .cancellation import current_token
+
+
+class QueueFull(Exception):
+    """A model's request queue is full (or the wait timed out); the request should be rejected"""
+
+
+class InferenceExecutor:
+    """
+    Owns access to the loaded models shared by all request threads.
+
+    Every model ('marian_ru_kbd', 'nllb200', 'silero_tts', ...) runs at most
+    `concurrency` inference calls at a time (1 = serialized). At most
+    `max_queue` callers may wait for a busy model; further callers, and
+    callers that wait longer than `queue_timeout` seconds, get QueueFull
+    immediately instead of piling up latency.
+    """
+
+    # How often a waiting request checks whether it was cancelled
+    CANCEL_POLL_SECONDS = 0.05
+
+    def __init__(self, max_queue=32, queue_timeout=30.0, concurrency=1):
+        """
+        Args:
+            max_queue: callers allowed to wait per model
+            queue_timeout: maximum wait for a model slot (seconds)
+            concurrency: inference calls running at once per model
+        """
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.concurrency = concurrency
+
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._stats = {}
+
+    def configure(self, max_queue=None, queue_timeout=None, concurrency=None):
+        """Change queue limits (concurrency applies to models first used afterwards)"""
+        with self._lock:
+            if max_queue is not None:
+                self.max_queue = max_queue
+            if queue_timeout is not None:
+                self.queue_timeout = queue_timeout
+            if concurrency is not None:
+                self.concurrency = concurrency
+        print(f"🚦 Inference queue: depth={self.max_queue}, timeout={self.queue_timeout}s, "
+              f"concurrency={self.concurrency} per model")
+
+    def _model_state(self, name):
+        """Slot semaphore and counters of a model (called with the lock held)"""
+        if name not in self._slots:
+            self._slots[name] = threading.BoundedSemaphore(self.concurrency)
+            self._stats[name] = {
+                'running': 0,
+                'waiting': 0,
+                'completed': 0,
+                'rejected': 0,
+                'timeouts': 0,
+                'cancelled': 0,
+                'wait_ms_total': 0.0,
+            }
+        return self._slots[name], self._stats[name]
+
+    @contextmanager
+    def use(self, name):
+        """Hold a slot of model `name` for the duration of the block"""
+        with self._lock:
+            slot, stats = self._model_state(name)
+            if stats['waiting'] >= self.max_queue:
+                stats['rejected'] += 1
+                raise QueueFull(f"Too many requests waiting for {name}, try again later")
+            stats['waiting'] += 1
+            timeout = self.queue_timeout
+
+        start = time.monotonic()
+        token = current_token()
+        try:
+            if token is None:
+                acquired = slot.acquire(timeout=timeout)
+            else:
+                # A cancelled request leaves the queue instead of waiting for its turn
+                acquired = False
+                deadline = start + timeout
+                while not acquired and time.monotonic() < deadline:
+                    if token.cancelled:
+                        with self._lock:
+                            stats['cancelled'] += 1
+                        token.check()
+                    acquired = slot.acquire(timeout=min(self.CANCEL_POLL_SECONDS, max(deadline - time.monotonic(), 0)))
+        finally:
+            with self._lock:
+                stats['waiting'] -= 1
+
+        if not acquired:
+            with self._lock:
+                stats['timeouts'] += 1
+            raise QueueFull(f"Timed out after {timeout}s waiting for {name}")
+
+        with self._lock:
+            stats['running'] += 1
+            stats['wait_ms_total'] += (time.monotonic() - start) * 1000
+        try:
+            yield
+        finally:
+            with self._lock:
+                stats['running'] -= 1
+                stats['completed'] += 1
+            slot.release()
+
+    def run(self, name, fn, *args, **kwargs):
+        """Call fn(*args, **kwargs) while holding a slot of model `name`"""
+        with self.use(name):
+            return fn(*args, **kwargs)
+
+    def get_stats(self):
+        """Queue counters per model for health reporting"""
+        with self._lock:
+            models = {}
+            for name, stats in self._stats.items():
+                models[name] = dict(stats)
+                started = stats['completed'] + stats['running']
+                models[name]['avg_wait_ms'] = round(stats['wait_ms_total'] / started, 2) if started else 0.0
+                del models[name]['wait_ms_total']
+            return {
+                'max_queue': self.max_queue,
+                'queue_timeout': self.queue_timeout,
+                'concurrency': self.concurrency,
+                'models': models,
+            }
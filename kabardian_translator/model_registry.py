@@ -0,0 +1,317 @@
+# model_registry.py
+# Single-flight loading and memory-budgeted residency of shared models
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import gc
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import torch
+
+from .inference_backends import _model_size_bytes
+
+
+def estimate_size(value):
+    """Approximate memory footprint (bytes) of a loaded model or a (tokenizer, model) tuple"""
+    items = value if isinstance(value, (tuple, list)) else (value,)
+    total = 0
+    for item in items:
+        # Silero TTS and the accentors wrap their networks in attributes
+        candidates = [item] + list(getattr(item, '__dict__', {}).values())
+        for candidate in candidates:
+            if callable(getattr(candidate, 'parameters', None)):
+                try:
+                    total += _model_size_bytes(candidate)
+                except Exception:
+                    continue
+                if candidate is item:
+                    break
+    return total
+
+
+class ModelRegistry:
+    """
+    Holds the loaded models shared by all request threads and loads each one
+    at most once. The first caller of get() runs the loader; concurrent
+    callers for the same model wait for that load and share its result (or
+    its error). A failed load is retried by the next caller.
+
+    With a memory budget, loading a model first evicts the least recently
+    used idle models until the expected footprint fits; models idle longer
+    than `idle_ttl` seconds are evicted as well. Evicted models are reloaded
+    on their next use. Models held through use() are never evicted.
+    """
+
+    def __init__(self, max_memory_mb=None, idle_ttl=None):
+        """
+        Args:
+            max_memory_mb: memory budget for all resident models (None = unlimited)
+            idle_ttl: evict models unused for this many seconds (None = never)
+        """
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Per-model counters that survive eviction
+        self._counters = {}
+
+        self.max_bytes = None
+        self.idle_ttl = None
+        self._reaper = None
+        self._reaper_pid = None
+        self.configure(max_memory_mb, idle_ttl, quiet=True)
+
+    def configure(self, max_memory_mb=None, idle_ttl=None, quiet=False):
+        """Set the memory budget and idle TTL (None disables either)"""
+        self.max_bytes = int(max_memory_mb * 1024 * 1024) if max_memory_mb else None
+        self.idle_ttl = idle_ttl
+        if not quiet:
+            budget = f"{max_memory_mb}MB" if max_memory_mb else "unlimited"
+            print(f"🧠 Model memory budget: {budget}, idle TTL: {f'{idle_ttl}s' if idle_ttl else 'off'}")
+        self._make_room(None, 0)
+
+    def _counter(self, name):
+        return self._counters.setdefault(name, {'loads': 0, 'evictions': 0, 'size_bytes': None})
+
+    def get(self, name, loader):
+        """Return model `name`, calling loader() to load it if it is not resident"""
+        return self._acquire(name, loader, pin=False)
+
+    @contextmanager
+    def use(self, name, loader):
+        """Load model `name` if needed and keep it from being evicted for the duration of the block"""
+        value = self._acquire(name, loader, pin=True)
+        try:
+            yield value
+        finally:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None and entry['value'] is value:
+                    entry['in_use'] -= 1
+                    entry['last_used'] = time.time()
+
+    def _acquire(self, name, loader, pin):
+        if self.idle_ttl:
+            self._ensure_reaper()
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None and entry['state'] == 'ready':
+                    entry['last_used'] = time.time()
+                    if pin:
+                        entry['in_use'] += 1
+                    return entry['value']
+
+                owner = entry is None or entry['state'] == 'failed'
+                if owner:
+                    entry = {
+                        'state': 'loading',
+                        'value': None,
+                        'error': None,
+                        'event': threading.Event(),
+                        'started': time.time(),
+                        'load_seconds': None,
+                        'size_bytes': 0,
+                        'last_used': None,
+                        'in_use': 0,
+                    }
+                    self._entries[name] = entry
+
+            if owner:
+                return self._load(name, entry, loader, pin)
+
+            print(f"⏳ Waiting for {name} to finish loading...")
+            entry['event'].wait()
+            if entry['state'] == 'interrupted':
+                # The loading request was cancelled: load it for this one instead
+                continue
+            if entry['state'] != 'ready':
+                raise RuntimeError(f"Loading {name} failed: {entry['error']}")
+            # Loop to pin/touch the loaded entry under the lock
+
+    def _load(self, name, entry, loader, pin):
+        try:
+            # Make room for the size this model had on its previous load
+            self._make_room(name, self._counter(name)['size_bytes'] or 0)
+            value = loader()
+        except BaseException as e:
+            # Never leave the entry 'loading': waiters would block forever. A load
+            # interrupted by a cancellation (not an Exception) is retried by the next caller
+            with self._lock:
+                entry['error'] = str(e)
+                if isinstance(e, Exception):
+                    entry['state'] = 'failed'
+                else:
+                    entry['state'] = 'interrupted'
+                    if self._entries.get(name) is entry:
+                        del self._entries[name]
+            entry['event'].set()
+            raise
+
+        size = estimate_size(value)
+        with self._lock:
+            entry['value'] = value
+            entry['state'] = 'ready'
+            entry['size_bytes'] = size
+            entry['last_used'] = time.time()
+            entry['in_use'] = 1 if pin else 0
+            entry['load_seconds'] = round(time.time() - entry['started'], 2)
+            counter = self._counter(name)
+            counter['loads'] += 1
+            counter['size_bytes'] = size
+        entry['event'].set()
+        print(f"📦 {name} ready ({entry['load_seconds']}s, ~{size / 1024 / 1024:.0f}MB)")
+
+        self._make_room(name, 0)
+        return value
+
+    def _resident_bytes(self):
+        return sum(e['size_bytes'] for e in self._entries.values() if e['state'] == 'ready')
+
+    def _evict(self, name):
+        """Drop a ready entry (called with the lock held)"""
+        del self._entries[name]
+        self._counter(name)['evictions'] += 1
+
+    def _make_room(self, loading_name, incoming_bytes):
+        """Evict least recently used idle models until `incoming_bytes` more fit into the budget"""
+        if self.max_bytes is None:
+            return
+
+        evicted = []
+        with self._lock:
+            resident = self._resident_bytes()
+            candidates = sorted(
+                (n for n, e in self._entries.items()
+                 if e['state'] == 'ready' and e['in_use'] == 0 and n != loading_name),
+                key=lambda n: self._entries[n]['last_used']
+            )
+            while resident + incoming_bytes > self.max_bytes and candidates:
+                victim = candidates.pop(0)
+                resident -= self._entries[victim]['size_bytes']
+                self._evict(victim)
+                evicted.append(victim)
+
+        if evicted:
+            print(f"🧹 Evicted {', '.join(evicted)} to stay within the model memory budget")
+            self._free_memory()
+        if resident + incoming_bytes > self.max_bytes:
+            print(f"⚠️ Models in use need ~{(resident + incoming_bytes) / 1024 / 1024:.0f}MB, "
+                  f"over the {self.max_bytes / 1024 / 1024:.0f}MB budget")
+
+    def sweep(self):
+        """Evict models idle longer than idle_ttl; returns their names"""
+        if not self.idle_ttl:
+            return []
+
+        now = time.time()
+        with self._lock:
+            expired = [
+                n for n, e in self._entries.items()
+                if e['state'] == 'ready' and e['in_use'] == 0 and now - e['last_used'] > self.idle_ttl
+            ]
+            for name in expired:
+                self._evict(name)
+
+        if expired:
+            print(f"🧹 Evicted idle models: {', '.join(expired)}")
+            self._free_memory()
+        return expired
+
+    def _ensure_reaper(self):
+        # Threads do not survive fork(), so each process runs its own reaper
+        if self._reaper is not None and self._reaper.is_alive() and self._reaper_pid == os.getpid():
+            return
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive() and self._reaper_pid == os.getpid():
+                return
+            self._reaper_pid = os.getpid()
+            self._reaper = threading.Thread(target=self._reap_loop, name="model-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while self.idle_ttl:
+            time.sleep(min(max(self.idle_ttl / 2, 1), 60))
+            self.sweep()
+
+    def _free_memory(self):
+        gc.collect()
+        if torch.backends.mps.is_available():
+            torch.mps.empty_cache()
+        elif torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def peek(self, name):
+        """Resident model `name` or None, without loading it"""
+        with self._lock:
+            entry = self._entries.get(name)
+            return entry['value'] if entry is not None and entry['state'] == 'ready' else None
+
+    def release(self, name):
+        """Drop the registry's reference to a loaded model (a load in progress is kept)"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry['state'] != 'loading':
+                del self._entries[name]
+
+    def is_loading(self):
+        """True while any model is being loaded"""
+        with self._lock:
+            return any(entry['state'] == 'loading' for entry in self._entries.values())
+
+    def loading(self):
+        """
+        Models being loaded: {'first': never loaded before, 'reload': loaded
+        before and evicted or released}. Only first loads mean that this
+        process cannot serve the model yet.
+        """
+        with self._lock:
+            loading = {'first': [], 'reload': []}
+            for name, entry in self._entries.items():
+                if entry['state'] != 'loading':
+                    continue
+                counter = self._counters.get(name)
+                loaded_before = counter is not None and counter['loads'] > 0
+                loading['reload' if loaded_before else 'first'].append(name)
+            return loading
+
+    def status(self):
+        """State, footprint and counters per model (including evicted ones) for health reporting"""
+        now = time.time()
+        with self._lock:
+            status = {}
+            for name, counter in self._counters.items():
+                status[name] = {
+                    'state': 'evicted' if counter['evictions'] else 'unloaded',
+                    'loads': counter['loads'],
+                    'evictions': counter['evictions'],
+                    'size_mb': round(counter['size_bytes'] / 1024 / 1024, 1) if counter['size_bytes'] else None,
+                }
+            for name, entry in self._entries.items():
+                model = status.setdefault(name, {
+                    'loads': 0, 'evictions': 0, 'size_mb': None,
+                })
+                model['state'] = entry['state']
+                model['load_seconds'] = entry['load_seconds']
+                if entry['state'] == 'ready':
+                    model['in_use'] = entry['in_use']
+                    model['idle_seconds'] = round(now - entry['last_used'], 1)
+                if entry['state'] == 'loading':
+                    model['loading_for_seconds'] = round(now - entry['started'], 1)
+                if entry['error']:
+                    model['error'] = entry['error']
+            return status
+
+    def get_stats(self):
+        """Memory budget and residency totals for health reporting"""
+        with self._lock:
+            return {
+                'budget_mb': round(self.max_bytes / 1024 / 1024, 1) if self.max_bytes else None,
+                'idle_ttl': self.idle_ttl,
+                'resident_mb': round(self._resident_bytes() / 1024 / 1024, 1),
+                'resident_models': sorted(n for n, e in self._entries.items() if e['state'] == 'ready'),
+                'loads': sum(c['loads'] for c in self._counters.values()),
+                'evictions': sum(c['evictions'] for c in self._counters.values()),
+            }
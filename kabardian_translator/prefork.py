@@ -0,0 +1,149 @@
+# prefork.py
+# Multi-process serving: models loaded once in a master, shared copy-on-write by forked workers
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+import torch
+
+
+def default_torch_threads(workers):
+    """Intra-op threads per worker so that all workers together use each core once"""
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+class PreforkServer:
+    """
+    Pre-fork server for the Flask app.
+
+    The master process opens the listening socket, loads (and warms up) the
+    models and then forks `workers` processes. Workers inherit the model
+    weights copy-on-write, so N workers cost about one copy of the model RAM,
+    and each accepts connections on the shared socket with its own GIL.
+    Every worker limits torch to `torch_threads` intra-op threads. Workers
+    that die are replaced; SIGINT/SIGTERM stop all of them.
+    """
+
+    def __init__(self, app, host, port, workers=2, torch_threads=None, cleanup=None):
+        """
+        Args:
+            app: WSGI application
+            host, port: address to listen on
+            workers: number of worker processes
+            torch_threads: torch intra-op threads per worker (default: cores // workers)
+            cleanup: callable run in a worker before it exits
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.torch_threads = torch_threads or default_torch_threads(workers)
+        self.cleanup = cleanup
+
+        self._socket = None
+        self._children = {}
+        self._stopping = False
+
+    def _listen(self):
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(128)
+        sock.set_inheritable(True)
+        self._socket = sock
+
+    def serve(self, before_fork=None):
+        """
+        Load models via before_fork() and serve until stopped (blocks in the master).
+
+        Args:
+            before_fork: callable run in the master before forking (loads and warms up the models)
+        """
+        # GNU OpenMP thread pools do not survive fork(): keep the master single-threaded
+        torch.set_num_threads(1)
+        self._listen()
+
+        if before_fork:
+            before_fork()
+
+        # Move everything loaded so far out of the collector's reach, so garbage
+        # collection in the workers does not write to (and un-share) those pages
+        gc.collect()
+        gc.freeze()
+
+        print(f"🧩 Starting {self.workers} workers with {self.torch_threads} torch thread(s) each "
+              f"on http://{self.host}:{self.port}")
+        for index in range(self.workers):
+            self._spawn(index)
+
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+        self._supervise()
+
+    def _spawn(self, index):
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(index)  # never returns
+        self._children[pid] = index
+
+    def _run_worker(self, index):
+        code = 0
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is handled by the master
+            signal.signal(signal.SIGTERM, lambda sig, frame: sys.exit(0))
+            torch.set_num_threads(self.torch_threads)
+
+            from werkzeug.serving import make_server
+
+            server = make_server(self.host, self.port, self.app, threaded=True, fd=self._socket.fileno())
+            print(f"👷 Worker {index} (pid {os.getpid()}) ready")
+            server.serve_forever()
+        except SystemExit as e:
+            code = e.code or 0
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            try:
+                if self.cleanup:
+                    self.cleanup()
+            finally:
+                # Skip the master's atexit handlers and finally blocks
+                os._exit(code)
+
+    def _stop(self, sig, frame):
+        if self._stopping:
+            return
+        self._stopping = True
+        print("\n🛑 Stopping workers...")
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _supervise(self):
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+
+            index = self._children.pop(pid, None)
+            if index is None or self._stopping:
+                continue
+
+            print(f"⚠️ Worker {index} (pid {pid}) exited with status {status}, restarting")
+            time.sleep(1)
+            self._spawn(index)
+
+        self._socket.close()
+        print("✅ All workers stopped")
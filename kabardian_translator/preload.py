@@ -0,0 +1,86 @@
+# preload.py
+# Background model preload and warmup at server startup
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import threading
+import time
+
+
+class Preloader:
+    """
+    Loads and warms up the translation and TTS models in a background thread,
+    so the first user after a deploy does not pay for model loading. The
+    server reports ready only after warmup has finished; if preloading
+    fails, models are loaded lazily on first use as without preloading.
+    Models that loaded but failed their warmup are listed in warmup_errors.
+    """
+
+    def __init__(self, translator, tts_service=None, warmup=True):
+        self.translator = translator
+        self.tts_service = tts_service
+        self.warmup = warmup
+
+        self.state = 'pending'
+        self.error = None
+        self.warmup_errors = {}
+        self.timings = {}
+        self.total_seconds = None
+        self._thread = None
+
+    def start(self):
+        """Start preloading in a daemon thread (returns immediately)"""
+        self._thread = threading.Thread(target=self.run, name="model-preload", daemon=True)
+        self._thread.start()
+        return self
+
+    def run(self):
+        """Load and warm up all models in the calling thread"""
+        print(f"🔥 Preloading models{' with warmup' if self.warmup else ''}...")
+        start = time.time()
+        self.state = 'loading'
+        try:
+            self.timings.update(self.translator.preload(warmup=self.warmup))
+            if self.tts_service:
+                self.timings.update(self.tts_service.preload(warmup=self.warmup))
+            self.warmup_errors = {
+                name: timing['warmup_error'] for name, timing in self.timings.items() if 'warmup_error' in timing
+            }
+            self.state = 'ready'
+        except Exception as e:
+            self.state = 'failed'
+            self.error = str(e)
+            print(f"❌ Preload failed: {e} (models will be loaded on first use)")
+        self.total_seconds = round(time.time() - start, 2)
+        if self.state == 'ready' and self.warmup_errors:
+            print(f"⚠️ Models preloaded in {self.total_seconds}s, warmup failed for: {', '.join(self.warmup_errors)}")
+        elif self.state == 'ready':
+            print(f"✅ Models preloaded and warmed up in {self.total_seconds}s")
+
+    def wait(self, timeout=None):
+        """Block until preloading has finished; returns True when ready"""
+        if self._thread:
+            self._thread.join(timeout)
+        return self.ready
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    @property
+    def failed(self):
+        return self.state == 'failed'
+
+    def get_status(self):
+        """Preload state and per-model timings for health reporting"""
+        status = {
+            'state': self.state,
+            'warmup': self.warmup,
+            'timings': dict(self.timings),
+            'total_seconds': self.total_seconds,
+        }
+        if self.error:
+            status['error'] = self.error
+        if self.warmup_errors:
+            status['warmup_errors'] = dict(self.warmup_errors)
+        return status
@@ -0,0 +1,115 @@
+# request_coalescer.py
+# Single-flight deduplication of identical concurrent translation requests
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import threading
+
+from .cancellation import CancellationToken, Cancelled, cancellation_scope, current_token
+
+
+class RequestCoalescer:
+    """
+    Runs each computation at most once among concurrent callers with the
+    same key. The first caller (the leader) computes; callers arriving
+    while it runs attach to it, wait and receive the same result (or
+    error). Nothing is kept after the computation ends: repeated requests
+    are served by the translation cache.
+
+    The shared computation runs with its own cancellation token, which is
+    cancelled only once every participant's request has been cancelled. A
+    participant that is cancelled earlier stops waiting right away.
+    """
+
+    # How often a waiting participant checks whether its request was cancelled
+    CANCEL_POLL_SECONDS = 0.05
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.stats = {'computations': 0, 'coalesced': 0, 'cancelled_computations': 0}
+
+    def run(self, key, compute):
+        """
+        Return compute() for `key`, sharing one call among concurrent callers.
+
+        Returns:
+            (result, coalesced): coalesced is True when the result was computed for another caller
+        """
+        token = current_token()
+        with self._lock:
+            entry = self._in_flight.get(key)
+            if entry is not None and not entry['token'].cancelled:
+                self._attach(entry, token)
+                self.stats['coalesced'] += 1
+                leader = False
+            else:
+                entry = {
+                    'event': threading.Event(),
+                    'token': CancellationToken(),
+                    'participants': [],
+                    'result': None,
+                    'error': None,
+                }
+                self._attach(entry, token)
+                self._in_flight[key] = entry
+                self.stats['computations'] += 1
+                leader = True
+
+        try:
+            if leader:
+                return self._compute(key, entry, compute), False
+
+            self._wait(entry, token)
+            if entry['error'] is not None:
+                raise entry['error']
+            return entry['result'], True
+        except Cancelled:
+            # Report this caller's own reason (client disconnected, superseded)
+            if token is not None and token.cancelled:
+                raise Cancelled(token.reason) from None
+            raise
+
+    def _attach(self, entry, token):
+        """Add a participant (called with the lock held)"""
+        entry['participants'].append(token)
+        if token is None:
+            return
+
+        def participant_cancelled():
+            # A participant without a token (None) keeps the computation alive
+            if all(p is not None and p.cancelled for p in entry['participants']):
+                entry['token'].cancel(token.reason)
+
+        token.on_cancel(participant_cancelled)
+
+    def _compute(self, key, entry, compute):
+        try:
+            with cancellation_scope(entry['token']):
+                entry['result'] = compute()
+            return entry['result']
+        except (Exception, Cancelled) as e:
+            entry['error'] = e
+            if isinstance(e, Cancelled):
+                self.stats['cancelled_computations'] += 1
+            raise
+        finally:
+            with self._lock:
+                if self._in_flight.get(key) is entry:
+                    del self._in_flight[key]
+            entry['event'].set()
+
+    def _wait(self, entry, token):
+        if token is None:
+            entry['event'].wait()
+            return
+        while not entry['event'].wait(self.CANCEL_POLL_SECONDS):
+            token.check()
+
+    def get_stats(self):
+        """Coalescing counters for health reporting"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['in_flight'] = len(self._in_flight)
+            stats['waiting'] = sum(len(e['participants']) - 1 for e in self._in_flight.values())
+        return stats
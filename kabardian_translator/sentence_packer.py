@@ -0,0 +1,133 @@
+# sentence_packer.py
+# Token-budget chunking of input text for translation
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import re
+
+# Sentence end: .!?… followed by whitespace (the whitespace is kept as separator)
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])(\s+)')
+
+# Clause boundaries inside an over-long sentence
+CLAUSE_BOUNDARY = re.compile(r'(?<=[,;:])(\s+)')
+
+WORD_BOUNDARY = re.compile(r'(\s+)')
+
+
+def estimate_tokens(texts):
+    """Rough subword count used when no tokenizer is available"""
+    return [len(text.split()) * 2 + 1 for text in texts]
+
+
+class SentencePacker:
+    """
+    Splits text into translation chunks measured in model tokens.
+
+    Sentences longer than `max_tokens` are split at clause boundaries
+    (, ; :) and, if still too long, between words. With `pack_tokens` set,
+    adjacent short sentences are also packed into one chunk up to that
+    many tokens; chunks never cross a line break. Each chunk comes with the
+    whitespace that followed it in the source, so translations can be
+    joined back with the original spacing.
+
+    Packing is off by default: a chunk is the unit of the sentence cache
+    and of streamed 'sentence' events, so packed sentences are only reused
+    from the cache together with the same neighbours and stream in groups.
+    It pays off for texts of many very short sentences without repeats.
+    """
+
+    def __init__(self, pack_tokens=0, max_tokens=200):
+        """
+        Args:
+            pack_tokens: pack adjacent sentences while the chunk stays within this many tokens (0: never)
+            max_tokens: split sentences longer than this (well below the 512-token truncation)
+        """
+        self.pack_tokens = pack_tokens
+        self.max_tokens = max_tokens
+
+    @staticmethod
+    def _segments(text, pattern):
+        """[(piece, following whitespace), ...] in text order"""
+        parts = pattern.split(text)
+        pieces = parts[0::2]
+        separators = parts[1::2] + ['']
+        return [(p, s) for p, s in zip(pieces, separators) if p]
+
+    def split(self, text, count_tokens=None):
+        """
+        Args:
+            text: source text
+            count_tokens: callable(list of str) -> list of token counts (default: estimate)
+
+        Returns:
+            (chunks, separators): chunk texts and the whitespace to put after each translation
+        """
+        count_tokens = count_tokens or estimate_tokens
+        text = text.strip()
+        if not text:
+            return [], []
+
+        sentences = self._segments(text, SENTENCE_BOUNDARY)
+        counts = count_tokens([s for s, _ in sentences])
+
+        # Over-long sentences become several pieces, each within max_tokens
+        pieces = []
+        for (sentence, separator), tokens in zip(sentences, counts):
+            if tokens <= self.max_tokens:
+                pieces.append((sentence, separator, tokens))
+            else:
+                pieces.extend(self._split_long(sentence, separator, count_tokens))
+
+        # Greedily pack neighbours into chunks of at most pack_tokens (0 keeps one chunk per piece)
+        chunks, separators = [], []
+        current, current_tokens = None, 0
+        for piece, separator, tokens in pieces:
+            if current is not None and current_tokens + tokens <= self.pack_tokens \
+                    and '\n' not in separators[-1]:
+                current = current + separators[-1] + piece
+                current_tokens += tokens
+                chunks[-1] = current
+                separators[-1] = separator
+            else:
+                current, current_tokens = piece, tokens
+                chunks.append(piece)
+                separators.append(separator)
+
+        return chunks, separators
+
+    def _split_long(self, sentence, separator, count_tokens):
+        """Split a sentence at clause boundaries, then between words, into pieces within max_tokens"""
+        pieces = []
+        clauses = self._segments(sentence, CLAUSE_BOUNDARY)
+        clause_counts = count_tokens([c for c, _ in clauses])
+
+        for (clause, clause_sep), tokens in zip(clauses, clause_counts):
+            if tokens <= self.max_tokens:
+                pieces.append((clause, clause_sep, tokens))
+                continue
+
+            # No usable punctuation: cut between words, estimating tokens per word
+            words = self._segments(clause, WORD_BOUNDARY)
+            per_word = tokens / max(len(words), 1)
+            group, group_sep, group_tokens = '', '', 0.0
+            for word, word_sep in words:
+                if group and group_tokens + per_word > self.max_tokens:
+                    pieces.append((group, group_sep, int(group_tokens)))
+                    group, group_tokens = '', 0.0
+                group = group + group_sep + word if group else word
+                group_sep = word_sep
+                group_tokens += per_word
+            pieces.append((group, clause_sep, int(group_tokens)))
+
+        # Merge clauses back up to max_tokens so pieces stay as long as allowed
+        merged = []
+        for piece, piece_sep, tokens in pieces:
+            if merged and merged[-1][2] + tokens <= self.max_tokens:
+                text, sep, count = merged[-1]
+                merged[-1] = (text + sep + piece, piece_sep, count + tokens)
+            else:
+                merged.append((piece, piece_sep, tokens))
+
+        text, _, count = merged[-1]
+        merged[-1] = (text, separator, count)
+        return merged
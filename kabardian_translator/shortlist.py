@@ -0,0 +1,217 @@
+# shortlist.py
+# Target-language lexical shortlists for NLLB-200 decoding
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+import torch
+
+# Shortlists live next to the model they were built for (models/nllb200/shortlists.json)
+SHORTLISTS_FILE = "shortlists.json"
+
+
+class ShortlistProjection(torch.nn.Module):
+    """
+    Drop-in replacement for a model's lm_head that, inside restrict(), scores
+    only a shortlist of token ids: one small matmul, and logits (softmax, beam
+    top-k) over the shortlist instead of the whole vocabulary.
+
+    While restricted, generate() works in shortlist positions: the projection
+    returns logits indexed by position in the sorted shortlist, the decoder's
+    input ids are mapped back to vocabulary ids before embedding (see
+    install_shortlist_projection), and callers map special token ids with
+    to_shortlist() and the generated sequences with to_vocabulary(). The
+    shortlist is per thread, so concurrent generations with different
+    targets do not mix.
+    """
+
+    def __init__(self, lm_head):
+        super().__init__()
+        self.full = lm_head
+        self._local = threading.local()
+
+    @property
+    def weight(self):
+        return self.full.weight
+
+    @property
+    def out_features(self):
+        return self.full.out_features
+
+    @property
+    def ids(self):
+        """Sorted vocabulary ids of this thread's shortlist, or None when not restricted"""
+        return getattr(self._local, 'ids', None)
+
+    @contextmanager
+    def restrict(self, token_ids):
+        """Score only `token_ids` in forward() calls of this thread for the duration of the block"""
+        weight = self.full.weight
+        ids = torch.as_tensor(sorted(token_ids), dtype=torch.long, device=weight.device)
+        self._local.ids = ids
+        self._local.weight = weight.index_select(0, ids)
+        self._local.bias = self.full.bias.index_select(0, ids) if self.full.bias is not None else None
+        try:
+            yield
+        finally:
+            self._local.ids = None
+            self._local.weight = None
+            self._local.bias = None
+
+    def to_shortlist(self, token_id):
+        """Position of a vocabulary id in the current shortlist (the id must be in it)"""
+        position = int(torch.searchsorted(self.ids, token_id))
+        if position >= len(self.ids) or int(self.ids[position]) != token_id:
+            raise ValueError(f"Token id {token_id} is not in the shortlist")
+        return position
+
+    def to_vocabulary(self, positions):
+        """Map a tensor of shortlist positions back to vocabulary ids"""
+        return self.ids[positions]
+
+    def map_decoder_inputs(self, module, args, kwargs):
+        """Forward pre-hook of the decoder: shortlist positions → vocabulary ids before embedding"""
+        ids = self.ids
+        if ids is None:
+            return args, kwargs
+        if kwargs.get('input_ids') is not None:
+            kwargs['input_ids'] = ids[kwargs['input_ids']]
+        elif args and torch.is_tensor(args[0]):
+            args = (ids[args[0]],) + tuple(args[1:])
+        return args, kwargs
+
+    def forward(self, hidden_states):
+        if self.ids is None:
+            return self.full(hidden_states)
+        return torch.nn.functional.linear(hidden_states, self._local.weight, self._local.bias)
+
+
+def install_shortlist_projection(model):
+    """Wrap the model's lm_head in a ShortlistProjection (once); returns it, or None if unsupported"""
+    lm_head = getattr(model, 'lm_head', None)
+    if isinstance(lm_head, ShortlistProjection):
+        return lm_head
+    decoder = model.get_decoder() if hasattr(model, 'get_decoder') else None
+    if not isinstance(lm_head, torch.nn.Linear) or decoder is None:
+        return None
+    projection = ShortlistProjection(lm_head)
+    decoder.register_forward_pre_hook(projection.map_decoder_inputs, with_kwargs=True)
+    model.lm_head = projection
+    return projection
+
+
+def load_shortlists(model_dir):
+    """{nllb_code: [token ids]} from <model_dir>/shortlists.json, or None"""
+    path = Path(model_dir) / SHORTLISTS_FILE
+    if not path.exists():
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            return {lang: entry['ids'] for lang, entry in json.load(f)['languages'].items()}
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Ignoring unreadable shortlists {path}: {e}")
+        return None
+
+
+def build_shortlists(model_dir, corpus_dir, languages, coverage=1.0):
+    """
+    Build per-target-language shortlists from corpus/<nllb_code>.txt (offline)
+    and write them to <model_dir>/shortlists.json.
+
+    Args:
+        model_dir: NLLB-200 directory whose tokenizer defines the ids
+        corpus_dir: directory with one <nllb_code>.txt file per language
+        languages: NLLB codes to build shortlists for
+        coverage: keep the most frequent tokens covering this share of the corpus tokens
+
+    Returns:
+        dict: {nllb_code: shortlist size}
+    """
+    from transformers import AutoTokenizer
+
+    from .vocab_trim import read_corpus
+
+    model_dir = Path(model_dir)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+    always = set(tokenizer.all_special_ids)
+
+    shortlists = {}
+    for language in languages:
+        lines = read_corpus(corpus_dir, language)
+        if not lines:
+            print(f"⚠️ No corpus for {language}, no shortlist (full vocabulary is used)")
+            continue
+
+        counts = Counter()
+        for start in range(0, len(lines), 256):
+            for ids in tokenizer(lines[start:start + 256], add_special_tokens=False)['input_ids']:
+                counts.update(ids)
+
+        total = sum(counts.values())
+        kept, covered = set(), 0
+        for token_id, count in counts.most_common():
+            if covered >= coverage * total:
+                break
+            kept.add(token_id)
+            covered += count
+        kept |= always
+        kept.add(tokenizer.convert_tokens_to_ids(language))
+
+        shortlists[language] = {'ids': sorted(kept), 'sentences': len(lines)}
+        print(f"   📋 {language}: {len(kept)} tokens from {len(lines)} sentences")
+
+    with open(model_dir / SHORTLISTS_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'vocab_size': len(tokenizer),
+            'coverage': coverage,
+            'languages': shortlists,
+        }, f)
+    print(f"✅ Shortlists for {len(shortlists)} languages written to {model_dir / SHORTLISTS_FILE}")
+    return {language: len(entry['ids']) for language, entry in shortlists.items()}
+
+
+def sequence_confidence(model, inputs, sequences, pad_token_id, prefix_tokens=2, encoder_hidden_states=None):
+    """
+    Average log-probability per generated token of each sequence under the
+    full vocabulary, from one teacher-forced decoder pass (outside restrict()).
+    Translations decoded over different shortlists are thus scored on the same
+    support. The first `prefix_tokens` of each sequence (decoder start and
+    forced language token) are not scored, nor is padding.
+
+    Args:
+        model: seq2seq model with a ShortlistProjection lm_head
+        inputs: encoded source batch ('attention_mask', and 'input_ids' unless
+            encoder_hidden_states is given)
+        sequences: generated vocabulary ids, one row per source row
+        pad_token_id: padding id of the generated sequences
+        encoder_hidden_states: encoder states of the batch from generate(), to skip the encoder
+    """
+    projection = model.lm_head.full if isinstance(model.lm_head, ShortlistProjection) else model.lm_head
+    targets = sequences[:, 1:]
+    with torch.no_grad():
+        if encoder_hidden_states is None:
+            encoder_hidden_states = model.get_encoder()(
+                input_ids=inputs['input_ids'], attention_mask=inputs['attention_mask']
+            ).last_hidden_state
+        hidden = model.get_decoder()(
+            input_ids=sequences[:, :-1],
+            encoder_hidden_states=encoder_hidden_states,
+            encoder_attention_mask=inputs['attention_mask'],
+        ).last_hidden_state
+
+        scores = []
+        # One row at a time: full-vocabulary logits of a whole batch can take gigabytes
+        for row in range(hidden.shape[0]):
+            log_probs = torch.log_softmax(projection(hidden[row]).float(), dim=-1)
+            token_scores = log_probs.gather(-1, targets[row].unsqueeze(-1)).squeeze(-1)
+            mask = targets[row].ne(pad_token_id)
+            mask[:prefix_tokens - 1] = False
+            scores.append(float((token_scores * mask).sum() / mask.sum().clamp(min=1)))
+    return scores
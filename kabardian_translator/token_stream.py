@@ -0,0 +1,70 @@
+# token_stream.py
+# Token-level streaming: generate() runs in a worker thread, text is yielded as tokens are produced
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import threading
+from contextlib import nullcontext
+
+import torch
+
+from .cancellation import CancellationToken, cancellation_scope, current_token, stopping_kwargs
+
+
+def stream_generate(model, tokenizer, generate_kwargs, slot=None):
+    """
+    Greedy generate() of one sentence, yielding decoded text pieces as they
+    are produced (TextIteratorStreamer emits whole words).
+
+    Beam search cannot emit tokens before it finishes, so streaming always
+    decodes greedily (num_beams=1). generate() runs in a worker thread;
+    closing the generator early, or cancelling the current request, stops
+    it at the next decoding step.
+
+    Args:
+        model: seq2seq model
+        tokenizer: tokenizer used to decode the generated ids
+        generate_kwargs: encoded inputs and generation limits
+        slot: context manager held by the worker thread while generating
+              (e.g. an inference executor slot)
+    """
+    from transformers import TextIteratorStreamer
+
+    streamer = TextIteratorStreamer(tokenizer, skip_special_tokens=True)
+    request_token = current_token()
+    stop = CancellationToken()
+    errors = []
+
+    kwargs = dict(generate_kwargs)
+    kwargs.pop('early_stopping', None)
+    kwargs.update(
+        streamer=streamer,
+        num_beams=1,
+        do_sample=False,
+        **stopping_kwargs(stop),
+    )
+
+    def run():
+        try:
+            # The request's token also cancels the wait for the slot
+            with cancellation_scope(request_token), slot or nullcontext(), torch.no_grad():
+                model.generate(**kwargs)
+        except BaseException as e:
+            errors.append(e)
+            # Unblock the reader
+            streamer.end()
+
+    thread = threading.Thread(target=run, name="stream-generate", daemon=True)
+    thread.start()
+    try:
+        for piece in streamer:
+            if piece:
+                yield piece
+        thread.join()
+        if errors:
+            raise errors[0]
+        if request_token is not None:
+            request_token.check()
+    finally:
+        stop.cancel('stream closed')
+        thread.join()
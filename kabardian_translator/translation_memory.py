@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# translation_memory.py
+# Persistent on-disk translation memory shared between worker processes
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+
+
+class TranslationMemory:
+    """
+    SQLite-backed sentence translation memory.
+
+    Every process (and thread) opens its own connection; SQLite's WAL mode
+    with a busy timeout makes concurrent readers and writers from several
+    worker processes safe. The store is bounded by size: when it grows past
+    max_size_mb, the least recently used entries are deleted. Entry count
+    and total size are kept up to date by triggers in a one-row table, so
+    size checks and health reporting never scan the store.
+    """
+
+    # Check the size budget every N writes instead of on each insert
+    EVICTION_CHECK_INTERVAL = 100
+
+    # Refresh last_used on read at most this often (seconds) to limit write traffic
+    TOUCH_INTERVAL = 60
+
+    # Insert or update in place: INSERT OR REPLACE would delete the old row
+    # without firing the delete trigger that maintains the totals
+    UPSERT = (
+        "INSERT INTO translations (key, value, size, created, last_used) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+        "last_used = excluded.last_used"
+    )
+
+    def __init__(self, path, max_size_mb=256):
+        self.path = Path(path)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._local = threading.local()
+        self._writes_since_check = 0
+
+        # Counters are updated from every request thread
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        # One transaction, so concurrently starting workers set up the totals once
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS translations (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations(last_used)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS totals (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    entries INTEGER NOT NULL,
+                    size INTEGER NOT NULL
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO totals (id, entries, size) VALUES (0, 0, 0)")
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS translations_insert AFTER INSERT ON translations BEGIN
+                    UPDATE totals SET entries = entries + 1, size = size + NEW.size WHERE id = 0;
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS translations_delete AFTER DELETE ON translations BEGIN
+                    UPDATE totals SET entries = entries - 1, size = size - OLD.size WHERE id = 0;
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS translations_resize AFTER UPDATE OF size ON translations BEGIN
+                    UPDATE totals SET size = size - OLD.size + NEW.size WHERE id = 0;
+                END
+            """)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _connect(self):
+        """Connection for the current thread of the current process"""
+        conn = getattr(self._local, 'conn', None)
+        # Connections must not be shared across fork()
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(str(self.path), timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, counter, amount=1):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    @staticmethod
+    def make_key(cache_key):
+        """Serialize a sentence cache key into a stable string"""
+        return json.dumps(cache_key, ensure_ascii=False, separators=(',', ':'))
+
+    def get(self, cache_key):
+        """Return the stored translation result for a cache key or None"""
+        key = self.make_key(cache_key)
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, last_used FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count('misses')
+                return None
+
+            now = time.time()
+            if now - row[1] > self.TOUCH_INTERVAL:
+                conn.execute("UPDATE translations SET last_used = ? WHERE key = ?", (now, key))
+
+            self._count('hits')
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"⚠️ Translation memory read error: {e}")
+            return None
+
+    def put(self, cache_key, value):
+        """Store a translation result for a cache key"""
+        key = self.make_key(cache_key)
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute(self.UPSERT, (key, data, len(key) + len(data), now, now))
+            self._count('writes')
+            with self._counter_lock:
+                self._writes_since_check += 1
+                check = self._writes_since_check >= self.EVICTION_CHECK_INTERVAL
+                if check:
+                    self._writes_since_check = 0
+            if check:
+                self.evict()
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"⚠️ Translation memory write error: {e}")
+
+    def _totals(self, conn):
+        """(entries, total size in bytes) from the trigger-maintained totals row"""
+        return conn.execute("SELECT entries, size FROM totals WHERE id = 0").fetchone()
+
+    def _total_size(self, conn):
+        return self._totals(conn)[1]
+
+    def evict(self):
+        """Delete least recently used entries until the store fits into 90% of its budget"""
+        conn = self._connect()
+        total = self._total_size(conn)
+        if total <= self.max_bytes:
+            return 0
+
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        while total > target:
+            cursor = conn.execute(
+                "DELETE FROM translations WHERE key IN "
+                "(SELECT key FROM translations ORDER BY last_used LIMIT 200)"
+            )
+            if cursor.rowcount <= 0:
+                break
+            removed += cursor.rowcount
+            total = self._total_size(conn)
+
+        self._count('evictions', removed)
+        print(f"🧹 Translation memory: evicted {removed} entries ({total / 1024 / 1024:.1f}MB left)")
+        return removed
+
+    def export_file(self, output_path):
+        """Write all entries to a JSONL file; returns the number of entries"""
+        conn = self._connect()
+        count = 0
+        with open(output_path, 'w', encoding='utf-8') as f:
+            for key, value in conn.execute("SELECT key, value FROM translations ORDER BY last_used"):
+                f.write(json.dumps({'key': json.loads(key), 'value': json.loads(value)}, ensure_ascii=False))
+                f.write('\n')
+                count += 1
+        return count
+
+    def import_file(self, input_path):
+        """Load entries from a JSONL export; returns the number of entries"""
+        conn = self._connect()
+        now = time.time()
+        count = 0
+        with open(input_path, 'r', encoding='utf-8') as f:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    key = self.make_key(entry['key'])
+                    data = json.dumps(entry['value'], ensure_ascii=False)
+                    conn.execute(self.UPSERT, (key, data, len(key) + len(data), now, now))
+                    count += 1
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        self.evict()
+        return count
+
+    def get_stats(self):
+        """Store size and per-process counters for health reporting"""
+        with self._counter_lock:
+            stats = {
+                'path': str(self.path),
+                'max_size_mb': round(self.max_bytes / 1024 / 1024, 1),
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'evictions': self.evictions,
+                'errors': self.errors,
+            }
+        try:
+            entries, size = self._totals(self._connect())
+            stats['entries'] = entries
+            stats['size_mb'] = round(size / 1024 / 1024, 2)
+        except sqlite3.Error as e:
+            stats['error'] = str(e)
+        return stats
+
+
+def main():
+    """CLI for exporting and importing a translation memory"""
+    parser = argparse.ArgumentParser(
+        description="Manage the persistent translation memory of Kabardian Translator",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  kabardian-translation-memory stats  --db models/translation_memory.sqlite
+  kabardian-translation-memory export --db models/translation_memory.sqlite --file tm.jsonl
+  kabardian-translation-memory import --db /srv/tm.sqlite --file tm.jsonl
+        """
+    )
+    parser.add_argument("command", choices=["export", "import", "stats"],
+                       help="Operation to run")
+    parser.add_argument("--db", default="models/translation_memory.sqlite",
+                       help="Translation memory database (default: models/translation_memory.sqlite)")
+    parser.add_argument("--file", help="JSONL file to export to / import from")
+    parser.add_argument("--max-size-mb", type=float, default=256,
+                       help="Size budget applied after import (default: 256)")
+
+    args = parser.parse_args()
+
+    if args.command in ("export", "import") and not args.file:
+        print("❌ --file is required for export/import")
+        sys.exit(1)
+
+    if args.command in ("export", "stats") and not os.path.exists(args.db):
+        print(f"❌ Translation memory not found: {args.db}")
+        sys.exit(1)
+
+    memory = TranslationMemory(args.db, max_size_mb=args.max_size_mb)
+
+    if args.command == "export":
+        count = memory.export_file(args.file)
+        print(f"✅ Exported {count} entries to {args.file}")
+    elif args.command == "import":
+        if not os.path.exists(args.file):
+            print(f"❌ File not found: {args.file}")
+            sys.exit(1)
+        count = memory.import_file(args.file)
+        print(f"✅ Imported {count} entries into {args.db}")
+    else:
+        stats = memory.get_stats()
+        print(f"📊 Translation memory: {args.db}")
+        print(f"   Entries: {stats.get('entries')}")
+        print(f"   Size: {stats.get('size_mb')}MB / {stats['max_size_mb']}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,24 +8,203 @@ import torch
 import os
 import gc
 import re
+import threading
+from itertools import groupby
+from contextlib import ExitStack, closing, contextmanager
 from pathlib import Path
 
+from .batch_scheduler import MicroBatchScheduler
+from .translation_cache import TranslationCache
+from .translation_memory import TranslationMemory
+from .inference_backends import PRECISIONS, get_backend, load_variant_manifest, tokenizer_path, validate_backends
+from .inference_executor import InferenceExecutor, QueueFull
+from .model_registry import ModelRegistry
+from .sentence_packer import SentencePacker, estimate_tokens
+from .token_stream import stream_generate
+from .cancellation import check_cancelled, stopping_kwargs
+from .request_coalescer import RequestCoalescer
+from .vocab_trim import TRIMMED_SUBDIR, VOCAB_MAP, TrimmedTokenizer
+from .shortlist import SHORTLISTS_FILE, ShortlistProjection, install_shortlist_projection, load_shortlists, \
+    sequence_confidence
+
+
+# Wall-clock guard for one generate() call (seconds), whatever the batch size
+MAX_DECODE_SECONDS = 30.0
+
+# Source lengths are rounded up to a multiple of this many tokens for the decode
+# budget; sentences are only batched with others of the same bucket
+DECODE_LENGTH_BUCKET = 8
+
+
+def _length_bucket(source_tokens):
+    """Source length rounded up to its budget bucket"""
+    return -(-source_tokens // DECODE_LENGTH_BUCKET) * DECODE_LENGTH_BUCKET
+
+
+def _decode_limits(preset, source_tokens):
+    """
+    generate() limits scaled to the tokenized source instead of fixed lengths:
+    max_new_tokens = length_ratio * source_tokens + length_offset (capped by the
+    preset's max_length), with the length rounded up to its bucket, and a
+    max_time guard against runaway beams.
+    
+    The budget depends only on the sentence's own length, so a translation
+    does not change with the sentences it happens to be batched with.
+    """
+    tokens = _length_bucket(source_tokens)
+    max_new_tokens = int(preset.get("length_ratio", 1.5) * tokens + preset.get("length_offset", 10))
+    return {
+        'max_new_tokens': min(max_new_tokens, preset.get("max_length", 256)),
+        'max_time': MAX_DECODE_SECONDS,
+    }
+
+
+def _sub_batches(lengths, max_batch_size):
+    """
+    Group sentence indices into generate() sub-batches, shortest first: only
+    sentences of the same length bucket share a sub-batch (and a decode budget).
+    
+    Yields:
+        (bucket length, [indices])
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    for bucket, group in groupby(order, key=lambda i: _length_bucket(lengths[i])):
+        group = list(group)
+        for start in range(0, len(group), max_batch_size):
+            yield bucket, group[start:start + max_batch_size]
+
+
 class TranslationService:
     """Translation service using MarianMT for Kabardian and NLLB-200 for others"""
     
     # Translation presets for ru↔kbd
+    # Decode budget per direction: length_ratio * source tokens + length_offset, capped by max_length
     TRANSLATION_PRESETS = {
-        "ru_kbd": {"name": "📖 RU KBD", "num_beams": 4, "min_length": 20, "max_length": 256, "length_penalty": 1.5},
-        "kbd_ru": {"name": "🌐 KBD RU", "num_beams": 4, "min_length": 20, "max_length": 256, "length_penalty": 0.9},
+        "ru_kbd": {"name": "📖 RU KBD", "num_beams": 4, "max_length": 256, "length_penalty": 1.5,
+                   "length_ratio": 1.6, "length_offset": 10},
+        "kbd_ru": {"name": "🌐 KBD RU", "num_beams": 4, "max_length": 256, "length_penalty": 0.9,
+                   "length_ratio": 1.3, "length_offset": 10},
     }
     
-    def __init__(self, device="mps", models_dir="models"):
+    # Generation parameters for NLLB-200 pairs
+    NLLB_PRESET = {"name": "🌐 NLLB-200", "num_beams": 5, "max_length": 512,
+                   "length_ratio": 1.5, "length_offset": 10}
+    
+    # Quality tiers: generation overrides applied on top of the presets above
+    # ('balanced' keeps the presets as they are)
+    QUALITY_TIERS = {
+        "fast": {"num_beams": 1},
+        "balanced": {},
+        "best": {"num_beams": 8},
+    }
+    TIER_ORDER = ("fast", "balanced", "best")
+    
+    # Maximum number of sentences decoded together in one generate() call
+    MAX_BATCH_SIZE = 16
+    
+    # Sentences decoded per direction by preload() to warm up kernels and allocators
+    WARMUP_TEXTS = {
+        'rus_Cyrl': ["Добрый день.", "Как у вас дела сегодня?", "Спасибо за помощь, до встречи!"],
+        'kbd_Cyrl': ["Уи махуэ фӀыуэ.", "Дауэ ущыт?", "Тхьэуэгъуэсэпсэ!"],
+    }
+    WARMUP_ROUNDS = 2
+    
+    # Supported languages by groups (NLLB-200 codes)
+    SUPPORTED_LANGUAGES = {
+        'slavic': {
+            'rus_Cyrl': 'Russian',
+            'ukr_Cyrl': 'Ukrainian', 
+            'bel_Cyrl': 'Belarusian',
+            'lvs_Latn': 'Latvian',
+        },
+        'caucasian_turkic': {
+            'kbd_Cyrl': 'Kabardian',
+            'kaz_Cyrl': 'Kazakh',
+            'bak_Cyrl': 'Bashkir',
+            'kir_Cyrl': 'Kyrgyz',
+            'kat_Geor': 'Georgian',
+            'hye_Armn': 'Armenian',
+            'azj_Latn': 'Azerbaijani',
+        },
+        'turkic': {
+            'tur_Latn': 'Turkish',
+        },
+        'european': {
+            'eng_Latn': 'English',
+            'deu_Latn': 'German',
+            'fra_Latn': 'French',
+            'spa_Latn': 'Spanish',
+        }
+    }
+    
+    # Source tokens kept per sentence (longer input is cut, chunking keeps sentences below this)
+    MAX_SOURCE_TOKENS = 512
+    
+    def __init__(self, device="mps", models_dir="models", cache_size=10000, cache_ttl=None,
+                 translation_memory=None, translation_memory_size_mb=256, precision="auto",
+                 backends=None, executor=None, registry=None):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+        
         self.device = device
         self.models_dir = Path(models_dir)
+        self.precision = precision
+        
+        # Per-model access and bounded request queues (may be shared with TTS)
+        self.executor = executor or InferenceExecutor()
+        
+        # Loaded models, each loaded at most once (may be shared with TTS)
+        self.registry = registry or ModelRegistry()
+        
+        # Inference backend per model ({'marian_ru_kbd': 'onnx', ...}); default is torch
+        self.backends = dict(backends or {})
+        validate_backends(self.backends)
+        
+        # Pre-converted variants written by 'kabardian-download-models --optimize'
+        self.model_variants = {}
+        for name in ('marian_ru_kbd', 'marian_kbd_ru', 'nllb200'):
+            manifest = load_variant_manifest(self.models_dir / name)
+            if manifest:
+                self.model_variants[name] = manifest
+        
+        # Vocabulary-trimmed NLLB-200 build (see vocab_trim.py) instead of the full model
+        self.nllb_trimmed = False
+        
+        # Target-language shortlists for NLLB-200 decoding (see shortlist.py), with an
+        # optional full-vocabulary retry for sentences scoring below shortlist_min_score
+        self.nllb_shortlist = False
+        self.shortlist_min_score = None
+        self._shortlist_lock = threading.Lock()
+        self._shortlist_stats = {'batches': 0, 'sentences': 0, 'fallbacks': 0, 'shortlist_tokens': 0}
+        
+        # Sentence-level translation cache (cache_size=0 disables it)
+        self._cache = TranslationCache(cache_size, cache_ttl) if cache_size > 0 else None
+        
+        # Optional persistent translation memory shared between processes
+        self._memory = None
+        if translation_memory:
+            self.configure_translation_memory(translation_memory, translation_memory_size_mb)
         
         # Initialize services (lazy loaded)
         self._marian_service = None
         self._nllb_service = None
+        self._service_lock = threading.Lock()
+        
+        # Cross-request micro-batching (disabled until enable_micro_batching is called)
+        self._batch_scheduler = None
+        
+        # Token-budget chunking of input text (one chunk per sentence unless packing is configured)
+        self._packer = SentencePacker()
+        
+        # Identical concurrent translate() calls share one computation
+        self._coalescer = RequestCoalescer()
+        
+        # Quality tier used when a request does not ask for one, and load-based downgrades
+        self.default_tier = "balanced"
+        self.downgrade_threshold = None
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self._tier_stats = {'requests': {t: 0 for t in self.TIER_ORDER}, 'downgrades': 0}
         
         # Language mapping
         self.supported_languages = self._get_supported_languages()
@@ -34,45 +213,243 @@ class TranslationService:
         print("   MarianMT will be used ONLY for Kabardian ↔ Russian (direct)")
         print("   NLLB-200 will be used for ALL other language pairs (including cascades)")
         print("   ✨ Sentence chunking enabled for all translations")
+        print(f"   📦 Batched generation: up to {self.MAX_BATCH_SIZE} sentences per generate() call")
         print("   ⚙️ Translation presets enabled for ru↔kbd")
+        for name, manifest in self.model_variants.items():
+            print(f"   📦 {name}: optimized variants {', '.join(manifest['variants'])}")
 
-    def _split_into_sentences(self, text):
-        """Split text into sentences based on punctuation marks"""
-        if not text or not text.strip():
-            return []
-        
-        # Pattern to split on sentence-ending punctuation (.!?…) followed by whitespace or end of string
-        # Parentheses capture the punctuation marks
-        sentence_pattern = r'([.!?…]+)(?:\s+|$)'
-        parts = re.split(sentence_pattern, text)
-        
-        sentences = []
-        current = ""
-        
-        # Reconstruct sentences with their original punctuation
-        for i, part in enumerate(parts):
-            if not part:
-                continue
-            
-            # Check if this part is punctuation marks
-            if re.match(r'^[.!?…]+$', part):
-                # Add punctuation to current sentence
-                current += part
-                # If we have content, save this as a complete sentence
-                if current.strip():
-                    sentences.append(current.strip())
-                    current = ""
+    def enable_micro_batching(self, window_ms=10, max_batch_tokens=512):
+        """
+        Collect sentences from concurrent requests with the same model, direction
+        and preset for up to `window_ms` (or until `max_batch_tokens`) and decode
+        them in one batched generate() call.
+        """
+        self._batch_scheduler = MicroBatchScheduler(
+            lambda key, sentences: self._translate_chunks(sentences, key[1], key[2], key[4]),
+            window_ms=window_ms,
+            max_batch_tokens=max_batch_tokens
+        )
+        print(f"📦 Micro-batching enabled: window={window_ms}ms, max_batch_tokens={max_batch_tokens}")
+
+    def configure_precision(self, precision):
+        """
+        Select inference precision: 'auto' (fp16 on GPU/MPS, fp32 on CPU),
+        'fp32', 'fp16', 'bf16' or 'int8' (dynamic quantization of Linear layers, CPU only).
+        Pre-converted variants from the optimize step are used when available.
+        Already loaded models are released and reloaded on next use.
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+        if precision == self.precision:
+            return
+        
+        self.precision = precision
+        if self._marian_service or self._nllb_service:
+            self.cleanup()
+        print(f"🎚️ Inference precision: {precision}")
+
+    def configure_nllb_vocabulary(self, trimmed):
+        """
+        Serve NLLB-200 from the vocabulary-trimmed build in models/nllb200_trimmed
+        (built by 'kabardian-trim-nllb build') instead of the full model.
+        An already loaded NLLB-200 is released and reloaded on next use.
+        """
+        if trimmed and not (self.models_dir / TRIMMED_SUBDIR / VOCAB_MAP).exists():
+            print(f"⚠️ Trimmed NLLB-200 not found in {self.models_dir / TRIMMED_SUBDIR}, using the full model")
+            trimmed = False
+        if trimmed == self.nllb_trimmed:
+            return
+        
+        self.nllb_trimmed = trimmed
+        if self._nllb_service:
+            self._nllb_service.cleanup()
+            self._nllb_service = None
+        print(f"📚 NLLB-200 vocabulary: {'trimmed' if trimmed else 'full'}")
+
+    def configure_shortlist(self, enabled=True, min_score=None):
+        """
+        Restrict NLLB-200 decoding to the target language's shortlist from
+        models/nllb200/shortlists.json plus the source tokens. With `min_score`,
+        each translation is also scored under the full vocabulary (one extra
+        decoder pass) and sentences whose average token log-probability is
+        below it are decoded again with the full vocabulary.
+        """
+        if enabled and not (self.models_dir / "nllb200" / SHORTLISTS_FILE).exists():
+            print(f"⚠️ No shortlists in {self.models_dir / 'nllb200'}, "
+                  "run 'kabardian-trim-nllb shortlists' first; using the full vocabulary")
+            enabled = False
+        self.shortlist_min_score = min_score
+        if enabled == self.nllb_shortlist:
+            return
+        
+        self.nllb_shortlist = enabled
+        if self._nllb_service:
+            self._nllb_service.cleanup()
+            self._nllb_service = None
+        retry = f" (full-vocabulary retry below {min_score})" if enabled and min_score is not None else ""
+        print(f"📋 NLLB-200 shortlist decoding: {'on' if enabled else 'off'}{retry}")
+
+    def configure_backends(self, backends):
+        """
+        Select the inference backend per model, e.g. {'marian_ru_kbd': 'onnx'}.
+        Already loaded models are released and reloaded on next use.
+        """
+        validate_backends(backends)
+        self.backends.update(backends)
+        if self._marian_service or self._nllb_service:
+            self.cleanup()
+        print(f"⚙️ Inference backends: {self.backends}")
+
+    def configure_chunking(self, pack_tokens=0, max_tokens=200):
+        """
+        Set how input text is split: sentences above `max_tokens` are split
+        at clause boundaries; with `pack_tokens` > 0 adjacent short sentences
+        are packed into one chunk up to that many tokens. Packing means fewer,
+        longer sequences per generate() call, but a packed chunk is cached and
+        streamed as one unit, so its sentences are only served from the cache
+        when the same neighbours come again.
+        """
+        self._packer = SentencePacker(pack_tokens, max_tokens)
+        status = f"packing up to {pack_tokens} tokens" if pack_tokens else "one chunk per sentence"
+        print(f"✂️ Chunking: {status}, sentences split above {max_tokens} tokens")
+
+    def configure_cache(self, max_entries=10000, ttl_seconds=None):
+        """Replace the sentence cache (max_entries=0 disables caching)"""
+        self._cache = TranslationCache(max_entries, ttl_seconds) if max_entries > 0 else None
+        status = f"{max_entries} entries, ttl={ttl_seconds}s" if self._cache else "disabled"
+        print(f"🗃️ Translation cache: {status}")
+
+    def configure_translation_memory(self, path, max_size_mb=256):
+        """Use a persistent SQLite translation memory at `path` (None disables it)"""
+        self._memory = TranslationMemory(path, max_size_mb) if path else None
+        status = f"{path} (max {max_size_mb}MB)" if self._memory else "disabled"
+        print(f"💾 Translation memory: {status}")
+
+    def configure_quality(self, default_tier="balanced", downgrade_threshold=None):
+        """
+        Set the quality tier used when a request does not name one, and the
+        number of in-flight translations above which requests are downgraded
+        one tier (two tiers above twice that number). None disables downgrades.
+        """
+        if default_tier not in self.QUALITY_TIERS:
+            raise ValueError(f"Unknown quality tier '{default_tier}', expected one of {self.TIER_ORDER}")
+        self.default_tier = default_tier
+        self.downgrade_threshold = downgrade_threshold
+        print(f"🎚️ Quality tier: {default_tier}, downgrade above {downgrade_threshold or '-'} in-flight requests")
+
+    def _begin_request(self, tier):
+        """Count an in-flight translation and return the tier it will actually run with"""
+        with self._in_flight_lock:
+            self._in_flight += 1
+            in_flight = self._in_flight
+            
+            effective = tier
+            if self.downgrade_threshold and in_flight > self.downgrade_threshold:
+                steps = 2 if in_flight > 2 * self.downgrade_threshold else 1
+                effective = self.TIER_ORDER[max(self.TIER_ORDER.index(tier) - steps, 0)]
+            
+            self._tier_stats['requests'][effective] += 1
+            if effective != tier:
+                self._tier_stats['downgrades'] += 1
+                print(f"⏬ Load downgrade: {tier} → {effective} ({in_flight} in flight)")
+        return effective
+
+    def _end_request(self):
+        with self._in_flight_lock:
+            self._in_flight -= 1
+
+    def _tiered(self, preset, tier=None):
+        """Preset with the overrides of a quality tier applied"""
+        tier = tier or self.default_tier
+        return dict(preset, **self.QUALITY_TIERS[tier], tier=tier)
+
+    def _preset_for(self, source_lang, target_lang, tier=None):
+        """Generation preset that applies to a language pair and quality tier"""
+        if self._is_marian_pair(source_lang, target_lang):
+            preset = self.TRANSLATION_PRESETS['ru_kbd' if source_lang == 'rus_Cyrl' else 'kbd_ru']
+        else:
+            preset = self.NLLB_PRESET
+        return self._tiered(preset, tier)
+
+    def _cache_key(self, sentence, source_lang, target_lang, tier=None):
+        """
+        Cache key: normalized sentence, language pair, model route, model
+        configuration and preset parameters. The translation memory outlives
+        the process, so translations made under another precision, backend,
+        NLLB vocabulary or shortlist setting must not be served.
+        """
+        preset = self._preset_for(source_lang, target_lang, tier)
+        return (
+            TranslationCache.normalize(sentence),
+            source_lang,
+            target_lang,
+            self._batch_key(source_lang, target_lang, tier)[0],
+            self._model_config(source_lang, target_lang),
+            tuple(sorted((k, v) for k, v in preset.items() if k != 'name')),
+        )
+
+    def _model_config(self, source_lang, target_lang):
+        """Precision, backends and NLLB-200 vocabulary/shortlist settings of the models on a pair's route"""
+        if self._is_marian_pair(source_lang, target_lang):
+            models = ['marian_ru_kbd' if source_lang == 'rus_Cyrl' else 'marian_kbd_ru']
+        else:
+            # NLLB-200, with MarianMT for the Kabardian side of cascades
+            models = ['nllb200']
+            if source_lang == 'kbd_Cyrl' and target_lang != 'rus_Cyrl':
+                models.insert(0, 'marian_kbd_ru')
+            elif source_lang != 'rus_Cyrl' and target_lang == 'kbd_Cyrl':
+                models.append('marian_ru_kbd')
+        
+        config = [f"{self.precision}@{self.device}"]
+        config.extend(f"{name}:{self.backends.get(name, 'torch')}" for name in models)
+        if 'nllb200' in models:
+            config.append('vocab:trimmed' if self.nllb_trimmed else 'vocab:full')
+            if not self.nllb_shortlist:
+                config.append('shortlist:off')
+            elif self.shortlist_min_score is None:
+                config.append('shortlist:on')
             else:
-                # This is text content
-                current += part
+                config.append(f"shortlist:{self.shortlist_min_score}")
+        return tuple(config)
+
+    def _batch_key(self, source_lang, target_lang, tier=None):
+        """Requests can share a batch only when they hit the same model, direction and preset"""
+        tier = tier or self.default_tier
+        if self._is_marian_pair(source_lang, target_lang):
+            preset = 'ru_kbd' if source_lang == 'rus_Cyrl' else 'kbd_ru'
+            return ('marian', source_lang, target_lang, preset, tier)
+        return ('nllb', source_lang, target_lang, 'default', tier)
+
+    def _split_into_chunks(self, text, source_lang, target_lang=None):
+        """
+        Split text into translation chunks: one per sentence (short sentences are
+        packed together if configure_chunking() enabled it), over-long ones split
+        at clause boundaries, measured with the tokenizer of the model that reads
+        the source.
         
-        # Handle any remaining content
-        if current.strip():
-            sentences.append(current.strip())
+        Returns:
+            (chunks, separators): separators[i] is the whitespace that follows chunk i
+        """
+        if not text or not text.strip():
+            return [], []
+        return self._packer.split(text, self._token_counter(source_lang, target_lang))
+
+    def _token_counter(self, source_lang, target_lang=None):
+        """Token counting function for the first model on the route (estimate if unavailable)"""
+        tokenizer = None
+        try:
+            if source_lang == 'kbd_Cyrl':
+                tokenizer = self.marian_service.get_tokenizer('kbd_ru')
+            elif self._is_marian_pair(source_lang, target_lang):
+                tokenizer = self.marian_service.get_tokenizer('ru_kbd')
+            else:
+                tokenizer = self.nllb_service.get_tokenizer()
+        except Exception as e:
+            print(f"⚠️ Tokenizer not available for chunking ({e}), using estimates")
         
-        # Filter out empty strings while preserving all punctuation
-        sentences = [s for s in sentences if s.strip()]
-        return sentences
+        if tokenizer is None:
+            return estimate_tokens
+        return lambda texts: [len(ids) for ids in tokenizer(texts, add_special_tokens=False)['input_ids']]
 
     def _filter_latin_words(self, text, target_lang_code):
         """Filter Latin words from text if target language doesn't use Latin script"""
@@ -116,14 +493,18 @@ class TranslationService:
     def marian_service(self):
         """Lazy loader for MarianMT service"""
         if self._marian_service is None:
-            self._marian_service = self._create_marian_service()
+            with self._service_lock:
+                if self._marian_service is None:
+                    self._marian_service = self._create_marian_service()
         return self._marian_service
     
     @property
     def nllb_service(self):
         """Lazy loader for NLLB-200 service"""
         if self._nllb_service is None:
-            self._nllb_service = self._create_nllb_service()
+            with self._service_lock:
+                if self._nllb_service is None:
+                    self._nllb_service = self._create_nllb_service()
         return self._nllb_service
     
     def _convert_lang_code(self, lang_code):
@@ -141,14 +522,21 @@ class TranslationService:
     def _create_marian_service(self):
         """Create MarianMT service with lazy loading - ONLY for kbd↔ru"""
         class LazyMarianService:
-            def __init__(self, device, models_dir, presets):
+            def __init__(self, device, models_dir, presets, max_batch_size, precision, backends,
+                         executor, registry, variants):
                 self.device = device
+                self.executor = executor
+                self.registry = registry
                 self.models_dir = models_dir
                 self.presets = presets
-                self._ru_kbd_model = None
-                self._kbd_ru_model = None
-                self._ru_kbd_tokenizer = None
-                self._kbd_ru_tokenizer = None
+                self.max_batch_size = max_batch_size
+                self.precision = precision
+                self.backends = backends
+                self.variants = variants
+                self.precision_stats = {}
+                # Tokenizers loaded on their own (for chunking) before their models
+                self._tokenizers = {}
+                self._tokenizer_lock = threading.Lock()
                 
                 self.kbd_char_mapping = {
                     'Ӏ': 'I', 'Ӏ': 'I', 'l': 'I', '|': 'I'
@@ -178,8 +566,34 @@ class TranslationService:
                         shutil.rmtree(save_path)
                     return False
             
+            def load(self, direction):
+                """Load the model of a direction ('ru_kbd' or 'kbd_ru') now; returns (tokenizer, model)"""
+                loader = self._load_ru_kbd if direction == 'ru_kbd' else self._load_kbd_ru
+                return self.registry.get(f"marian_{direction}", loader)
+            
+            def use(self, direction):
+                """Context manager yielding (tokenizer, model) of a direction, kept resident for the block"""
+                loader = self._load_ru_kbd if direction == 'ru_kbd' else self._load_kbd_ru
+                return self.registry.use(f"marian_{direction}", loader)
+            
+            def get_tokenizer(self, direction):
+                """Tokenizer of a direction ('ru_kbd' or 'kbd_ru'), loaded without its model"""
+                loaded = self.registry.peek(f"marian_{direction}")
+                if loaded is not None:
+                    return loaded[0]
+                
+                with self._tokenizer_lock:
+                    if direction not in self._tokenizers:
+                        from transformers import MarianTokenizer
+                        
+                        path = self.models_dir / f"marian_{direction}"
+                        if not path.exists():
+                            return None
+                        self._tokenizers[direction] = MarianTokenizer.from_pretrained(path, local_files_only=True)
+                    return self._tokenizers[direction]
+            
             def _load_ru_kbd(self):
-                """Load Russian → Kabardian model"""
+                """Load Russian → Kabardian model; returns (tokenizer, model)"""
                 try:
                     from transformers import MarianMTModel, MarianTokenizer
                     
@@ -187,20 +601,21 @@ class TranslationService:
                     if not self._download_model_if_needed("kubataba/ru-kbd-opus", path):
                         raise RuntimeError("Failed to download ru→kbd")
                     
-                    self._ru_kbd_tokenizer = MarianTokenizer.from_pretrained(path, local_files_only=True)
-                    self._ru_kbd_model = MarianMTModel.from_pretrained(
-                        path,
-                        torch_dtype=torch.float16 if self.device in ["mps", "cuda"] else torch.float32,
-                        local_files_only=True
-                    ).to(self.device)
-                    self._ru_kbd_model.eval()
-                    return True
+                    tokenizer = MarianTokenizer.from_pretrained(path, local_files_only=True)
+                    
+                    backend = get_backend(self.backends.get('marian_ru_kbd', 'torch'))
+                    model, self.precision_stats['marian_ru_kbd'] = backend.load(
+                        MarianMTModel, path, self.device, self.precision,
+                        torch.float16 if self.device in ["mps", "cuda"] else torch.float32,
+                        "MarianMT ru→kbd", variants=self.variants.get('marian_ru_kbd')
+                    )
+                    return tokenizer, model
                 except Exception as e:
                     print(f"❌ Failed to load MarianMT ru→kbd: {e}")
-                    return False
+                    raise
             
             def _load_kbd_ru(self):
-                """Load Kabardian → Russian model"""
+                """Load Kabardian → Russian model; returns (tokenizer, model)"""
                 try:
                     from transformers import MarianMTModel, MarianTokenizer
                     
@@ -208,181 +623,296 @@ class TranslationService:
                     if not self._download_model_if_needed("kubataba/kbd-ru-opus", path):
                         raise RuntimeError("Failed to download kbd→ru")
                     
-                    self._kbd_ru_tokenizer = MarianTokenizer.from_pretrained(path, local_files_only=True)
-                    self._kbd_ru_model = MarianMTModel.from_pretrained(
-                        path,
-                        torch_dtype=torch.float16 if self.device in ["mps", "cuda"] else torch.float32,
-                        local_files_only=True
-                    ).to(self.device)
-                    self._kbd_ru_model.eval()
-                    return True
+                    tokenizer = MarianTokenizer.from_pretrained(path, local_files_only=True)
+                    
+                    backend = get_backend(self.backends.get('marian_kbd_ru', 'torch'))
+                    model, self.precision_stats['marian_kbd_ru'] = backend.load(
+                        MarianMTModel, path, self.device, self.precision,
+                        torch.float16 if self.device in ["mps", "cuda"] else torch.float32,
+                        "MarianMT kbd→ru", variants=self.variants.get('marian_kbd_ru')
+                    )
+                    return tokenizer, model
                 except Exception as e:
                     print(f"❌ Failed to load MarianMT kbd→ru: {e}")
-                    return False
+                    raise
 
-            def translate_ru_to_kbd(self, text):
-                """Russian → Kabardian translation with presets"""
-                if not text.strip():
-                    return {'success': True, 'translation': '', 'time_ms': 0}
-                
-                start_time = time.time()
-                
-                try:
-                    if self._ru_kbd_model is None:
-                        if not self._load_ru_kbd():
-                            return {'success': False, 'error': 'Model not available'}
+            def _restore_punctuation(self, source, translation):
+                """Carry trailing sentence punctuation of the source over to the translation"""
+                # Extract and preserve original punctuation from source text
+                # Check if source text ends with any punctuation marks
+                if source.rstrip().endswith(('.', '!', '?', '...', '…')):
+                    # Get the trimmed source text without trailing spaces
+                    original_trimmed = source.rstrip()
+                    
+                    # Find all consecutive punctuation characters at the end
+                    last_punctuation = ''
+                    for char in reversed(original_trimmed):
+                        if char in '.!?…':
+                            # Prepend to maintain original order
+                            last_punctuation = char + last_punctuation
+                        else:
+                            # Stop when we encounter non-punctuation
+                            break
                     
-                    preset = self.presets.get("ru_kbd", {})
-                    num_beams = preset.get("num_beams", 4)
-                    min_length = preset.get("min_length", 20)
-                    max_length = preset.get("max_length", 256)
-                    length_penalty = preset.get("length_penalty", 1.5)
+                    # Remove trailing spaces from translation and add punctuation
+                    translation = translation.rstrip()
                     
-                    print(f"⚙️ Using preset {preset.get('name', 'ru_kbd')}: beams={num_beams}, length_penalty={length_penalty}")
+                    # Add punctuation only if translation doesn't already end with it
+                    if last_punctuation and not translation.endswith(last_punctuation):
+                        translation += last_punctuation
+                
+                return translation
+            
+            def _map_palochka(self, translation):
+                """Character mapping for Cyrillic compatibility"""
+                reverse_mapping = {'I': 'Ӏ', 'l': 'Ӏ', '|': 'Ӏ', 'Ӏ': 'Ӏ'}
+                for latin_char, cyrillic_char in reverse_mapping.items():
+                    translation = translation.replace(latin_char, cyrillic_char)
+                return translation
+            
+            def _generate_batch(self, tokenizer, model, model_name, texts, preset, default_length_penalty):
+                """
+                Decode texts in padded sub-batches, one generate() call per sub-batch.
+                Texts are grouped by length to keep padding small; translations are
+                returned in input order. Each generate() holds a slot of the model
+                in the inference executor.
+                """
+                num_beams = preset.get("num_beams", 4)
+                length_penalty = preset.get("length_penalty", default_length_penalty)
+                
+                lengths = [
+                    len(ids) for ids in tokenizer(texts, truncation=True, max_length=512)['input_ids']
+                ]
+                translations = [None] * len(texts)
+                
+                for bucket, indices in _sub_batches(lengths, self.max_batch_size):
+                    check_cancelled()
+                    batch = [texts[i] for i in indices]
                     
-                    with torch.no_grad():
-                        inputs = self._ru_kbd_tokenizer(
-                            text, return_tensors="pt", padding=True, truncation=True, max_length=512
+                    with torch.no_grad(), self.executor.use(model_name):
+                        inputs = tokenizer(
+                            batch, return_tensors="pt", padding=True, truncation=True, max_length=512
                         ).to(self.device)
                         
-                        outputs = self._ru_kbd_model.generate(
+                        outputs = model.generate(
                             **inputs,
-                            max_length=max_length,
-                            min_length=min(min_length, len(text.split())),
+                            **_decode_limits(preset, bucket),
                             num_beams=num_beams,
                             length_penalty=length_penalty,
-                            early_stopping=True
+                            early_stopping=True,
+                            **stopping_kwargs()
                         )
-                        
-                        translation = self._ru_kbd_tokenizer.decode(outputs[0], skip_special_tokens=True)
-                        
-                        # Extract and preserve original punctuation from source text
-                        # Check if source text ends with any punctuation marks
-                        if text.rstrip().endswith(('.', '!', '?', '...', '…')):
-                            # Get the trimmed source text without trailing spaces
-                            original_trimmed = text.rstrip()
-                            
-                            # Find all consecutive punctuation characters at the end
-                            last_punctuation = ''
-                            for char in reversed(original_trimmed):
-                                if char in '.!?…':
-                                    # Prepend to maintain original order
-                                    last_punctuation = char + last_punctuation
-                                else:
-                                    # Stop when we encounter non-punctuation
-                                    break
-                            
-                            # Remove trailing spaces from translation and add punctuation
-                            translation = translation.rstrip()
+                    # A cancelled decode stops early: never return its partial output
+                    check_cancelled()
+                    
+                    decoded = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+                    for i, translation in zip(indices, decoded):
+                        translations[i] = translation
+                
+                return translations
+            
+            def _batch_error(self, texts, error, start_time):
+                elapsed = round((time.time() - start_time) * 1000, 2)
+                share = round(elapsed / len(texts), 2) if texts else 0
+                return [{
+                    'success': False,
+                    'error': error,
+                    'translation': f"Error: {error[:100]}",
+                    'time_ms': share
+                } for _ in texts]
+
+            def translate_ru_to_kbd(self, text, preset=None):
+                """Russian → Kabardian translation with presets"""
+                return self.translate_ru_to_kbd_batch([text], preset)[0]
+
+            def translate_ru_to_kbd_batch(self, texts, preset=None):
+                """
+                Russian → Kabardian translation of several sentences in batched generate() calls.
+                `preset` overrides the default ru_kbd preset (e.g. with a quality tier applied).
+                """
+                start_time = time.time()
+                
+                try:
+                    preset = preset or self.presets.get("ru_kbd", {})
+                    pending = [i for i, t in enumerate(texts) if t.strip()]
+                    translations = [''] * len(texts)
+                    
+                    if pending:
+                        with ExitStack() as pinned:
+                            # Concurrent first requests share one load; the model is not evicted while in use
+                            try:
+                                tokenizer, model = pinned.enter_context(self.use('ru_kbd'))
+                            except Exception:
+                                return [{'success': False, 'error': 'Model not available'} for _ in texts]
                             
-                            # Add punctuation only if translation doesn't already end with it
-                            if last_punctuation and not translation.endswith(last_punctuation):
-                                translation += last_punctuation
-                        
-                        # Character mapping for Cyrillic compatibility
-                        reverse_mapping = {'I': 'Ӏ', 'l': 'Ӏ', '|': 'Ӏ', 'Ӏ': 'Ӏ'}
-                        for latin_char, cyrillic_char in reverse_mapping.items():
-                            translation = translation.replace(latin_char, cyrillic_char)
-                        
-                        return {
+                            print(f"⚙️ Using preset {preset.get('name', 'ru_kbd')} [{preset.get('tier', 'balanced')}]: "
+                                  f"beams={preset.get('num_beams', 4)}, "
+                                  f"length_penalty={preset.get('length_penalty', 1.5)}, batch={len(pending)}")
+                            decoded = self._generate_batch(
+                                tokenizer, model, 'marian_ru_kbd',
+                                [texts[i] for i in pending], preset, 1.5
+                            )
+                        for i, translation in zip(pending, decoded):
+                            translation = self._restore_punctuation(texts[i], translation)
+                            translations[i] = self._map_palochka(translation)
+                    
+                    elapsed = round((time.time() - start_time) * 1000, 2)
+                    share = round(elapsed / len(pending), 2) if pending else 0
+                    results = []
+                    for i, translation in enumerate(translations):
+                        if not texts[i].strip():
+                            results.append({'success': True, 'translation': '', 'time_ms': 0})
+                            continue
+                        results.append({
                             'success': True,
                             'translation': translation,
-                            'time_ms': round((time.time() - start_time) * 1000, 2),
+                            'time_ms': share,
                             'model': 'marian_ru_kbd',
-                            'preset': preset.get('name')
-                        }
+                            'preset': preset.get('name'),
+                            'batch_size': len(pending)
+                        })
+                    return results
+                except QueueFull:
+                    raise
                 except Exception as e:
-                    return {
-                        'success': False,
-                        'error': str(e),
-                        'translation': f"Error: {str(e)[:100]}",
-                        'time_ms': round((time.time() - start_time) * 1000, 2)
-                    }
-
-            def translate_kbd_to_ru(self, text):
+                    return self._batch_error(texts, str(e), start_time)
+
+            def translate_kbd_to_ru(self, text, preset=None):
                 """Kabardian → Russian translation with presets"""
-                if not text.strip():
-                    return {'success': True, 'translation': '', 'time_ms': 0}
-                
+                return self.translate_kbd_to_ru_batch([text], preset)[0]
+
+            def translate_kbd_to_ru_batch(self, texts, preset=None):
+                """
+                Kabardian → Russian translation of several sentences in batched generate() calls.
+                `preset` overrides the default kbd_ru preset (e.g. with a quality tier applied).
+                """
                 start_time = time.time()
                 
                 try:
-                    if self._kbd_ru_model is None:
-                        if not self._load_kbd_ru():
-                            return {'success': False, 'error': 'Model not available'}
-                    
-                    processed_text = text
-                    for old_char, new_char in self.kbd_char_mapping.items():
-                        processed_text = processed_text.replace(old_char, new_char)
-                    
-                    preset = self.presets.get("kbd_ru", {})
-                    num_beams = preset.get("num_beams", 4)
-                    min_length = preset.get("min_length", 20)
-                    max_length = preset.get("max_length", 256)
-                    length_penalty = preset.get("length_penalty", 0.9)
-                    
-                    print(f"⚙️ Using preset {preset.get('name', 'kbd_ru')}: beams={num_beams}, length_penalty={length_penalty}")
+                    preset = preset or self.presets.get("kbd_ru", {})
+                    pending = [i for i, t in enumerate(texts) if t.strip()]
+                    translations = [''] * len(texts)
                     
-                    with torch.no_grad():
-                        inputs = self._kbd_ru_tokenizer(
-                            processed_text, return_tensors="pt", padding=True, truncation=True, max_length=512
-                        ).to(self.device)
-                        
-                        outputs = self._kbd_ru_model.generate(
-                            **inputs,
-                            max_length=max_length,
-                            min_length=min(min_length, len(processed_text.split())),
-                            num_beams=num_beams,
-                            length_penalty=length_penalty,
-                            early_stopping=True
-                        )
-                        
-                        translation = self._kbd_ru_tokenizer.decode(outputs[0], skip_special_tokens=True)
+                    if pending:
+                        processed_texts = []
+                        for i in pending:
+                            processed_text = texts[i]
+                            for old_char, new_char in self.kbd_char_mapping.items():
+                                processed_text = processed_text.replace(old_char, new_char)
+                            processed_texts.append(processed_text)
                         
-                        return {
+                        with ExitStack() as pinned:
+                            try:
+                                tokenizer, model = pinned.enter_context(self.use('kbd_ru'))
+                            except Exception:
+                                return [{'success': False, 'error': 'Model not available'} for _ in texts]
+                            
+                            print(f"⚙️ Using preset {preset.get('name', 'kbd_ru')} [{preset.get('tier', 'balanced')}]: "
+                                  f"beams={preset.get('num_beams', 4)}, "
+                                  f"length_penalty={preset.get('length_penalty', 0.9)}, batch={len(pending)}")
+                            decoded = self._generate_batch(
+                                tokenizer, model, 'marian_kbd_ru',
+                                processed_texts, preset, 0.9
+                            )
+                        for i, translation in zip(pending, decoded):
+                            translations[i] = translation
+                    
+                    elapsed = round((time.time() - start_time) * 1000, 2)
+                    share = round(elapsed / len(pending), 2) if pending else 0
+                    results = []
+                    for i, translation in enumerate(translations):
+                        if not texts[i].strip():
+                            results.append({'success': True, 'translation': '', 'time_ms': 0})
+                            continue
+                        results.append({
                             'success': True,
                             'translation': translation,
-                            'time_ms': round((time.time() - start_time) * 1000, 2),
+                            'time_ms': share,
                             'model': 'marian_kbd_ru',
-                            'preset': preset.get('name')
-                        }
+                            'preset': preset.get('name'),
+                            'batch_size': len(pending)
+                        })
+                    return results
+                except QueueFull:
+                    raise
                 except Exception as e:
-                    return {
-                        'success': False,
-                        'error': str(e),
-                        'translation': f"Error: {str(e)[:100]}",
-                        'time_ms': round((time.time() - start_time) * 1000, 2)
-                    }
+                    return self._batch_error(texts, str(e), start_time)
+
+            def stream(self, direction, text, preset=None):
+                """
+                Greedy-decode one sentence of a direction ('ru_kbd' or 'kbd_ru'),
+                yielding text pieces as they are generated. The generator's return
+                value is the final translation (with punctuation restored).
+                """
+                preset = preset or self.presets.get(direction, {})
+                source = text
+                if direction == 'kbd_ru':
+                    for old_char, new_char in self.kbd_char_mapping.items():
+                        source = source.replace(old_char, new_char)
+                
+                pieces = []
+                with self.use(direction) as (tokenizer, model):
+                    inputs = tokenizer(
+                        [source], return_tensors="pt", truncation=True, max_length=512
+                    ).to(self.device)
+                    for piece in stream_generate(
+                        model, tokenizer,
+                        dict(**inputs, **_decode_limits(preset, inputs['input_ids'].shape[1])),
+                        slot=self.executor.use(f"marian_{direction}")
+                    ):
+                        if direction == 'ru_kbd':
+                            piece = self._map_palochka(piece)
+                        pieces.append(piece)
+                        yield piece
+                
+                translation = ''.join(pieces)
+                if direction == 'ru_kbd':
+                    translation = self._map_palochka(self._restore_punctuation(text, translation))
+                return translation
 
             def cleanup(self):
                 """Cleanup MarianMT models"""
-                self._ru_kbd_model = None
-                self._kbd_ru_model = None
-                self._ru_kbd_tokenizer = None
-                self._kbd_ru_tokenizer = None
+                self.registry.release('marian_ru_kbd')
+                self.registry.release('marian_kbd_ru')
+                self._tokenizers.clear()
                 gc.collect()
                 if self.device == "mps":
                     torch.mps.empty_cache()
                 elif self.device == "cuda":
                     torch.cuda.empty_cache()
         
-        return LazyMarianService(self.device, self.models_dir, self.TRANSLATION_PRESETS)
+        return LazyMarianService(
+            self.device, self.models_dir, self.TRANSLATION_PRESETS, self.MAX_BATCH_SIZE,
+            self.precision, self.backends, self.executor, self.registry, self.model_variants
+        )
     
     def _create_nllb_service(self):
         """Create NLLB-200 service with full cascade logic"""
         class LazyNLLBService:
-            def __init__(self, device, models_dir, parent_service):
+            def __init__(self, device, models_dir, parent_service, max_batch_size):
                 self.device = device
                 self.models_dir = models_dir
                 self.parent_service = parent_service
-                self._base_model = None
+                self.max_batch_size = max_batch_size
+                self.precision_stats = {}
+                # Tokenizer loaded on its own (for chunking) before the model
                 self._tokenizer = None
+                self._tokenizer_lock = threading.Lock()
+                # Shortlist ids per target language, in the loaded model's id space
+                self._shortlists = None
+                self._shortlist_ids = {}
             
             def _convert_lang_code(self, lang_code):
                 return self.parent_service._convert_lang_code(lang_code)
             
+            def _model_path(self):
+                """Local NLLB-200 directory (the vocabulary-trimmed build when enabled)"""
+                if self.parent_service.nllb_trimmed:
+                    return self.models_dir / TRIMMED_SUBDIR
+                return self.models_dir / "nllb200"
+            
             def _check_nllb_available(self):
-                path = self.models_dir / "nllb200"
+                path = self._model_path()
                 if not path.exists():
                     return False
                 no_model_marker = path / ".no_model"
@@ -392,188 +922,481 @@ class TranslationService:
                 return config_path.exists()
             
             def _load_base_model(self):
-                """Load base NLLB-200 model"""
+                """Load base NLLB-200 model; returns (tokenizer, model)"""
                 try:
                     from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
                     
-                    path = self.models_dir / "nllb200"
-                    if path.exists():
+                    backend = get_backend(self.parent_service.backends.get('nllb200', 'torch'))
+                    
+                    path = self._model_path()
+                    if self.parent_service.nllb_trimmed:
+                        print(f"🔥 Loading vocabulary-trimmed NLLB-200 from {path}...")
+                        tokenizer = TrimmedTokenizer.from_pretrained(path)
+                        model, self.precision_stats['nllb200'] = backend.load(
+                            AutoModelForSeq2SeqLM, path, self.device,
+                            self.parent_service.precision, torch.float32, "NLLB-200 (trimmed)"
+                        )
+                        self.precision_stats['nllb200']['vocab_size'] = len(tokenizer)
+                    elif path.exists():
                         print(f"🔥 Loading base NLLB-200 from {path}...")
-                        self._tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
-                        self._base_model = AutoModelForSeq2SeqLM.from_pretrained(
-                            path, torch_dtype=torch.float32, local_files_only=True
-                        ).to(self.device)
+                        tokenizer = AutoTokenizer.from_pretrained(
+                            tokenizer_path(path, self.parent_service.model_variants.get('nllb200')),
+                            local_files_only=True
+                        )
+                        model, self.precision_stats['nllb200'] = backend.load(
+                            AutoModelForSeq2SeqLM, path, self.device,
+                            self.parent_service.precision, torch.float32, "NLLB-200",
+                            variants=self.parent_service.model_variants.get('nllb200')
+                        )
                     else:
                         print(f"🔥 Loading base NLLB-200 (600M) from HuggingFace...")
-                        self._tokenizer = AutoTokenizer.from_pretrained("facebook/nllb-200-distilled-600M")
-                        self._base_model = AutoModelForSeq2SeqLM.from_pretrained(
-                            "facebook/nllb-200-distilled-600M", torch_dtype=torch.float32
-                        ).to(self.device)
+                        tokenizer = AutoTokenizer.from_pretrained("facebook/nllb-200-distilled-600M")
+                        model, self.precision_stats['nllb200'] = backend.load(
+                            AutoModelForSeq2SeqLM, "facebook/nllb-200-distilled-600M", self.device,
+                            self.parent_service.precision, torch.float32, "NLLB-200",
+                            local_files_only=False
+                        )
                     
-                    self._base_model.eval()
-                    print(f"✅ Base NLLB-200 (600M) loaded in float32")
-                    return True
+                    if self.parent_service.nllb_shortlist and install_shortlist_projection(model) is None:
+                        print("⚠️ NLLB-200 backend has no lm_head to shortlist, using the full vocabulary")
+                    
+                    print(f"✅ Base NLLB-200 (600M) loaded in {self.precision_stats['nllb200']['precision']}")
+                    return tokenizer, model
                 except Exception as e:
                     print(f"❌ Failed to load base NLLB-200: {e}")
-                    return False
+                    raise
+
+            def get_tokenizer(self):
+                """NLLB-200 tokenizer, loaded without the model"""
+                loaded = self.parent_service.registry.peek('nllb200')
+                if loaded is not None:
+                    return loaded[0]
+                
+                with self._tokenizer_lock:
+                    if self._tokenizer is None:
+                        from transformers import AutoTokenizer
+                        
+                        if not self._check_nllb_available():
+                            return None
+                        if self.parent_service.nllb_trimmed:
+                            self._tokenizer = TrimmedTokenizer.from_pretrained(self._model_path())
+                        else:
+                            self._tokenizer = AutoTokenizer.from_pretrained(
+                                tokenizer_path(self._model_path(), self.parent_service.model_variants.get('nllb200')),
+                                local_files_only=True
+                            )
+                    return self._tokenizer
+
+            def _ensure_base_model(self):
+                """(tokenizer, model), loaded once even when first requested by several threads"""
+                try:
+                    return self.parent_service.registry.get('nllb200', self._load_base_model)
+                except Exception:
+                    raise RuntimeError("Base NLLB-200 not available")
+            
+            @contextmanager
+            def _base_model(self):
+                """(tokenizer, model), kept resident (not evicted) for the duration of the block"""
+                with ExitStack() as pinned:
+                    try:
+                        loaded = pinned.enter_context(
+                            self.parent_service.registry.use('nllb200', self._load_base_model)
+                        )
+                    except Exception:
+                        raise RuntimeError("Base NLLB-200 not available")
+                    yield loaded
+            
+            def _encode(self, tokenizer, texts, source_nllb):
+                """
+                Tokenize texts for a source language without setting the shared
+                tokenizer's src_lang (or its truncation/padding state), so concurrent
+                requests for different language pairs cannot corrupt each other.
+                """
+                lang_id = tokenizer.convert_tokens_to_ids(source_nllb)
+                eos_id = tokenizer.eos_token_id
+                pad_id = tokenizer.pad_token_id
+                max_tokens = self.parent_service.MAX_SOURCE_TOKENS - 2
+                
+                rows = []
+                for ids in tokenizer(texts, add_special_tokens=False)['input_ids']:
+                    ids = list(ids[:max_tokens])
+                    # Same special tokens the tokenizer adds for src_lang
+                    if getattr(tokenizer, 'legacy_behaviour', False):
+                        rows.append(ids + [eos_id, lang_id])
+                    else:
+                        rows.append([lang_id] + ids + [eos_id])
+                
+                width = max(len(row) for row in rows)
+                input_ids = torch.tensor([row + [pad_id] * (width - len(row)) for row in rows])
+                attention_mask = torch.tensor([[1] * len(row) + [0] * (width - len(row)) for row in rows])
+                return {'input_ids': input_ids.to(self.device), 'attention_mask': attention_mask.to(self.device)}
+            
+            def _source_lengths(self, tokenizer, texts):
+                """Encoded length of each text as _encode() builds it (special tokens included)"""
+                max_tokens = self.parent_service.MAX_SOURCE_TOKENS - 2
+                return [min(len(ids), max_tokens) + 2 for ids in tokenizer(texts, add_special_tokens=False)['input_ids']]
 
-            def translate(self, text, source_lang, target_lang):
+            def _shortlist_for(self, model, tokenizer, target_nllb, input_ids):
+                """(projection, token ids) restricting decoding into target_nllb, or None for the full vocabulary"""
+                projection = getattr(model, 'lm_head', None)
+                if not self.parent_service.nllb_shortlist or not isinstance(projection, ShortlistProjection):
+                    return None
+                
+                if target_nllb not in self._shortlist_ids:
+                    if self._shortlists is None:
+                        self._shortlists = load_shortlists(self.models_dir / "nllb200") or {}
+                    ids = self._shortlists.get(target_nllb)
+                    # Shortlists hold full-vocabulary ids; map them into a trimmed model's ids
+                    old_to_new = getattr(tokenizer, 'old_to_new', None)
+                    if ids is not None and old_to_new is not None:
+                        ids = [old_to_new[i] for i in ids if i in old_to_new]
+                    self._shortlist_ids[target_nllb] = set(ids) if ids is not None else None
+                
+                base = self._shortlist_ids[target_nllb]
+                if base is None:
+                    return None
+                # Source tokens stay reachable so names and numbers can be copied
+                return projection, base | set(input_ids.flatten().tolist())
+            
+            def _generate_shortlisted(self, model, shortlist, generate_kwargs):
+                """
+                generate() restricted to a shortlist; with a minimum score, sentences
+                whose confidence under the full vocabulary is below it are decoded
+                again with the full vocabulary. Returns a list of token sequences.
+                """
+                from transformers.modeling_outputs import BaseModelOutput
+                
+                projection, token_ids = shortlist
+                generation_config = model.generation_config
+                min_score = self.parent_service.shortlist_min_score
+                
+                # The encoder runs once: generate(), confidence and retry share its states
+                input_ids, attention_mask = generate_kwargs['input_ids'], generate_kwargs['attention_mask']
+                encoder_states = model.get_encoder()(
+                    input_ids=input_ids, attention_mask=attention_mask
+                ).last_hidden_state
+                generate_kwargs = {k: v for k, v in generate_kwargs.items() if k != 'input_ids'}
+                # Token ids generate() itself uses must be given as shortlist positions
+                special = {
+                    'forced_bos_token_id': generate_kwargs.get('forced_bos_token_id'),
+                    'decoder_start_token_id': generation_config.decoder_start_token_id,
+                    'bos_token_id': generation_config.bos_token_id,
+                    'eos_token_id': generation_config.eos_token_id,
+                    'pad_token_id': generation_config.pad_token_id,
+                }
+                special = {name: value for name, value in special.items() if value is not None}
+                for value in special.values():
+                    token_ids = token_ids | set(value if isinstance(value, list) else [value])
+                
+                with projection.restrict(token_ids):
+                    kwargs = dict(generate_kwargs)
+                    for name, value in special.items():
+                        kwargs[name] = [projection.to_shortlist(v) for v in value] \
+                            if isinstance(value, list) else projection.to_shortlist(value)
+                    # generate() expands encoder outputs in place for beam search: give it its own object
+                    kwargs['encoder_outputs'] = BaseModelOutput(last_hidden_state=encoder_states)
+                    sequences = projection.to_vocabulary(model.generate(**kwargs))
+                
+                low = []
+                if min_score is not None:
+                    check_cancelled()
+                    scores = sequence_confidence(
+                        model, {'attention_mask': attention_mask}, sequences, generation_config.pad_token_id,
+                        encoder_hidden_states=encoder_states
+                    )
+                    low = [k for k, score in enumerate(scores) if score < min_score]
+                sequences = list(sequences)
+                
+                if low:
+                    index = torch.tensor(low, device=input_ids.device)
+                    retry_kwargs = dict(generate_kwargs)
+                    retry_kwargs['attention_mask'] = attention_mask.index_select(0, index)
+                    retry_kwargs['encoder_outputs'] = BaseModelOutput(
+                        last_hidden_state=encoder_states.index_select(0, index)
+                    )
+                    check_cancelled()
+                    for k, row in zip(low, model.generate(**retry_kwargs)):
+                        sequences[k] = row
+                
+                service = self.parent_service
+                with service._shortlist_lock:
+                    service._shortlist_stats['batches'] += 1
+                    service._shortlist_stats['sentences'] += len(sequences)
+                    service._shortlist_stats['fallbacks'] += len(low)
+                    service._shortlist_stats['shortlist_tokens'] += len(token_ids)
+                return sequences
+            
+            def _generate(self, texts, source_nllb, target_nllb, preset=None):
+                """Translate texts with NLLB-200 in padded sub-batches, keeping input order"""
+                with self._base_model() as (tokenizer, model):
+                    preset = preset or self.parent_service.NLLB_PRESET
+                    
+                    lengths = self._source_lengths(tokenizer, texts)
+                    translations = [None] * len(texts)
+                    
+                    for bucket, indices in _sub_batches(lengths, self.max_batch_size):
+                        check_cancelled()
+                        batch = [texts[i] for i in indices]
+                        
+                        with torch.no_grad(), self.parent_service.executor.use('nllb200'):
+                            inputs = self._encode(tokenizer, batch, source_nllb)
+                            
+                            forced_token_id = tokenizer.convert_tokens_to_ids(target_nllb)
+                            
+                            generate_kwargs = dict(
+                                **inputs,
+                                forced_bos_token_id=forced_token_id,
+                                **_decode_limits(preset, bucket),
+                                num_beams=preset["num_beams"],
+                                early_stopping=True,
+                                **stopping_kwargs(),
+                            )
+                            shortlist = self._shortlist_for(model, tokenizer, target_nllb, inputs['input_ids'])
+                            if shortlist:
+                                generated_tokens = self._generate_shortlisted(model, shortlist, generate_kwargs)
+                            else:
+                                generated_tokens = model.generate(**generate_kwargs)
+                            check_cancelled()
+                            
+                            decoded = tokenizer.batch_decode(
+                                generated_tokens, skip_special_tokens=True
+                            )
+                        
+                        for i, translation in zip(indices, decoded):
+                            translations[i] = translation
+                    
+                    return translations
+
+            def stream(self, text, source_nllb, target_nllb, preset=None):
+                """
+                Greedy-decode one sentence with NLLB-200, yielding text pieces as they
+                are generated. The generator's return value is the full translation.
+                """
+                pieces = []
+                with self._base_model() as (tokenizer, model):
+                    preset = preset or self.parent_service.NLLB_PRESET
+                    inputs = self._encode(tokenizer, [text], source_nllb)
+                    for piece in stream_generate(
+                        model, tokenizer,
+                        dict(
+                            **inputs,
+                            forced_bos_token_id=tokenizer.convert_tokens_to_ids(target_nllb),
+                            **_decode_limits(preset, inputs['input_ids'].shape[1]),
+                        ),
+                        slot=self.parent_service.executor.use('nllb200')
+                    ):
+                        pieces.append(piece)
+                        yield piece
+                return ''.join(pieces)
+
+            def generate_multi(self, texts, source_nllb, target_rows, preset=None):
+                """
+                Translate texts into several target languages, running the encoder once.
+                
+                Args:
+                    texts: source sentences
+                    source_nllb: NLLB code of the source language
+                    target_rows: {target_nllb: indices of texts to translate into that target}
+                    preset: generation preset (default: NLLB_PRESET)
+                
+                Returns:
+                    {target_nllb: {index: translation}}
+                """
+                from transformers.modeling_outputs import BaseModelOutput
+                
+                with self._base_model() as (tokenizer, model):
+                    preset = preset or self.parent_service.NLLB_PRESET
+                    wanted = {target: set(rows) for target, rows in target_rows.items()}
+                    translations = {target: {} for target in target_rows}
+                    
+                    rows_needed = sorted(set().union(*wanted.values()))
+                    lengths = self._source_lengths(tokenizer, [texts[r] for r in rows_needed])
+                    
+                    for bucket, positions in _sub_batches(lengths, self.max_batch_size):
+                        check_cancelled()
+                        rows = [rows_needed[p] for p in positions]
+                        
+                        with torch.no_grad(), self.parent_service.executor.use('nllb200'):
+                            inputs = self._encode(tokenizer, [texts[r] for r in rows], source_nllb)
+                            
+                            encoder_outputs = model.get_encoder()(**inputs, return_dict=True)
+                            
+                            for target, target_wanted in wanted.items():
+                                selected = [k for k, r in enumerate(rows) if r in target_wanted]
+                                if not selected:
+                                    continue
+                                check_cancelled()
+                                
+                                index = torch.tensor(selected, device=inputs['input_ids'].device)
+                                # generate() expands encoder outputs in place for beam search,
+                                # so every target gets its own (sliced) output object
+                                target_encoder_outputs = BaseModelOutput(
+                                    last_hidden_state=encoder_outputs.last_hidden_state.index_select(0, index)
+                                )
+                                
+                                generated_tokens = model.generate(
+                                    encoder_outputs=target_encoder_outputs,
+                                    attention_mask=inputs['attention_mask'].index_select(0, index),
+                                    forced_bos_token_id=tokenizer.convert_tokens_to_ids(target),
+                                    **_decode_limits(preset, bucket),
+                                    num_beams=preset["num_beams"],
+                                    early_stopping=True,
+                                    **stopping_kwargs(),
+                                )
+                                check_cancelled()
+                                
+                                decoded = tokenizer.batch_decode(
+                                    generated_tokens, skip_special_tokens=True
+                                )
+                                for k, translation in zip(selected, decoded):
+                                    translations[target][rows[k]] = translation
+                    
+                    return translations
+
+            def translate(self, text, source_lang, target_lang, tier=None):
                 """NLLB-200 translation with cascade logic"""
+                return self.translate_batch([text], source_lang, target_lang, tier)[0]
+
+            def translate_batch(self, texts, source_lang, target_lang, tier=None):
+                """NLLB-200 translation of several sentences with batched generate() calls"""
                 start_time = time.time()
+                preset = self.parent_service._tiered(self.parent_service.NLLB_PRESET, tier)
+                
+                results = [None] * len(texts)
+                pending = []
+                for i, text in enumerate(texts):
+                    if text.strip():
+                        pending.append(i)
+                    else:
+                        results[i] = self._empty_response(source_lang, target_lang)
                 
-                if not text.strip():
-                    return self._empty_response(source_lang, target_lang)
+                if not pending:
+                    return results
                 
                 try:
                     source_nllb = self._convert_lang_code(source_lang)
                     target_nllb = self._convert_lang_code(target_lang)
                     
                     if not source_nllb or not target_nllb:
-                        return self._error_response(
+                        return self._batch_error(
+                            results, pending,
                             f"Language not supported: {source_lang}→{target_lang}",
                             source_lang, target_lang
                         )
                     
                     if not self._check_nllb_available():
-                        return self._error_response(
+                        return self._batch_error(
+                            results, pending,
                             f"NLLB-200 model not available",
                             source_lang, target_lang
                         )
                     
+                    batch_texts = [texts[i] for i in pending]
+                    translations = [None] * len(pending)
+                    pivots = [None] * len(pending)
+                    pivots_cached = [False] * len(pending)
                     cascade_used = False
-                    translation = None
                     model_name = "nllb200_base"
                     
                     # Cascade: kbd → other (via ru)
                     if source_nllb == 'kbd_Cyrl' and target_nllb != 'rus_Cyrl':
-                        print(f"🔄 Cascade: kbd→ru→{target_nllb}")
-                        marian = self.parent_service.marian_service
-                        if marian:
-                            step1 = marian.translate_kbd_to_ru(text)
-                            if step1['success']:
-                                intermediate = step1['translation']
-                                print(f"  ↳ Intermediate (ru): {intermediate[:50]}...")
-                                
-                                if self._base_model is None:
-                                    if not self._load_base_model():
-                                        raise RuntimeError("Base NLLB-200 not available")
-                                
-                                with torch.no_grad():
-                                    self._tokenizer.src_lang = 'rus_Cyrl'
-                                    inputs = self._tokenizer(
-                                        intermediate, return_tensors="pt", padding=True, 
-                                        truncation=True, max_length=512
-                                    ).to(self.device)
-                                    
-                                    forced_token_id = self._tokenizer.convert_tokens_to_ids(target_nllb)
-                                    
-                                    generated_tokens = self._base_model.generate(
-                                        **inputs,
-                                        forced_bos_token_id=forced_token_id,
-                                        max_length=512, num_beams=5, early_stopping=True,
-                                    )
-                                    
-                                    translation = self._tokenizer.batch_decode(
-                                        generated_tokens, skip_special_tokens=True
-                                    )[0]
-                                
-                                cascade_used = True
-                                model_name = "cascade_kbd→ru→target"
+                        print(f"🔄 Cascade: kbd→ru→{target_nllb} (batch={len(pending)})")
+                        # The ru pivot is cached by source sentence, so cascades from the
+                        # same Kabardian text into other targets skip the MarianMT decode
+                        step1 = self.parent_service._translate_cached(
+                            batch_texts, 'kbd_Cyrl', 'rus_Cyrl', use_scheduler=False, tier=tier
+                        )
+                        ok = [j for j, r in enumerate(step1) if not r.get('error')]
+                        for j in ok:
+                            pivots[j] = step1[j]['translation']
+                            pivots_cached[j] = bool(step1[j].get('cached'))
+                        
+                        if ok:
+                            intermediates = [pivots[j] for j in ok]
+                            print(f"  ↳ Intermediate (ru): {intermediates[0][:50]}... "
+                                  f"({sum(pivots_cached[j] for j in ok)}/{len(ok)} from cache)")
+                            
+                            decoded = self._generate(intermediates, 'rus_Cyrl', target_nllb, preset)
+                            for j, translation in zip(ok, decoded):
+                                translations[j] = translation
+                            
+                            cascade_used = True
+                            model_name = "cascade_kbd→ru→target"
                     
                     # Cascade: other → kbd (via ru)
                     elif source_nllb != 'rus_Cyrl' and target_nllb == 'kbd_Cyrl':
-                        print(f"🔄 Cascade: {source_nllb}→ru→kbd")
+                        print(f"🔄 Cascade: {source_nllb}→ru→kbd (batch={len(pending)})")
                         
-                        if self._base_model is None:
-                            if not self._load_base_model():
-                                raise RuntimeError("Base NLLB-200 not available")
+                        intermediates = self._generate(batch_texts, source_nllb, 'rus_Cyrl', preset)
                         
-                        with torch.no_grad():
-                            self._tokenizer.src_lang = source_nllb
-                            inputs = self._tokenizer(
-                                text, return_tensors="pt", padding=True, 
-                                truncation=True, max_length=512
-                            ).to(self.device)
-                            
-                            forced_token_id = self._tokenizer.convert_tokens_to_ids('rus_Cyrl')
-                            
-                            generated_tokens = self._base_model.generate(
-                                **inputs,
-                                forced_bos_token_id=forced_token_id,
-                                max_length=512, num_beams=5, early_stopping=True,
-                            )
-                            
-                            intermediate = self._tokenizer.batch_decode(
-                                generated_tokens, skip_special_tokens=True
-                            )[0]
-                        
-                        print(f"  ↳ Intermediate (ru): {intermediate[:50]}...")
+                        print(f"  ↳ Intermediate (ru): {intermediates[0][:50]}...")
                         
                         marian = self.parent_service.marian_service
                         if marian:
-                            step2 = marian.translate_ru_to_kbd(intermediate)
-                            if step2['success']:
-                                translation = step2['translation']
-                                cascade_used = True
-                                model_name = "cascade_source→ru→kbd"
+                            step2 = marian.translate_ru_to_kbd_batch(
+                                intermediates, self.parent_service._preset_for('rus_Cyrl', 'kbd_Cyrl', tier)
+                            )
+                            for j, r in enumerate(step2):
+                                if r['success']:
+                                    translations[j] = r['translation']
+                                    cascade_used = True
+                                    model_name = "cascade_source→ru→kbd"
                     
                     # Direct NLLB-200
                     else:
-                        print(f"🌐 Direct NLLB-200: {source_nllb}→{target_nllb}")
-                        
-                        if self._base_model is None:
-                            if not self._load_base_model():
-                                raise RuntimeError("Base NLLB-200 not available")
-                        
-                        with torch.no_grad():
-                            self._tokenizer.src_lang = source_nllb
-                            inputs = self._tokenizer(
-                                text, return_tensors="pt", padding=True, 
-                                truncation=True, max_length=512
-                            ).to(self.device)
-                            
-                            forced_token_id = self._tokenizer.convert_tokens_to_ids(target_nllb)
-                            
-                            generated_tokens = self._base_model.generate(
-                                **inputs,
-                                forced_bos_token_id=forced_token_id,
-                                max_length=512, num_beams=5, early_stopping=True,
-                            )
-                            
-                            translation = self._tokenizer.batch_decode(
-                                generated_tokens, skip_special_tokens=True
-                            )[0]
+                        print(f"🌐 Direct NLLB-200: {source_nllb}→{target_nllb} (batch={len(pending)})")
+                        translations = self._generate(batch_texts, source_nllb, target_nllb, preset)
                     
-                    if not translation:
-                        return self._error_response(
-                            f"Failed to translate",
-                            source_lang, target_lang
-                        )
-                    
-                    filtered_translation = self.parent_service._filter_latin_words(translation, target_lang)
                     translation_time = round((time.time() - start_time) * 1000, 2)
-                    
+                    share = round(translation_time / len(pending), 2)
                     cascade_info = " (cascade)" if cascade_used else ""
-                    print(f"✅ NLLB-200{cascade_info}: '{text[:50]}...' → '{filtered_translation[:50]}...' ({translation_time}ms)")
-                    
-                    return {
-                        'translation': filtered_translation,
-                        'direction': f"{source_lang}→{target_lang}",
-                        'source_lang': source_lang,
-                        'target_lang': target_lang,
-                        'time_ms': translation_time,
-                        'original_length': len(text),
-                        'translation_length': len(filtered_translation),
-                        'model_used': model_name,
-                        'cascade': cascade_used,
-                        'error': None
-                    }
                     
+                    for j, i in enumerate(pending):
+                        text = texts[i]
+                        translation = translations[j]
+                        
+                        if not translation:
+                            results[i] = self._error_response(
+                                f"Failed to translate",
+                                source_lang, target_lang
+                            )
+                            continue
+                        
+                        filtered_translation = self.parent_service._filter_latin_words(translation, target_lang)
+                        print(f"✅ NLLB-200{cascade_info}: '{text[:50]}...' → '{filtered_translation[:50]}...'")
+                        
+                        results[i] = {
+                            'translation': filtered_translation,
+                            'direction': f"{source_lang}→{target_lang}",
+                            'source_lang': source_lang,
+                            'target_lang': target_lang,
+                            'time_ms': share,
+                            'original_length': len(text),
+                            'translation_length': len(filtered_translation),
+                            'model_used': model_name,
+                            'cascade': cascade_used,
+                            'batch_size': len(pending),
+                            'error': None
+                        }
+                        if pivots[j] is not None:
+                            results[i]['pivot_translation'] = pivots[j]
+                            results[i]['pivot_cached'] = pivots_cached[j]
+                    
+                    print(f"✅ NLLB-200 batch of {len(pending)} done ({translation_time}ms)")
+                    return results
+                
+                except QueueFull:
+                    raise
                 except Exception as e:
                     print(f"❌ NLLB-200 translation error: {e}")
                     import traceback
                     traceback.print_exc()
-                    return self._error_response(f"NLLB-200 Error: {str(e)}", source_lang, target_lang)
+                    return self._batch_error(results, pending, f"NLLB-200 Error: {str(e)}", source_lang, target_lang)
+            
+            def _batch_error(self, results, pending, error_msg, source_lang, target_lang):
+                for i in pending:
+                    results[i] = self._error_response(error_msg, source_lang, target_lang)
+                return results
             
             def _empty_response(self, source_lang, target_lang):
                 return {
@@ -600,157 +1423,883 @@ class TranslationService:
             
             def cleanup(self):
                 """Cleanup NLLB-200 models"""
-                self._base_model = None
+                self.parent_service.registry.release('nllb200')
                 self._tokenizer = None
+                self._shortlists = None
+                self._shortlist_ids = {}
                 gc.collect()
                 if self.device == "mps":
                     torch.mps.empty_cache()
         
-        return LazyNLLBService(self.device, self.models_dir, self)
+        return LazyNLLBService(self.device, self.models_dir, self, self.MAX_BATCH_SIZE)
     
     def _get_supported_languages(self):
         """Returns supported languages by groups"""
-        return {
-            'slavic': {
-                'rus_Cyrl': 'Russian',
-                'ukr_Cyrl': 'Ukrainian', 
-                'bel_Cyrl': 'Belarusian',
-                'lvs_Latn': 'Latvian',
-            },
-            'caucasian_turkic': {
-                'kbd_Cyrl': 'Kabardian',
-                'kaz_Cyrl': 'Kazakh',
-                'bak_Cyrl': 'Bashkir',
-                'kir_Cyrl': 'Kyrgyz',
-                'kat_Geor': 'Georgian',
-                'hye_Armn': 'Armenian',
-                'azj_Latn': 'Azerbaijani',
-            },
-            'turkic': {
-                'tur_Latn': 'Turkish',
-            },
-            'european': {
-                'eng_Latn': 'English',
-                'deu_Latn': 'German',
-                'fra_Latn': 'French',
-                'spa_Latn': 'Spanish',
+        return {group: dict(languages) for group, languages in self.SUPPORTED_LANGUAGES.items()}
+    
+    def translate(self, text, source_lang, target_lang, tier=None):
+        """
+        Main translation method with sentence chunking.
+        `tier` selects a quality tier ('fast', 'balanced', 'best'); under load
+        it may be downgraded, the response reports both tiers.
+        Concurrent calls for the same text, language pair and tier share one
+        computation; the responses of the callers that attached to it carry
+        'coalesced': True. The text is matched exactly, as the response keeps
+        its separators and original_length (whitespace variants still share
+        the sentence cache).
+        """
+        requested_tier = tier or self.default_tier
+        if requested_tier not in self.QUALITY_TIERS:
+            return self._error_response(f"Unknown quality tier: {requested_tier}", source_lang, target_lang)
+        
+        key = (text, source_lang, target_lang, requested_tier)
+        response, coalesced = self._coalescer.run(
+            key, lambda: self._translate_request(text, source_lang, target_lang, requested_tier)
+        )
+        if coalesced:
+            print(f"🔗 Coalesced with an identical in-flight request ({source_lang}→{target_lang})")
+            response = dict(response, coalesced=True)
+        return response
+    
+    def _translate_request(self, text, source_lang, target_lang, requested_tier):
+        """One translate() computation: tier selection under load, translation, tier reporting"""
+        tier = self._begin_request(requested_tier)
+        try:
+            response = self._translate_text(text, source_lang, target_lang, tier)
+        finally:
+            self._end_request()
+        
+        response['tier'] = tier
+        response['tier_requested'] = requested_tier
+        return response
+
+    def translate_many(self, items, tier=None):
+        """
+        Translate a list of independent texts, each with its own language pair.
+
+        Items are grouped by language pair and identical texts are translated
+        once; the sentences of each pair go through one cached, batched call,
+        so the models see real batches instead of one request per string.
+
+        Args:
+            items: list of (text, source_lang, target_lang)
+            tier: quality tier for all items
+
+        Returns:
+            dict with one translate()-format response per item under 'results'
+            (input order, failures as per-item 'error' entries)
+        """
+        start_time = time.time()
+        requested_tier = tier or self.default_tier
+        if requested_tier not in self.QUALITY_TIERS:
+            error = f"Unknown quality tier: {requested_tier}"
+            return {
+                'results': [self._error_response(error, s, t) for _, s, t in items],
+                'time_ms': 0
             }
+
+        results = [None] * len(items)
+        supported = self.get_flat_languages()
+        # {(source_lang, target_lang): {normalized text: (first item's text, [item indices])}}
+        groups = {}
+        for i, (text, source_lang, target_lang) in enumerate(items):
+            if not isinstance(text, str):
+                results[i] = self._error_response("Item text must be a string", source_lang, target_lang)
+            elif not isinstance(source_lang, str) or not isinstance(target_lang, str):
+                results[i] = self._error_response("Item languages must be strings", source_lang, target_lang)
+            elif source_lang not in supported or target_lang not in supported:
+                results[i] = self._error_response(
+                    f"Language not supported: {source_lang}→{target_lang}", source_lang, target_lang
+                )
+            elif not text.strip():
+                results[i] = self._empty_response(source_lang, target_lang)
+            else:
+                pair = groups.setdefault((source_lang, target_lang), {})
+                pair.setdefault(TranslationCache.normalize(text), (text, []))[1].append(i)
+
+        unique_texts = sum(len(texts) for texts in groups.values())
+        print(f"📚 Batch of {len(items)} item(s): {unique_texts} unique text(s) in {len(groups)} language pair(s)")
+
+        tier = self._begin_request(requested_tier)
+        try:
+            for (source_lang, target_lang), texts in groups.items():
+                check_cancelled()
+                pair_start = time.time()
+
+                # A failing pair (model not available, ...) only fails its own items
+                try:
+                    # All sentences of the pair in one call; each text keeps its slice
+                    sentences, spans = [], []
+                    for text, _ in texts.values():
+                        chunks, separators = self._split_into_chunks(text, source_lang, target_lang)
+                        spans.append((len(sentences), len(chunks), separators))
+                        sentences.extend(chunks)
+
+                    chunk_results = self._translate_cached(sentences, source_lang, target_lang, tier=tier)
+
+                    for (text, indices), (offset, count, separators) in zip(texts.values(), spans):
+                        response = self._assemble_response(
+                            text, chunk_results[offset:offset + count], source_lang, target_lang,
+                            pair_start, separators
+                        )
+                        for i in indices:
+                            results[i] = response
+                except QueueFull:
+                    raise
+                except Exception as e:
+                    print(f"❌ Batch translation error ({source_lang}→{target_lang}): {e}")
+                    error = self._error_response(f"Error: {str(e)}", source_lang, target_lang)
+                    for _, indices in texts.values():
+                        for i in indices:
+                            results[i] = error
+        finally:
+            self._end_request()
+
+        return {
+            'results': [dict(result, index=i) for i, result in enumerate(results)],
+            'count': len(items),
+            'unique_texts': unique_texts,
+            'language_pairs': len(groups),
+            'errors': sum(1 for result in results if result.get('error')),
+            'tier': tier,
+            'tier_requested': requested_tier,
+            'time_ms': round((time.time() - start_time) * 1000, 2)
         }
-    
-    def translate(self, text, source_lang, target_lang):
-        """Main translation method with sentence chunking"""
+
+    def translate_stream(self, text, source_lang, target_lang, tier=None):
+        """
+        Streaming variant of translate(): yields one event per sentence as soon
+        as it is translated, then a summary.
+
+        Cached sentences are emitted first; the rest are decoded one at a time
+        (still sharing micro-batches with concurrent requests), so the first
+        sentence arrives without waiting for the whole text.
+
+        Yields:
+            {'type': 'sentence', 'index', 'count', 'source', 'translation', 'separator', 'cached', 'time_ms', ...}
+            {'type': 'error', 'index', 'error'} when a sentence fails (the stream ends)
+            {'type': 'done', ...translate() response fields, 'first_sentence_ms'}
+        """
+        start_time = time.time()
+        requested_tier = tier or self.default_tier
+        if requested_tier not in self.QUALITY_TIERS:
+            yield dict(self._error_response(f"Unknown quality tier: {requested_tier}", source_lang, target_lang),
+                       type='error', index=None)
+            return
+
+        chunks, separators = self._split_into_chunks(text, source_lang, target_lang) if text.strip() else ([], [])
+        if not chunks:
+            yield dict(self._empty_response(source_lang, target_lang), type='done', chunks_count=0)
+            return
+
+        print(f"📡 Streaming {len(chunks)} chunk(s) {source_lang}→{target_lang}")
+        tier = self._begin_request(requested_tier)
+        first_sentence_ms = None
+        try:
+            chunk_results = [None] * len(chunks)
+
+            # Cache hits first, then decode the misses in order
+            use_keys = self._cache is not None or self._memory is not None
+            if use_keys:
+                for i, chunk in enumerate(chunks):
+                    chunk_results[i] = self._lookup_cached(self._cache_key(chunk, source_lang, target_lang, tier))
+            order = [i for i, r in enumerate(chunk_results) if r is not None] + \
+                    [i for i, r in enumerate(chunk_results) if r is None]
+
+            for i in order:
+                check_cancelled()
+                if chunk_results[i] is None:
+                    chunk_results[i] = self._translate_cached([chunks[i]], source_lang, target_lang, tier=tier)[0]
+                result = chunk_results[i]
+
+                if result.get('error'):
+                    yield {'type': 'error', 'index': i, 'error': result['error']}
+                    return
+
+                if first_sentence_ms is None:
+                    first_sentence_ms = round((time.time() - start_time) * 1000, 2)
+                yield {
+                    'type': 'sentence',
+                    'index': i,
+                    'count': len(chunks),
+                    'source': chunks[i],
+                    'translation': self._filter_latin_words(result['translation'], target_lang),
+                    'separator': separators[i],
+                    'cached': bool(result.get('cached')),
+                    'time_ms': result['time_ms'],
+                    'model_used': result.get('model_used'),
+                }
+
+            response = self._assemble_response(
+                text, chunk_results, source_lang, target_lang, start_time, separators
+            )
+        finally:
+            self._end_request()
+
+        response.update(type='done', tier=tier, tier_requested=requested_tier,
+                        first_sentence_ms=first_sentence_ms)
+        yield response
+
+    def translate_tokens(self, text, source_lang, target_lang, tier=None):
+        """
+        Token-level streaming: like translate_stream(), but each sentence is
+        decoded greedily and its text is emitted word by word while it is being
+        generated, so output starts after the first decoding steps even for a
+        single long sentence. Greedy decoding is the 'fast' tier, the only tier
+        accepted here; cascade pivots are decoded in that tier as well.
+
+        Only the last step of a cascade (kbd→ru→X, X→ru→kbd) is streamed: the
+        ru pivot is translated in full first (or taken from the cache), so the
+        first token of a cascade arrives after a whole pivot translation.
+
+        Yields:
+            {'type': 'delta', 'index', 'text'}: next piece of sentence `index`
+            {'type': 'sentence', ...}: the finished (post-processed) sentence, as in translate_stream()
+            {'type': 'error', 'index', 'error'} when a sentence fails (the stream ends)
+            {'type': 'done', ...translate() response fields, 'first_token_ms'}
+        """
+        start_time = time.time()
+        requested_tier = tier or 'fast'
+        if requested_tier != 'fast':
+            error = f"Token streaming decodes greedily: only the 'fast' tier is available, not '{requested_tier}'"
+            yield dict(self._error_response(error, source_lang, target_lang), type='error', index=None)
+            return
+
+        chunks, separators = self._split_into_chunks(text, source_lang, target_lang) if text.strip() else ([], [])
+        if not chunks:
+            yield dict(self._empty_response(source_lang, target_lang), type='done', chunks_count=0)
+            return
+
+        print(f"📡 Token streaming {len(chunks)} chunk(s) {source_lang}→{target_lang} (greedy)")
+        tier = self._begin_request('fast')
+        use_keys = self._cache is not None or self._memory is not None
+        first_token_ms = None
+        try:
+            chunk_results = []
+            for i, chunk in enumerate(chunks):
+                check_cancelled()
+                key = self._cache_key(chunk, source_lang, target_lang, tier) if use_keys else None
+                result = self._lookup_cached(key) if use_keys else None
+
+                if result is None:
+                    try:
+                        with closing(self._stream_chunk(chunk, source_lang, target_lang)) as pieces:
+                            while True:
+                                piece = next(pieces)
+                                if first_token_ms is None:
+                                    first_token_ms = round((time.time() - start_time) * 1000, 2)
+                                yield {'type': 'delta', 'index': i, 'text': piece}
+                    except StopIteration as finished:
+                        result = finished.value
+                    except QueueFull:
+                        raise
+                    except Exception as e:
+                        print(f"❌ Token streaming error: {e}")
+                        result = {'translation': '', 'time_ms': 0, 'error': str(e)}
+
+                    if use_keys and not result.get('error'):
+                        self._store_cached(key, result)
+
+                if result.get('error'):
+                    yield {'type': 'error', 'index': i, 'error': result['error']}
+                    return
+
+                if first_token_ms is None:
+                    first_token_ms = round((time.time() - start_time) * 1000, 2)
+                chunk_results.append(result)
+                yield {
+                    'type': 'sentence',
+                    'index': i,
+                    'count': len(chunks),
+                    'source': chunk,
+                    'translation': result['translation'],
+                    'separator': separators[i],
+                    'cached': bool(result.get('cached')),
+                    'time_ms': result['time_ms'],
+                    'model_used': result.get('model_used'),
+                }
+
+            response = self._assemble_response(
+                text, chunk_results, source_lang, target_lang, start_time, separators
+            )
+        finally:
+            self._end_request()
+
+        response.update(type='done', tier=tier, tier_requested=requested_tier, first_token_ms=first_token_ms)
+        yield response
+
+    def _stream_chunk(self, chunk, source_lang, target_lang):
+        """
+        Greedily decode one chunk, yielding text pieces of the final model on
+        the route; returns the chunk result (same format as batch results).
+        """
+        start = time.time()
+        pivot = None
+
+        if self._is_marian_pair(source_lang, target_lang):
+            direction = 'ru_kbd' if source_lang == 'rus_Cyrl' else 'kbd_ru'
+            translation = yield from self.marian_service.stream(
+                direction, chunk, self._preset_for(source_lang, target_lang, 'fast')
+            )
+            model_name = f"marian_{direction}"
+        else:
+            nllb = self.nllb_service
+            source_nllb = nllb._convert_lang_code(source_lang)
+            target_nllb = nllb._convert_lang_code(target_lang)
+            if not source_nllb or not target_nllb:
+                return {'translation': '', 'time_ms': 0, 'error': f"Language not supported: {source_lang}→{target_lang}"}
+            if not nllb._check_nllb_available():
+                return {'translation': '', 'time_ms': 0, 'error': "NLLB-200 model not available"}
+
+            preset = self._tiered(self.NLLB_PRESET, 'fast')
+            # Cascades: the ru pivot is decoded (or reused from the cache) first,
+            # the second step is streamed
+            if source_nllb == 'kbd_Cyrl' and target_nllb != 'rus_Cyrl':
+                step1 = self._translate_cached([chunk], 'kbd_Cyrl', 'rus_Cyrl', tier='fast')[0]
+                if step1.get('error'):
+                    return step1
+                pivot = step1['translation']
+                translation = yield from nllb.stream(pivot, 'rus_Cyrl', target_nllb, preset)
+                model_name = "cascade_kbd→ru→target"
+            elif source_nllb != 'rus_Cyrl' and target_nllb == 'kbd_Cyrl':
+                step1 = self._translate_cached([chunk], source_lang, 'rus_Cyrl', tier='fast')[0]
+                if step1.get('error'):
+                    return step1
+                pivot = step1['translation']
+                translation = yield from self.marian_service.stream(
+                    'ru_kbd', pivot, self._preset_for('rus_Cyrl', 'kbd_Cyrl', 'fast')
+                )
+                model_name = "cascade_source→ru→kbd"
+            else:
+                translation = yield from nllb.stream(chunk, source_nllb, target_nllb, preset)
+                model_name = "nllb200_base"
+
+        if not translation.strip():
+            return {'translation': '', 'time_ms': 0, 'error': "Failed to translate"}
+
+        filtered_translation = self._filter_latin_words(translation.strip(), target_lang)
+        result = {
+            'translation': filtered_translation,
+            'direction': f"{source_lang}→{target_lang}",
+            'source_lang': source_lang,
+            'target_lang': target_lang,
+            'time_ms': round((time.time() - start) * 1000, 2),
+            'original_length': len(chunk),
+            'translation_length': len(filtered_translation),
+            'model_used': model_name,
+            'cascade': model_name.startswith('cascade'),
+            'error': None
+        }
+        if pivot is not None:
+            result['pivot_translation'] = pivot
+        return result
+
+    def _translate_text(self, text, source_lang, target_lang, tier):
+        """Split text into sentences, translate them and join the result"""
         start_time = time.time()
         
         if not text.strip():
             return self._empty_response(source_lang, target_lang)
         
         try:
-            # Split text into sentences
-            sentences = self._split_into_sentences(text)
+            # Split text into token-budget chunks
+            chunks, separators = self._split_into_chunks(text, source_lang, target_lang)
             
-            if not sentences:
+            if not chunks:
                 return self._empty_response(source_lang, target_lang)
             
-            print(f"📄 Split into {len(sentences)} sentence(s)")
-            for i, sent in enumerate(sentences, 1):
-                print(f"  {i}. '{sent[:50]}...'")
+            print(f"📄 Split into {len(chunks)} chunk(s)")
+            for i, chunk in enumerate(chunks, 1):
+                print(f"  {i}. '{chunk[:50]}...'")
             
-            # Translate each sentence
-            translated_sentences = []
-            total_chunk_time = 0
-            cascade_used = False
-            model_used = None
-            
-            for i, sentence in enumerate(sentences, 1):
-                print(f"\n🔄 Translating chunk {i}/{len(sentences)}: '{sentence[:50]}...'")
-                
-                chunk_result = self._translate_single_chunk(sentence, source_lang, target_lang)
-                
-                if chunk_result.get('error'):
-                    return chunk_result
-                
-                translated_sentences.append(chunk_result['translation'])
-                total_chunk_time += chunk_result['time_ms']
-                
-                if chunk_result.get('cascade'):
-                    cascade_used = True
-                
-                if model_used is None:
-                    model_used = chunk_result.get('model_used', 'unknown')
-                
-                print(f"  ✅ Chunk {i} done: '{chunk_result['translation'][:50]}...' ({chunk_result['time_ms']}ms)")
-            
-            # Combine all translated sentences
-            final_translation = ' '.join(translated_sentences)
-            filtered_translation = self._filter_latin_words(final_translation, target_lang)
-            total_time = round((time.time() - start_time) * 1000, 2)
-            
-            print(f"\n✅ All chunks translated in {total_time}ms (processing: {total_chunk_time}ms)")
-            print(f"   Final: '{filtered_translation[:100]}...'")
+            # Cached chunks are reused, the rest is decoded in one batch
+            chunk_results = self._translate_cached(chunks, source_lang, target_lang, tier=tier)
             
+            return self._assemble_response(
+                text, chunk_results, source_lang, target_lang, start_time, separators
+            )
+        
+        except QueueFull:
+            raise
+        except Exception as e:
+            print(f"❌ Translation error: {e}")
+            import traceback
+            traceback.print_exc()
+            return self._error_response(f"Error: {str(e)}", source_lang, target_lang)
+    
+    def translate_multi(self, text, source_lang, target_langs, tier=None):
+        """
+        Translate one text into several target languages at once.
+        
+        The NLLB-200 encoder runs once per sentence batch and its states are
+        reused for every target's decode; Kabardian targets and sources share
+        one MarianMT (pivot) step.
+        
+        Returns:
+            dict with per-target responses (same format as translate()) under 'results'
+            (unsupported or failing targets as per-target 'error' entries)
+        """
+        start_time = time.time()
+        targets = list(dict.fromkeys(target_langs))
+        requested_tier = tier or self.default_tier
+        
+        if requested_tier not in self.QUALITY_TIERS:
+            error = f"Unknown quality tier: {requested_tier}"
             return {
-                'translation': filtered_translation,
-                'direction': f"{source_lang}→{target_lang}",
                 'source_lang': source_lang,
-                'target_lang': target_lang,
-                'time_ms': total_time,
-                'original_length': len(text),
-                'translation_length': len(filtered_translation),
-                'model_used': model_used,
-                'cascade': cascade_used,
-                'chunks_count': len(sentences),
-                'error': None
+                'results': {t: self._error_response(error, source_lang, t) for t in targets},
+                'time_ms': 0
             }
-                
+        
+        # Unsupported languages fail their own targets (all of them for the source)
+        supported = self.get_flat_languages()
+        results = {
+            target: self._error_response(f"Language not supported: {source_lang}→{target}", source_lang, target)
+            for target in targets
+            if source_lang not in supported or target not in supported
+        }
+        targets = [target for target in targets if target not in results]
+        
+        if not text.strip() or not targets:
+            results.update({t: self._empty_response(source_lang, t) for t in targets})
+            return {
+                'source_lang': source_lang,
+                'results': results,
+                'time_ms': 0
+            }
+        
+        tier = self._begin_request(requested_tier)
+        try:
+            sentences, separators = self._split_into_chunks(text, source_lang)
+            print(f"📄 Multi-target translation {source_lang}→{targets} [{tier}]: {len(sentences)} chunk(s)")
+            
+            chunk_results = self._translate_multi_chunks(sentences, source_lang, targets, tier)
+            
+            for target in targets:
+                results[target] = self._assemble_response(
+                    text, chunk_results[target], source_lang, target, start_time, separators
+                )
+        except QueueFull:
+            raise
         except Exception as e:
-            print(f"❌ Translation error: {e}")
+            print(f"❌ Multi-target translation error: {e}")
             import traceback
             traceback.print_exc()
-            return self._error_response(f"Error: {str(e)}", source_lang, target_lang)
+            results.update({t: self._error_response(f"Error: {str(e)}", source_lang, t) for t in targets})
+        finally:
+            self._end_request()
+        
+        return {
+            'source_lang': source_lang,
+            'results': results,
+            'tier': tier,
+            'tier_requested': requested_tier,
+            'time_ms': round((time.time() - start_time) * 1000, 2)
+        }
     
-    def _translate_single_chunk(self, text, source_lang, target_lang):
-        """Translate a single chunk (sentence)"""
-        if not text.strip():
-            return {'translation': '', 'time_ms': 0, 'error': None}
+    def _translate_multi_chunks(self, sentences, source_lang, targets, tier=None):
+        """
+        Per-target chunk results for translate_multi, sharing encoder and pivot work.
+        A failing step (pivot chunk, model) only fails the chunks that depend on it.
+        """
+        start_time = time.time()
+        chunk_results = {target: [None] * len(sentences) for target in targets}
+        use_keys = self._cache is not None or self._memory is not None
+        
+        # Sentences already cached for a target need no decoding at all
+        missing = {}
+        for target in targets:
+            for i, sentence in enumerate(sentences):
+                cached = None
+                if use_keys:
+                    cached = self._lookup_cached(self._cache_key(sentence, source_lang, target, tier))
+                if cached is not None:
+                    chunk_results[target][i] = cached
+                else:
+                    missing.setdefault(target, []).append(i)
+        
+        if not missing:
+            return chunk_results
+        
+        def fail(rows_by_target, error):
+            for target, rows in rows_by_target.items():
+                for i in rows:
+                    chunk_results[target][i] = self._error_response(error, source_lang, target)
+        
+        # MarianMT pairs (ru→kbd, kbd→ru) go through the regular cached path
+        for target in list(missing):
+            if self._is_marian_pair(source_lang, target):
+                rows = missing.pop(target)
+                try:
+                    rows_results = self._translate_cached(
+                        [sentences[i] for i in rows], source_lang, target, tier=tier
+                    )
+                except QueueFull:
+                    raise
+                except Exception as e:
+                    print(f"❌ Multi-target {source_lang}→{target} error: {e}")
+                    fail({target: rows}, f"Error: {str(e)}")
+                    continue
+                for i, result in zip(rows, rows_results):
+                    chunk_results[target][i] = result
+        
+        if not missing:
+            return chunk_results
+        
+        # Everything else needs NLLB-200, from the source or from the ru pivot
+        nllb_source = source_lang
+        nllb_texts = list(sentences)
+        pivot_cached = {}
+        model_name = "nllb200_base"
+        
+        if source_lang == 'kbd_Cyrl':
+            # One MarianMT kbd→ru pivot for all targets
+            rows = sorted(set().union(*missing.values()))
+            try:
+                pivots = self._translate_cached([sentences[i] for i in rows], 'kbd_Cyrl', 'rus_Cyrl', tier=tier)
+            except QueueFull:
+                raise
+            except Exception as e:
+                pivots = [{'error': str(e)}] * len(rows)
+            failed = {}
+            for i, pivot in zip(rows, pivots):
+                if pivot.get('error'):
+                    failed[i] = pivot['error']
+                    continue
+                nllb_texts[i] = pivot['translation']
+                pivot_cached[i] = bool(pivot.get('cached'))
+            if failed:
+                # Sentences without a pivot fail for every target, the others go on
+                print(f"❌ Multi-target kbd→ru pivot failed for {len(failed)} chunk(s)")
+                for target in list(missing):
+                    for i in missing[target]:
+                        if i in failed:
+                            chunk_results[target][i] = self._error_response(
+                                f"Error: {failed[i]}", source_lang, target
+                            )
+                    missing[target] = [i for i in missing[target] if i not in failed]
+                    if not missing[target]:
+                        del missing[target]
+                if not missing:
+                    return chunk_results
+            nllb_source = 'rus_Cyrl'
+            model_name = "cascade_kbd→ru→target"
+        
+        if not self.nllb_service._check_nllb_available():
+            fail(missing, "NLLB-200 model not available")
+            return chunk_results
+        
+        # A Kabardian target is reached through the ru output of the same encoder pass
+        kbd_rows = missing.pop('kbd_Cyrl', None)
+        nllb_rows = {self._convert_lang_code(t): rows for t, rows in missing.items()}
+        if kbd_rows:
+            ru_rows = set(nllb_rows.get('rus_Cyrl', [])) | set(kbd_rows)
+            nllb_rows['rus_Cyrl'] = sorted(ru_rows)
+        
+        print(f"🌐 NLLB-200 multi-target: {self._convert_lang_code(nllb_source)}→{list(nllb_rows)}")
+        try:
+            decoded = self.nllb_service.generate_multi(
+                nllb_texts, self._convert_lang_code(nllb_source), nllb_rows,
+                self._tiered(self.NLLB_PRESET, tier)
+            )
+        except QueueFull:
+            raise
+        except Exception as e:
+            print(f"❌ NLLB-200 multi-target error: {e}")
+            if kbd_rows:
+                missing['kbd_Cyrl'] = kbd_rows
+            fail(missing, f"Error: {str(e)}")
+            return chunk_results
+        # Each chunk result gets its share of the batch, not the whole batch time
+        elapsed = round((time.time() - start_time) * 1000, 2)
+        decoded_count = sum(len(rows) for rows in missing.values()) + len(kbd_rows or [])
+        share = round(elapsed / decoded_count, 2)
+        
+        for target, rows in missing.items():
+            target_decoded = decoded[self._convert_lang_code(target)]
+            for i in rows:
+                result = self._multi_chunk_result(
+                    sentences[i], target_decoded.get(i), source_lang, target, model_name, share
+                )
+                if i in pivot_cached:
+                    result['pivot_translation'] = nllb_texts[i]
+                    result['pivot_cached'] = pivot_cached[i]
+                chunk_results[target][i] = result
+        
+        if kbd_rows:
+            ru_texts = [decoded['rus_Cyrl'].get(i) or '' for i in kbd_rows]
+            try:
+                kbd_results = self._translate_cached(ru_texts, 'rus_Cyrl', 'kbd_Cyrl', tier=tier)
+            except QueueFull:
+                raise
+            except Exception as e:
+                print(f"❌ Multi-target ru→kbd error: {e}")
+                kbd_results = [{'error': str(e)}] * len(kbd_rows)
+            for i, result in zip(kbd_rows, kbd_results):
+                if result.get('error'):
+                    chunk_results['kbd_Cyrl'][i] = self._error_response(
+                        f"Error: {result['error']}", source_lang, 'kbd_Cyrl'
+                    )
+                    continue
+                chunk_results['kbd_Cyrl'][i] = self._multi_chunk_result(
+                    sentences[i], result['translation'], source_lang, 'kbd_Cyrl', "cascade_source→ru→kbd",
+                    round(share + result.get('time_ms', 0), 2)
+                )
+        
+        # Store fresh NLLB-200 results under the same keys translate() uses
+        if use_keys:
+            fresh = dict(missing)
+            if kbd_rows:
+                fresh['kbd_Cyrl'] = kbd_rows
+            for target, rows in fresh.items():
+                for i in rows:
+                    result = chunk_results[target][i]
+                    if not result.get('error'):
+                        self._store_cached(self._cache_key(sentences[i], source_lang, target, tier), result)
+        
+        return chunk_results
+    
+    def _multi_chunk_result(self, sentence, translation, source_lang, target_lang, model_name, time_ms):
+        """Chunk result in the NLLB-200 service format"""
+        if not translation:
+            return self._error_response("Failed to translate", source_lang, target_lang)
+        
+        filtered_translation = self._filter_latin_words(translation, target_lang)
+        return {
+            'translation': filtered_translation,
+            'direction': f"{source_lang}→{target_lang}",
+            'source_lang': source_lang,
+            'target_lang': target_lang,
+            'time_ms': time_ms,
+            'original_length': len(sentence),
+            'translation_length': len(filtered_translation),
+            'model_used': model_name,
+            'cascade': model_name.startswith('cascade'),
+            'error': None
+        }
+    
+    def _assemble_response(self, text, chunk_results, source_lang, target_lang, start_time, separators=None):
+        """
+        Join translated chunks into the final response (or return the first chunk error).
+        `separators` is the source whitespace after each chunk (default: single spaces).
+        """
+        translated_sentences = []
+        total_chunk_time = 0
+        cascade_used = False
+        model_used = None
+        
+        for i, chunk_result in enumerate(chunk_results, 1):
+            if chunk_result.get('error'):
+                return chunk_result
+            
+            translated_sentences.append(chunk_result['translation'])
+            total_chunk_time += chunk_result['time_ms']
+            
+            if chunk_result.get('cascade'):
+                cascade_used = True
+            
+            if model_used is None:
+                model_used = chunk_result.get('model_used', 'unknown')
+            
+            print(f"  ✅ Chunk {i} done: '{chunk_result['translation'][:50]}...' ({chunk_result['time_ms']}ms)")
+        
+        # Combine all translated chunks with the spacing of the source
+        if separators is None:
+            separators = [' '] * len(translated_sentences)
+        final_translation = ''.join(
+            translation + separator for translation, separator in zip(translated_sentences, separators)
+        ).strip()
+        filtered_translation = self._filter_latin_words(final_translation, target_lang)
+        total_time = round((time.time() - start_time) * 1000, 2)
+        
+        total_chunk_time = round(total_chunk_time, 2)
+        
+        print(f"\n✅ All chunks translated in {total_time}ms (processing: {total_chunk_time}ms)")
+        print(f"   Final: '{filtered_translation[:100]}...'")
+        
+        response = {
+            'translation': filtered_translation,
+            'direction': f"{source_lang}→{target_lang}",
+            'source_lang': source_lang,
+            'target_lang': target_lang,
+            'time_ms': total_time,
+            'original_length': len(text),
+            'translation_length': len(filtered_translation),
+            'model_used': model_used,
+            'cascade': cascade_used,
+            'chunks_count': len(chunk_results),
+            'cached_chunks': sum(1 for r in chunk_results if r.get('cached')),
+            'error': None
+        }
+        
+        # kbd→X cascades: report whether the ru pivot was reused (a fully
+        # cached sentence needed no pivot decode either)
+        pivot_flags = [
+            bool(r.get('cached') or r.get('pivot_cached'))
+            for r in chunk_results if 'pivot_cached' in r
+        ]
+        if pivot_flags:
+            response['pivot_from_cache'] = all(pivot_flags)
+            response['pivot_cache_hits'] = sum(pivot_flags)
+        
+        return response
+    
+    def _is_marian_pair(self, source_lang, target_lang):
+        """MarianMT is used ONLY for direct kbd↔ru"""
+        return (source_lang == 'rus_Cyrl' and target_lang == 'kbd_Cyrl') or \
+               (source_lang == 'kbd_Cyrl' and target_lang == 'rus_Cyrl')
+    
+    def _translate_cached(self, sentences, source_lang, target_lang, use_scheduler=True, tier=None):
+        """
+        Translate sentences, serving repeats from the sentence cache.
+        Only cache misses reach the models: they are decoded together (one
+        batched generate() per model), sharing the batch with concurrent
+        requests when micro-batching is on. Nested calls made while a batch
+        is already running (cascade pivots) must pass use_scheduler=False.
+        """
+        results = [None] * len(sentences)
+        misses = {}
+        use_keys = self._cache is not None or self._memory is not None
+        
+        for i, sentence in enumerate(sentences):
+            key = self._cache_key(sentence, source_lang, target_lang, tier) if use_keys else i
+            cached = self._lookup_cached(key) if use_keys else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                # Identical sentences within one request are decoded once
+                misses.setdefault(key, []).append(i)
+        
+        if use_keys and len(misses) < len(sentences):
+            print(f"🗃️ Cache: {len(sentences) - sum(len(v) for v in misses.values())}/{len(sentences)} sentence(s) reused")
+        
+        if not misses:
+            return results
+        
+        keys = list(misses)
+        to_translate = [sentences[misses[key][0]] for key in keys]
+        
+        check_cancelled()
+        if self._batch_scheduler and use_scheduler:
+            translated = self._batch_scheduler.translate(
+                self._batch_key(source_lang, target_lang, tier), to_translate
+            )
+        else:
+            translated = self._translate_chunks(to_translate, source_lang, target_lang, tier)
+        
+        for key, result in zip(keys, translated):
+            if use_keys and not result.get('error'):
+                self._store_cached(key, result)
+            for i in misses[key]:
+                results[i] = result
+        
+        return results
+    
+    def _lookup_cached(self, key):
+        """Look a sentence up in the in-process cache, then in the translation memory"""
+        if self._cache:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return dict(cached, time_ms=0, cached=True, cache_layer='lru')
         
+        if self._memory:
+            stored = self._memory.get(key)
+            if stored is not None:
+                if self._cache:
+                    self._cache.put(key, stored)
+                return dict(stored, time_ms=0, cached=True, cache_layer='translation_memory')
+        
+        return None
+    
+    def _store_cached(self, key, result):
+        """Write a fresh sentence translation through both cache layers"""
+        if self._cache:
+            self._cache.put(key, result)
+        if self._memory:
+            self._memory.put(key, result)
+    
+    def _translate_chunks(self, chunks, source_lang, target_lang, tier=None):
+        """Translate chunks (sentences) in batched generate() calls, results in chunk order"""
         try:
-            # Use MarianMT ONLY for direct kbd↔ru
-            if (source_lang == 'rus_Cyrl' and target_lang == 'kbd_Cyrl') or \
-               (source_lang == 'kbd_Cyrl' and target_lang == 'rus_Cyrl'):
-                print("🎯 Using MarianMT (with presets)")
+            if self._is_marian_pair(source_lang, target_lang):
+                print(f"🎯 Using MarianMT (with presets), batch of {len(chunks)}")
+                preset = self._preset_for(source_lang, target_lang, tier)
                 if source_lang == 'rus_Cyrl':
-                    result = self.marian_service.translate_ru_to_kbd(text)
+                    results = self.marian_service.translate_ru_to_kbd_batch(chunks, preset)
                 else:
-                    result = self.marian_service.translate_kbd_to_ru(text)
+                    results = self.marian_service.translate_kbd_to_ru_batch(chunks, preset)
                 
-                if result['success']:
-                    return {
-                        'translation': result['translation'],
-                        'time_ms': result['time_ms'],
-                        'model_used': result.get('model', 'marian'),
-                        'preset': result.get('preset'),
-                        'error': None
-                    }
-                else:
-                    return {
-                        'translation': '',
-                        'time_ms': 0,
-                        'error': result.get('error', 'Unknown error')
-                    }
+                chunk_results = []
+                for result in results:
+                    if result['success']:
+                        chunk_results.append({
+                            'translation': result['translation'],
+                            'time_ms': result['time_ms'],
+                            'model_used': result.get('model', 'marian'),
+                            'preset': result.get('preset'),
+                            'error': None
+                        })
+                    else:
+                        chunk_results.append({
+                            'translation': '',
+                            'time_ms': 0,
+                            'error': result.get('error', 'Unknown error')
+                        })
+                return chunk_results
             
             # ALL other translations use NLLB-200
-            print(f"🌐 Using NLLB-200 (default params)")
-            result = self.nllb_service.translate(text, source_lang, target_lang)
-            return result
-                
+            print(f"🌐 Using NLLB-200 [{tier or self.default_tier}], batch of {len(chunks)}")
+            return self.nllb_service.translate_batch(chunks, source_lang, target_lang, tier)
+        
+        except QueueFull:
+            raise
         except Exception as e:
             print(f"❌ Chunk translation error: {e}")
-            return {
+            return [{
                 'translation': '',
                 'time_ms': 0,
                 'error': str(e)
-            }
+            } for _ in chunks]
     
+    def preload(self, warmup=True):
+        """
+        Load the translation models now instead of on the first request and,
+        optionally, run a few warmup generations per direction (bypassing the
+        cache). Returns load and warmup timings per model; a failed warmup
+        translation is reported as the model's 'warmup_error'.
+        """
+        steps = [
+            ('marian_ru_kbd', lambda: self.marian_service.load('ru_kbd'), 'rus_Cyrl', 'kbd_Cyrl'),
+            ('marian_kbd_ru', lambda: self.marian_service.load('kbd_ru'), 'kbd_Cyrl', 'rus_Cyrl'),
+        ]
+        if self.nllb_service._check_nllb_available():
+            steps.append(('nllb200', self.nllb_service._ensure_base_model, 'rus_Cyrl', 'eng_Latn'))
+        else:
+            print("⚠️ NLLB-200 not downloaded, skipping its preload")
+        
+        timings = {}
+        for name, load, source_lang, target_lang in steps:
+            start = time.time()
+            load()
+            timing = {'load_seconds': round(time.time() - start, 2)}
+            
+            if warmup:
+                start = time.time()
+                for _ in range(self.WARMUP_ROUNDS):
+                    results = self._translate_chunks(self.WARMUP_TEXTS[source_lang], source_lang, target_lang)
+                    errors = sorted({r['error'] for r in results if r.get('error')})
+                    if errors:
+                        timing['warmup_error'] = '; '.join(errors)
+                        print(f"⚠️ Warmup of {name} failed: {timing['warmup_error']}")
+                        break
+                timing['warmup_seconds'] = round(time.time() - start, 2)
+            
+            print(f"🔥 Preloaded {name}: load {timing['load_seconds']}s, "
+                  f"warmup {timing.get('warmup_seconds', '-')}s")
+            timings[name] = timing
+        
+        return timings
+
     def get_supported_languages(self):
         """Returns list of supported languages"""
         return self.supported_languages
@@ -801,18 +2350,74 @@ class TranslationService:
         except:
             pass
         
-        return {
-            'status': 'healthy',
+        # Reloads after eviction keep serving other requests: report them only
+        loading = self.registry.loading()
+        health = {
+            'status': 'loading' if loading['first'] else 'healthy',
+            'models_loading': loading,
             'device': self.device,
             'marian_available': self._marian_service is not None,
             'nllb_available': nllb_available,
             'supported_languages_count': len(self.get_flat_languages()),
             'features': {
                 'sentence_chunking': True,
+                'batched_generation': True,
+                'max_batch_size': self.MAX_BATCH_SIZE,
                 'translation_presets_ru_kbd': list(self.TRANSLATION_PRESETS.keys()),
-                'cascade_translation': True
+                'cascade_translation': True,
+                'micro_batching': self._batch_scheduler is not None,
+                'sentence_cache': self._cache is not None,
+                'multi_target_translation': True,
+                'quality_tiers': list(self.TIER_ORDER)
             }
         }
+        
+        with self._in_flight_lock:
+            health['quality'] = {
+                'default_tier': self.default_tier,
+                'downgrade_threshold': self.downgrade_threshold,
+                'in_flight': self._in_flight,
+                'requests_by_tier': dict(self._tier_stats['requests']),
+                'downgrades': self._tier_stats['downgrades'],
+            }
+        
+        if self._batch_scheduler:
+            health['micro_batching'] = self._batch_scheduler.get_stats()
+        
+        health['cache'] = self._cache.get_stats() if self._cache else {'enabled': False}
+        
+        # Active precision and memory saved per loaded model
+        precision_stats = {}
+        for service in (self._marian_service, self._nllb_service):
+            if service:
+                precision_stats.update(service.precision_stats)
+        health['backends'] = {
+            name: self.backends.get(name, 'torch') for name in ('marian_ru_kbd', 'marian_kbd_ru', 'nllb200')
+        }
+        health['precision'] = {
+            'requested': self.precision,
+            'models': precision_stats,
+            'saved_mb': round(sum(m['saved_mb'] for m in precision_stats.values()), 1)
+        }
+        health['translation_memory'] = self._memory.get_stats() if self._memory else {'enabled': False}
+        with self._shortlist_lock:
+            shortlist = dict(self._shortlist_stats)
+        sentences = shortlist.pop('sentences')
+        batches = shortlist['batches']
+        health['nllb_shortlist'] = {
+            'enabled': self.nllb_shortlist,
+            'min_score': self.shortlist_min_score,
+            'sentences': sentences,
+            'fallbacks': shortlist['fallbacks'],
+            'fallback_rate': round(shortlist['fallbacks'] / sentences, 4) if sentences else 0.0,
+            'avg_shortlist_tokens': round(shortlist['shortlist_tokens'] / batches) if batches else 0,
+        }
+        health['inference_queue'] = self.executor.get_stats()
+        health['coalescing'] = self._coalescer.get_stats()
+        health['models'] = self.registry.status()
+        health['model_memory'] = self.registry.get_stats()
+        
+        return health
     
     def _empty_response(self, source_lang, target_lang):
         """Empty response"""
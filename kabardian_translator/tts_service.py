@@ -11,10 +11,15 @@ import tempfile
 import uuid
 import logging
 import re
+import time
 from threading import Lock
 from pathlib import Path
 import gc
 
+from .cancellation import check_cancelled
+from .inference_executor import InferenceExecutor, QueueFull
+from .model_registry import ModelRegistry
+
 # ИСПРАВЛЕННЫЙ ИМПОРТ
 try:
     from .transliterator import transliterator
@@ -28,15 +33,19 @@ logger = logging.getLogger(__name__)
 class TTSService:
     """Speech synthesis service with lazy model loading, transliteration and accentuation"""
     
-    def __init__(self, device='cpu'):
+    # Utterance synthesized by preload() to warm up the model
+    WARMUP_TEXT = "Добрый день"
+    
+    def __init__(self, device='cpu', executor=None, registry=None):
         self.device = torch.device(device)
+        self.executor = executor or InferenceExecutor()  # shared with translation in the app
+        self.registry = registry or ModelRegistry()
         self.sample_rate = 48000
-        self.model = None
         self.temp_dir = None
         self.file_lock = Lock()
         self.temp_files = set()
-        self._model_loaded = False
-        self.accentors = {}  # Cache for accentors
+        # Silero TTS and the accentors ('accentor_<lang_code>') live in the registry,
+        # which may evict them under its memory budget and reloads them on demand
         
         # Character mapping for Kabardian normalization
         self.kbd_normalization_map = {
@@ -212,9 +221,12 @@ class TTSService:
             logger.warning(f"No accentor code for language: {lang_code}")
             return None
         
-        if lang_code in self.accentors:
-            return self.accentors[lang_code]
-        
+        return self.registry.get(
+            f'accentor_{lang_code}', lambda: self._create_accentor(lang_code, accentor_code)
+        )
+    
+    def _create_accentor(self, lang_code, accentor_code):
+        """Load the accentor of a language; returns None if it is unavailable"""
         try:
             accentor = None
             
@@ -240,12 +252,10 @@ class TTSService:
                     logger.warning(f"⚠️ silero_stress simple_accentor module not found: {e}")
                     accentor = None
             
-            self.accentors[lang_code] = accentor
             return accentor
             
         except Exception as e:
             logger.error(f"❌ Error loading accentor for {lang_code} (code: {accentor_code}): {e}")
-            self.accentors[lang_code] = None
             return None
     
     def apply_accent(self, text, lang_code, use_accent=True):
@@ -353,23 +363,59 @@ class TTSService:
         return ssml
     
     def _load_model(self):
-        """Lazy loading of Silero TTS model"""
-        if self._model_loaded:
-            return
-        
+        """Lazy loading of Silero TTS model (once, even for concurrent first requests)"""
+        return self.registry.get('silero_tts', self._load_silero)
+    
+    def preload(self, warmup=True, lang_codes=('rus_Cyrl', 'kbd_Cyrl')):
+        """
+        Load Silero TTS and the accentors of `lang_codes` now instead of on the
+        first request and, optionally, synthesize a short utterance per language.
+        Returns timings per model; a failed warmup synthesis is reported as
+        'warmup_error'.
+        """
+        timings = {}
+        
+        start = time.time()
+        self._load_model()
+        timings['silero_tts'] = {'load_seconds': round(time.time() - start, 2)}
+        
+        for lang_code in lang_codes:
+            start = time.time()
+            self._load_accentor(lang_code)
+            timings[f'accentor_{lang_code}'] = {'load_seconds': round(time.time() - start, 2)}
+        
+        if warmup:
+            start = time.time()
+            for lang_code in lang_codes:
+                speaker = 'kbd_eduard' if lang_code == 'kbd_Cyrl' else 'ru_eduard'
+                result = self.synthesize(self.WARMUP_TEXT, speaker=speaker, lang_code=lang_code)
+                if result.get('success'):
+                    self.cleanup_file(result['path'])
+                else:
+                    error = result.get('error', 'Unknown error')
+                    timings['silero_tts']['warmup_error'] = error
+                    logger.warning(f"⚠️ Warmup of silero_tts ({lang_code}) failed: {error}")
+            timings['silero_tts']['warmup_seconds'] = round(time.time() - start, 2)
+        
+        for name, timing in timings.items():
+            logger.info(f"🔥 Preloaded {name}: load {timing['load_seconds']}s, "
+                        f"warmup {timing.get('warmup_seconds', '-')}s")
+        return timings
+    
+    def _load_silero(self):
         logger.info("📊 Loading Silero TTS model (on first use)...")
         
         try:
             model_id = 'v5_cis_base'
-            self.model, _ = torch.hub.load(
+            model, _ = torch.hub.load(
                 repo_or_dir='snakers4/silero-models',
                 model='silero_tts',
                 language='ru',
                 speaker=model_id
             )
-            self.model.to(self.device)
-            self._model_loaded = True
+            model.to(self.device)
             logger.info("✅ Silero TTS loaded successfully!")
+            return model
         except Exception as e:
             logger.error(f"❌ Error loading Silero TTS: {e}")
             raise
@@ -492,9 +538,8 @@ class TTSService:
         logger.info(f"🔊 TTS synthesis request: lang={lang_code}, speaker={speaker}, use_accent={use_accent}")
         logger.info(f"📝 Input text preview: '{text[:100]}...'")
         
-        # Lazy model loading on first use
-        if not self._model_loaded:
-            self._load_model()
+        # Lazy model loading on first use (and reload after eviction)
+        self._load_model()
         
         try:
             # Apply Kabardian normalization BEFORE any processing
@@ -548,18 +593,22 @@ class TTSService:
             logger.info(f"📝 Generated SSML (preview): {ssml_text[:200]}...")
             
             # Synthesis with torch.no_grad() for optimization
-            with torch.no_grad():
+            with torch.no_grad(), self.executor.use('silero_tts'), \
+                    self.registry.use('silero_tts', self._load_silero) as model:
                 # Move model to GPU if available for inference
                 if self.device.type == 'cuda':
-                    self.model.to(self.device)
+                    model.to(self.device)
                 
+                # apply_tts() cannot be interrupted: skip it if the request is gone
+                check_cancelled()
                 logger.info(f"🎙️ Synthesizing with speaker: {actual_speaker}")
-                audio = self.model.apply_tts(
+                audio = model.apply_tts(
                     ssml_text=ssml_text,
                     speaker=actual_speaker,
                     sample_rate=self.sample_rate
                 )
             
+            check_cancelled()
             audio_np = audio.cpu().numpy()
             
             # Save to temporary file
@@ -604,7 +653,9 @@ class TTSService:
             
             logger.info(f"✅ Synthesis successful: {duration:.2f}s, speaker: {actual_speaker}")
             return result
-            
+        
+        except QueueFull:
+            raise
         except Exception as e:
             logger.error(f"❌ Synthesis error: {e}", exc_info=True)
             return {
@@ -641,11 +692,12 @@ class TTSService:
         except Exception as e:
             logger.error(f"⚠️ Error deleting directory: {e}")
         
-        # Clean up model
-        if self.model:
-            del self.model
-            self.model = None
-            self._model_loaded = False
+        # Clean up model and accentors
+        if self.registry.peek('silero_tts') is not None:
+            self.registry.release('silero_tts')
+            for name in self.registry.status():
+                if name.startswith('accentor_'):
+                    self.registry.release(name)
             gc.collect()
             if torch.backends.mps.is_available():
                 torch.mps.empty_cache()
@@ -734,7 +786,7 @@ class TTSService:
             dict with accentor info
         """
         accentor_code = self._get_accentor_code(lang_code)
-        has_accentor = lang_code in self.accentors and self.accentors[lang_code] is not None
+        has_accentor = self.registry.peek(f'accentor_{lang_code}') is not None
         
         info = {
             'lang_code': lang_code,
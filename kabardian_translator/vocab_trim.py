@@ -0,0 +1,366 @@
+# vocab_trim.py
+# Vocabulary-trimmed NLLB-200 build restricted to the supported languages
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+# Directory (inside the models directory) of the trimmed build and its id mapping
+TRIMMED_SUBDIR = "nllb200_trimmed"
+VOCAB_MAP = "vocab_map.json"
+
+# Special-token ids stored in the model and generation configs
+CONFIG_TOKEN_IDS = (
+    'pad_token_id', 'bos_token_id', 'eos_token_id', 'unk_token_id',
+    'decoder_start_token_id', 'forced_bos_token_id', 'forced_eos_token_id',
+)
+
+
+def supported_nllb_languages():
+    """NLLB-200 codes of all languages the translation service offers"""
+    from .translation_service import TranslationService
+
+    return [code for languages in TranslationService.SUPPORTED_LANGUAGES.values() for code in languages]
+
+
+def read_corpus(corpus_dir, language, max_lines=None):
+    """Non-empty lines of corpus/<language>.txt (empty list if the file is missing)"""
+    path = Path(corpus_dir) / f"{language}.txt"
+    if not path.exists():
+        return []
+    lines = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                lines.append(line)
+                if max_lines and len(lines) >= max_lines:
+                    break
+    return lines
+
+
+class TrimmedTokenizer:
+    """
+    The original NLLB-200 tokenizer with ids remapped into the trimmed
+    vocabulary: encoding returns trimmed ids, decoding accepts them. Tokens
+    outside the trimmed vocabulary encode to <unk>. Everything else is
+    delegated to the wrapped tokenizer.
+    """
+
+    def __init__(self, tokenizer, kept_ids):
+        self.tokenizer = tokenizer
+        self.kept_ids = list(kept_ids)
+        self.old_to_new = {old: new for new, old in enumerate(self.kept_ids)}
+        self._unk_new = self.old_to_new[tokenizer.unk_token_id]
+        self._unk_old = tokenizer.unk_token_id
+
+    @classmethod
+    def from_pretrained(cls, path):
+        """Load a trimmed build's tokenizer and vocab_map.json"""
+        from transformers import AutoTokenizer
+
+        path = Path(path)
+        with open(path / VOCAB_MAP, encoding='utf-8') as f:
+            vocab_map = json.load(f)
+        tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
+        return cls(tokenizer, vocab_map['kept_ids'])
+
+    def __getattr__(self, name):
+        return getattr(self.tokenizer, name)
+
+    def __len__(self):
+        return len(self.kept_ids)
+
+    def _to_new(self, ids):
+        return [self.old_to_new.get(i, self._unk_new) for i in ids]
+
+    def _to_old(self, ids):
+        size = len(self.kept_ids)
+        return [self.kept_ids[i] if 0 <= i < size else self._unk_old for i in ids]
+
+    @property
+    def pad_token_id(self):
+        return self.old_to_new[self.tokenizer.pad_token_id]
+
+    @property
+    def eos_token_id(self):
+        return self.old_to_new[self.tokenizer.eos_token_id]
+
+    @property
+    def bos_token_id(self):
+        return self.old_to_new[self.tokenizer.bos_token_id]
+
+    @property
+    def unk_token_id(self):
+        return self._unk_new
+
+    def convert_tokens_to_ids(self, tokens):
+        ids = self.tokenizer.convert_tokens_to_ids(tokens)
+        if isinstance(ids, list):
+            return self._to_new(ids)
+        return self.old_to_new.get(ids, self._unk_new)
+
+    def __call__(self, texts, **kwargs):
+        encoded = self.tokenizer(texts, **kwargs)
+        ids = encoded['input_ids']
+        if hasattr(ids, 'tolist'):
+            mapped = [self._to_new(row) for row in ids.tolist()]
+            encoded['input_ids'] = torch.tensor(mapped, device=ids.device)
+        elif ids and isinstance(ids[0], list):
+            encoded['input_ids'] = [self._to_new(row) for row in ids]
+        else:
+            encoded['input_ids'] = self._to_new(ids)
+        return encoded
+
+    def decode(self, ids, **kwargs):
+        if hasattr(ids, 'tolist'):
+            ids = ids.tolist()
+        return self.tokenizer.decode(self._to_old(ids), **kwargs)
+
+    def batch_decode(self, sequences, **kwargs):
+        if hasattr(sequences, 'tolist'):
+            sequences = sequences.tolist()
+        rows = [row.tolist() if hasattr(row, 'tolist') else row for row in sequences]
+        return self.tokenizer.batch_decode([self._to_old(row) for row in rows], **kwargs)
+
+
+def collect_vocabulary(tokenizer, corpus_dir, languages):
+    """
+    Ids to keep: special tokens, the language tokens of `languages` and every
+    token observed when tokenizing corpus/<language>.txt.
+
+    Returns:
+        (sorted kept ids, {language: sentences read})
+    """
+    kept = set(tokenizer.all_special_ids)
+    kept.add(tokenizer.unk_token_id)
+    counts = {}
+    for language in languages:
+        kept.add(tokenizer.convert_tokens_to_ids(language))
+        lines = read_corpus(corpus_dir, language)
+        counts[language] = len(lines)
+        if not lines:
+            print(f"⚠️ No corpus for {language} ({Path(corpus_dir) / f'{language}.txt'}), "
+                  "only its language token is kept")
+            continue
+        for start in range(0, len(lines), 256):
+            for ids in tokenizer(lines[start:start + 256], add_special_tokens=False)['input_ids']:
+                kept.update(ids)
+    return sorted(kept), counts
+
+
+def _trim_model(model, kept_ids):
+    """Keep only the embedding / output projection rows of kept_ids (in place)"""
+    index = torch.tensor(kept_ids, dtype=torch.long)
+    old_to_new = {old: new for new, old in enumerate(kept_ids)}
+
+    shared = model.get_input_embeddings()
+    shared.weight = torch.nn.Parameter(shared.weight.data.index_select(0, index).clone())
+    shared.num_embeddings = len(kept_ids)
+    if shared.padding_idx is not None:
+        shared.padding_idx = old_to_new[shared.padding_idx]
+    # Re-points the encoder and decoder embeddings at the trimmed table
+    model.set_input_embeddings(shared)
+
+    output = model.get_output_embeddings()
+    output.weight = shared.weight if model.config.tie_word_embeddings else torch.nn.Parameter(
+        output.weight.data.index_select(0, index).clone()
+    )
+    output.out_features = len(kept_ids)
+    if getattr(model, 'final_logits_bias', None) is not None:
+        model.final_logits_bias = model.final_logits_bias.index_select(1, index).clone()
+
+    model.config.vocab_size = len(kept_ids)
+    for config in (model.config, getattr(model, 'generation_config', None)):
+        if config is None:
+            continue
+        for name in CONFIG_TOKEN_IDS:
+            value = getattr(config, name, None)
+            if isinstance(value, int):
+                setattr(config, name, old_to_new[value])
+
+
+def build_trimmed_nllb(model_dir, output_dir, corpus_dir, languages=None):
+    """
+    Build a vocabulary-trimmed copy of NLLB-200 (offline).
+
+    Args:
+        model_dir: downloaded NLLB-200 directory (models/nllb200)
+        output_dir: where to write the trimmed build (models/nllb200_trimmed)
+        corpus_dir: directory with one <nllb_code>.txt file per language
+        languages: NLLB codes to keep (default: all supported languages)
+
+    Returns:
+        dict: the vocab map written next to the model
+    """
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    model_dir, output_dir = Path(model_dir), Path(output_dir)
+    if not (model_dir / "config.json").exists():
+        raise RuntimeError(f"NLLB-200 not found in {model_dir}")
+    languages = languages or supported_nllb_languages()
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+    kept_ids, counts = collect_vocabulary(tokenizer, corpus_dir, languages)
+    original_size = len(tokenizer)
+    print(f"📚 Keeping {len(kept_ids)} of {original_size} tokens "
+          f"({sum(counts.values())} corpus sentences, {len(languages)} languages)")
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(
+        model_dir, dtype=torch.float32, low_cpu_mem_usage=True, local_files_only=True
+    )
+    params_before = sum(p.numel() for p in model.parameters())
+    _trim_model(model, kept_ids)
+    params_after = sum(p.numel() for p in model.parameters())
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model.save_pretrained(output_dir, safe_serialization=True)
+    tokenizer.save_pretrained(output_dir)
+
+    vocab_map = {
+        'source': str(model_dir),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'languages': list(languages),
+        'corpus_sentences': counts,
+        'original_vocab_size': original_size,
+        'vocab_size': len(kept_ids),
+        'kept_ids': kept_ids,
+    }
+    with open(output_dir / VOCAB_MAP, 'w', encoding='utf-8') as f:
+        json.dump(vocab_map, f)
+
+    print(f"✅ Trimmed NLLB-200 written to {output_dir}: "
+          f"{params_before / 1e6:.0f}M → {params_after / 1e6:.0f}M parameters")
+    return vocab_map
+
+
+def verify_trimmed_nllb(models_dir, corpus_dir, languages=None, max_sentences=50, tier="fast"):
+    """
+    Translate corpus sentences of every language (into English, English into
+    Russian) with the full and the trimmed NLLB-200 through the translation
+    service and compare the outputs.
+
+    Returns:
+        dict: {'pairs': {pair: {'sentences', 'identical', 'coverage'}}, 'match_rate': float}
+    """
+    from .model_registry import ModelRegistry
+    from .translation_service import TranslationService
+
+    languages = languages or supported_nllb_languages()
+    samples = {}
+    for language in languages:
+        lines = read_corpus(corpus_dir, language, max_sentences)
+        if lines:
+            samples[(language, 'rus_Cyrl' if language == 'eng_Latn' else 'eng_Latn')] = lines
+    if not samples:
+        raise RuntimeError(f"No corpus files found in {corpus_dir}")
+
+    outputs = {}
+    for trimmed in (False, True):
+        service = TranslationService('cpu', models_dir=models_dir, cache_size=0, registry=ModelRegistry())
+        service.configure_nllb_vocabulary(trimmed)
+        preset = service._tiered(service.NLLB_PRESET, tier)
+        outputs[trimmed] = {
+            pair: service.nllb_service._generate(lines, pair[0], pair[1], preset)
+            for pair, lines in samples.items()
+        }
+        if trimmed:
+            tokenizer = service.nllb_service.get_tokenizer()
+        service.cleanup()
+
+    report = {'pairs': {}}
+    identical_total = 0
+    for pair, lines in samples.items():
+        identical = sum(a == b for a, b in zip(outputs[False][pair], outputs[True][pair]))
+        identical_total += identical
+        # Share of source tokens inside the trimmed vocabulary (below 1.0 for held-out text)
+        ids = [i for row in tokenizer(lines, add_special_tokens=False)['input_ids'] for i in row]
+        coverage = sum(i != tokenizer.unk_token_id for i in ids) / max(len(ids), 1)
+        report['pairs'][f"{pair[0]}→{pair[1]}"] = {
+            'sentences': len(lines),
+            'identical': identical,
+            'coverage': round(coverage, 4),
+        }
+        for a, b in zip(outputs[False][pair], outputs[True][pair]):
+            if a != b:
+                print(f"   ≠ {pair[0]}→{pair[1]}\n     full:    {a}\n     trimmed: {b}")
+                break
+    report['match_rate'] = round(identical_total / sum(len(v) for v in samples.values()), 4)
+    return report
+
+
+def main():
+    """CLI for building and verifying the vocabulary-trimmed NLLB-200"""
+    parser = argparse.ArgumentParser(
+        description="Build a vocabulary-trimmed NLLB-200 for the languages Kabardian Translator supports",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+The corpus directory holds one file per language named by its NLLB code
+(corpus/rus_Cyrl.txt, corpus/eng_Latn.txt, ...), one sentence per line.
+
+Examples:
+  kabardian-trim-nllb build  --corpus corpus
+  kabardian-trim-nllb verify --corpus corpus_heldout --max-sentences 100
+  kabardian-translator --nllb-trimmed-vocab
+  kabardian-trim-nllb shortlists --corpus corpus --coverage 0.999
+  kabardian-translator --nllb-shortlist
+        """
+    )
+    parser.add_argument("command", choices=["build", "verify", "shortlists"],
+                       help="build the trimmed model, compare it with the full one, or build "
+                            "per-target-language decoding shortlists (models/nllb200/shortlists.json)")
+    parser.add_argument("--models-dir", default="models",
+                       help="Models directory (default: models)")
+    parser.add_argument("--corpus", default="corpus",
+                       help="Directory with <nllb_code>.txt files (default: corpus)")
+    parser.add_argument("--languages", nargs="+",
+                       help="NLLB codes to keep (default: all supported languages)")
+    parser.add_argument("--max-sentences", type=int, default=50,
+                       help="verify: sentences per language (default: 50)")
+    parser.add_argument("--tier", choices=["fast", "balanced", "best"], default="fast",
+                       help="verify: quality tier to decode with (default: fast = greedy)")
+    parser.add_argument("--min-match", type=float, default=1.0,
+                       help="verify: fail below this share of identical translations (default: 1.0)")
+    parser.add_argument("--coverage", type=float, default=1.0,
+                       help="shortlists: keep the most frequent tokens covering this share of the "
+                            "target-language corpus (default: 1.0, every observed token)")
+
+    args = parser.parse_args()
+    models_dir = Path(args.models_dir)
+
+    if args.command == "build":
+        build_trimmed_nllb(models_dir / "nllb200", models_dir / TRIMMED_SUBDIR, args.corpus, args.languages)
+        return
+
+    if args.command == "shortlists":
+        from .shortlist import build_shortlists
+
+        build_shortlists(
+            models_dir / "nllb200", args.corpus, args.languages or supported_nllb_languages(), args.coverage
+        )
+        return
+
+    if not (models_dir / TRIMMED_SUBDIR / VOCAB_MAP).exists():
+        print(f"❌ Trimmed model not found in {models_dir / TRIMMED_SUBDIR}, run 'build' first")
+        sys.exit(1)
+
+    report = verify_trimmed_nllb(models_dir, args.corpus, args.languages, args.max_sentences, args.tier)
+    print(f"📊 Full vs trimmed NLLB-200 ({args.tier}):")
+    for pair, result in report['pairs'].items():
+        print(f"   {pair:<22} {result['identical']:>4}/{result['sentences']:<4} identical, "
+              f"vocabulary coverage {result['coverage']:.2%}")
+    print(f"   Match rate: {report['match_rate']:.2%}")
+    if report['match_rate'] < args.min_match:
+        print(f"❌ Below the required {args.min_match:.2%}")
+        sys.exit(1)
+    print("✅ Trimmed model is equivalent on this corpus")
+
+
+if __name__ == "__main__":
+    main()
@@ -66,7 +66,7 @@ setup(
         
         # Machine learning core
         "torch>=2.1.0",
-        "transformers>=4.37.0,<5.0.0",
+        "transformers>=4.56.0,<5.0.0",
         "sentencepiece>=0.1.99",
         
         # Optimization for Apple Silicon / CUDA
@@ -93,6 +93,8 @@ setup(
             "kabardian-translator=kabardian_translator.cli:main",
             "kabardian-download-models=kabardian_translator.download_models:main",
             "kabardian-translate=kabardian_translator.cli:translate_cli",
+            "kabardian-translation-memory=kabardian_translator.translation_memory:main",
+            "kabardian-trim-nllb=kabardian_translator.vocab_trim:main",
         ],
     },
     include_package_data=True,
@@ -128,6 +130,9 @@ setup(
             'mypy>=1.7.0',
             'pytest-cov>=4.1.0',
         ],
+        'onnx': [
+            'optimum[onnxruntime]>=1.16.0',
+        ],
         'gui': [
             'gradio>=4.0.0',
             'ipywidgets>=8.0.0',
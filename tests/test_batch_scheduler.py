@@ -0,0 +1,127 @@
+# test_batch_scheduler.py
+# Tests for cross-request micro-batching
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import threading
+
+import pytest
+
+from kabardian_translator.batch_scheduler import MicroBatchScheduler
+from kabardian_translator.cancellation import (
+    CancellationToken, Cancelled, cancellation_scope, current_token,
+)
+
+
+class RecordingBatch:
+    """run_batch stand-in recording each call and upper-casing the sentences"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, key, sentences):
+        self.calls.append((key, list(sentences)))
+        return [s.upper() for s in sentences]
+
+
+def test_requests_with_the_same_key_share_a_batch():
+    run_batch = RecordingBatch()
+    scheduler = MicroBatchScheduler(run_batch, window_ms=100)
+
+    first = scheduler.submit('ru→kbd', ['a', 'b'])
+    second = scheduler.submit('ru→kbd', ['c'])
+    other = scheduler.submit('kbd→ru', ['d'])
+
+    assert first.result(timeout=2) == ['A', 'B']
+    assert second.result(timeout=2) == ['C']
+    assert other.result(timeout=2) == ['D']
+    assert sorted(run_batch.calls) == [('kbd→ru', ['d']), ('ru→kbd', ['a', 'b', 'c'])]
+    assert scheduler.get_stats()['max_requests_per_batch'] == 2
+
+
+def test_token_budget_dispatches_before_the_window():
+    run_batch = RecordingBatch()
+    scheduler = MicroBatchScheduler(run_batch, window_ms=60000, max_batch_tokens=4)
+
+    future = scheduler.submit('key', ['one two three four'])
+    assert future.result(timeout=2) == ['ONE TWO THREE FOUR']
+
+
+def test_empty_submission_resolves_immediately():
+    scheduler = MicroBatchScheduler(RecordingBatch())
+    assert scheduler.submit('key', []).result(timeout=0) == []
+
+
+def test_request_cancelled_while_queued_is_dropped():
+    run_batch = RecordingBatch()
+    scheduler = MicroBatchScheduler(run_batch, window_ms=100)
+    token = CancellationToken()
+
+    with cancellation_scope(token):
+        cancelled = scheduler.submit('key', ['gone'])
+    kept = scheduler.submit('key', ['kept'])
+    token.cancel('client disconnected')
+
+    assert kept.result(timeout=2) == ['KEPT']
+    with pytest.raises(Cancelled) as info:
+        cancelled.result(timeout=2)
+    assert str(info.value) == 'client disconnected'
+    assert run_batch.calls == [('key', ['kept'])]
+    assert scheduler.get_stats()['cancelled_requests'] == 1
+
+
+def test_running_batch_stops_only_when_every_request_is_cancelled():
+    started = threading.Event()
+
+    def run_batch(key, sentences):
+        started.set()
+        token = current_token()
+        assert token.wait(timeout=2)
+        token.check()
+
+    scheduler = MicroBatchScheduler(run_batch, window_ms=50)
+    first, second = CancellationToken(), CancellationToken()
+    with cancellation_scope(first):
+        first_future = scheduler.submit('key', ['a'])
+    with cancellation_scope(second):
+        second_future = scheduler.submit('key', ['b'])
+
+    assert started.wait(timeout=2)
+    first.cancel('superseded')
+    assert not second_future.done()
+    second.cancel('client disconnected')
+
+    for future, reason in ((first_future, 'superseded'), (second_future, 'client disconnected')):
+        with pytest.raises(Cancelled) as info:
+            future.result(timeout=2)
+        assert str(info.value) == reason
+
+
+def test_batch_error_reaches_every_request():
+    def run_batch(key, sentences):
+        raise RuntimeError("model not available")
+
+    scheduler = MicroBatchScheduler(run_batch, window_ms=50)
+    futures = [scheduler.submit('key', ['a']), scheduler.submit('key', ['b'])]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model not available"):
+            future.result(timeout=2)
+
+
+def test_slow_batch_does_not_hold_up_other_keys():
+    release = threading.Event()
+
+    def run_batch(key, sentences):
+        if key == 'nllb':
+            release.wait(timeout=2)
+        return sentences
+
+    scheduler = MicroBatchScheduler(run_batch, window_ms=10)
+    slow = scheduler.submit('nllb', ['long'])
+    fast = scheduler.submit('marian', ['short'])
+    try:
+        assert fast.result(timeout=1) == ['short']
+        assert not slow.done()
+    finally:
+        release.set()
+    assert slow.result(timeout=2) == ['long']
@@ -0,0 +1,119 @@
+# test_cancellation.py
+# Tests for cooperative request cancellation
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import socket
+import threading
+
+import pytest
+
+from kabardian_translator.cancellation import (
+    ActiveRequests, CancellationToken, Cancelled, cancellation_scope, check_cancelled,
+    current_token, watch_disconnect,
+)
+
+
+def test_check_raises_with_reason():
+    token = CancellationToken()
+    token.check()
+    token.cancel('superseded')
+    token.cancel('client disconnected')  # idempotent: the first reason wins
+    with pytest.raises(Cancelled) as info:
+        token.check()
+    assert str(info.value) == 'superseded'
+    assert token.reason == 'superseded'
+
+
+def test_on_cancel_runs_once_even_when_already_cancelled():
+    token = CancellationToken()
+    calls = []
+    token.on_cancel(lambda: calls.append('before'))
+    token.cancel()
+    token.cancel()
+    token.on_cancel(lambda: calls.append('after'))
+    assert calls == ['before', 'after']
+
+
+def test_scope_is_per_thread_and_restored():
+    outer, inner = CancellationToken(), CancellationToken()
+    seen = []
+    with cancellation_scope(outer):
+        with cancellation_scope(inner):
+            assert current_token() is inner
+            thread = threading.Thread(target=lambda: seen.append(current_token()))
+            thread.start()
+            thread.join()
+        assert current_token() is outer
+        outer.cancel()
+        with pytest.raises(Cancelled):
+            check_cancelled()
+    assert current_token() is None
+    assert seen == [None]
+    check_cancelled()
+
+
+def test_all_of_waits_for_every_participant():
+    first, second = CancellationToken(), CancellationToken()
+    combined = CancellationToken.all_of([first, second])
+
+    first.cancel('superseded')
+    assert not combined.cancelled
+    second.cancel('client disconnected')
+    assert combined.cancelled
+    assert combined.reason == 'client disconnected'
+
+
+def test_all_of_special_cases():
+    token = CancellationToken()
+    assert CancellationToken.all_of([token]) is token
+    assert CancellationToken.all_of([token, None]) is None
+    assert CancellationToken.all_of([]) is None
+
+
+def test_active_requests_supersede_same_client():
+    active = ActiveRequests()
+    first, second = CancellationToken(), CancellationToken()
+    active.begin(first, client_key=('translate', 'abc'))
+    active.begin(second, client_key=('translate', 'abc'))
+    assert first.reason == 'superseded'
+    assert not second.cancelled
+
+    active.end(first, client_key=('translate', 'abc'))
+    active.end(second, client_key=('translate', 'abc'))
+    assert active.get_stats() == {'running': 0, 'cancelled': {'superseded': 1}}
+
+
+def test_watch_disconnect_cancels_when_peer_closes():
+    server, client = socket.socketpair()
+    token, done = CancellationToken(), threading.Event()
+    try:
+        thread = watch_disconnect(server, token, done, interval=0.01)
+        client.close()
+        thread.join(timeout=2)
+        assert token.cancelled
+        assert token.reason == 'client disconnected'
+    finally:
+        done.set()
+        server.close()
+
+
+def test_watch_disconnect_ignores_pending_data_and_stops_when_done():
+    server, client = socket.socketpair()
+    token, done = CancellationToken(), threading.Event()
+    try:
+        client.sendall(b'x')
+        thread = watch_disconnect(server, token, done, interval=0.01)
+        thread.join(timeout=2)
+        assert not token.cancelled
+        # The peeked byte is still there for the server to read
+        assert server.recv(1) == b'x'
+
+        done.set()
+        thread = watch_disconnect(server, token, done, interval=0.01)
+        thread.join(timeout=2)
+        assert not thread.is_alive()
+        assert not token.cancelled
+    finally:
+        server.close()
+        client.close()
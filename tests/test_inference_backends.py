@@ -0,0 +1,40 @@
+# test_inference_backends.py
+# Tests for optimized serving variants (tiny random models, no downloads)
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import torch
+from transformers import MarianConfig, MarianMTModel
+
+from kabardian_translator.inference_backends import TorchBackend, load_variant_manifest, optimize_model
+
+
+def tiny_marian(model_dir):
+    """Save a tiny random MarianMT model with non-default generation settings"""
+    torch.manual_seed(0)
+    config = MarianConfig(
+        vocab_size=64, d_model=16, encoder_layers=1, decoder_layers=1,
+        encoder_attention_heads=2, decoder_attention_heads=2,
+        encoder_ffn_dim=32, decoder_ffn_dim=32, pad_token_id=63,
+        eos_token_id=0, decoder_start_token_id=63, max_position_embeddings=64,
+    )
+    model = MarianMTModel(config)
+    model.generation_config.num_beams = 3
+    model.generation_config.max_length = 12
+    model.generation_config.bad_words_ids = [[63]]
+    model.save_pretrained(model_dir)
+    return model
+
+
+def test_int8_variant_keeps_the_saved_generation_config(tmp_path):
+    tiny_marian(tmp_path)
+    manifest = optimize_model(tmp_path, 'tiny', variants=('int8',))
+    assert 'int8' in manifest['variants']
+
+    model, stats = TorchBackend().load(
+        MarianMTModel, tmp_path, 'cpu', 'int8', torch.float32, 'tiny', variants=load_variant_manifest(tmp_path)
+    )
+    assert stats['variant'] == 'int8'
+    assert model.generation_config.num_beams == 3
+    assert model.generation_config.max_length == 12
+    assert model.generation_config.bad_words_ids == [[63]]
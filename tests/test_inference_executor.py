@@ -0,0 +1,86 @@
+# test_inference_executor.py
+# Tests for per-model inference slots and bounded request queues
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import threading
+
+import pytest
+
+from kabardian_translator.inference_executor import InferenceExecutor, QueueFull
+
+
+def hold_slot(executor, name):
+    """Occupy the slot of `name` in a thread until the returned event is set"""
+    entered, release = threading.Event(), threading.Event()
+
+    def hold():
+        with executor.use(name):
+            entered.set()
+            release.wait(timeout=5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    assert entered.wait(timeout=2)
+    return thread, release
+
+
+def test_full_queue_rejects_immediately():
+    executor = InferenceExecutor(max_queue=1, queue_timeout=5)
+    thread, release = hold_slot(executor, 'nllb200')
+    waiter = threading.Thread(target=executor.run, args=('nllb200', lambda: None))
+    waiter.start()
+    try:
+        for _ in range(200):
+            if executor.get_stats()['models']['nllb200']['waiting']:
+                break
+            threading.Event().wait(0.01)
+        with pytest.raises(QueueFull, match="Too many requests waiting for nllb200"):
+            executor.run('nllb200', lambda: None)
+        # Other models have their own slots
+        assert executor.run('marian_ru_kbd', lambda: 'ok') == 'ok'
+    finally:
+        release.set()
+        thread.join(timeout=2)
+        waiter.join(timeout=2)
+
+    stats = executor.get_stats()['models']['nllb200']
+    assert (stats['rejected'], stats['completed'], stats['running'], stats['waiting']) == (1, 2, 0, 0)
+
+
+def test_waiting_too_long_times_out():
+    executor = InferenceExecutor(max_queue=4, queue_timeout=0.1)
+    thread, release = hold_slot(executor, 'nllb200')
+    try:
+        with pytest.raises(QueueFull, match="Timed out"):
+            executor.run('nllb200', lambda: None)
+    finally:
+        release.set()
+        thread.join(timeout=2)
+
+    assert executor.get_stats()['models']['nllb200']['timeouts'] == 1
+    assert executor.run('nllb200', lambda: 'free again') == 'free again'
+
+
+def test_concurrency_allows_parallel_calls():
+    executor = InferenceExecutor(max_queue=1, queue_timeout=0.1, concurrency=2)
+    thread, release = hold_slot(executor, 'nllb200')
+    try:
+        assert executor.run('nllb200', lambda: 'second slot') == 'second slot'
+    finally:
+        release.set()
+        thread.join(timeout=2)
+
+
+def test_queue_full_becomes_a_503(monkeypatch):
+    from kabardian_translator import app
+
+    def translate(*args, **kwargs):
+        raise QueueFull("Too many requests waiting for nllb200, try again later")
+
+    monkeypatch.setattr(app.translator, 'translate', translate)
+    response = app.app.test_client().post('/translate', json={'text': "Привет", 'target_lang': 'ukr_Cyrl'})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json() == {'error': "Too many requests waiting for nllb200, try again later", 'retry': True}
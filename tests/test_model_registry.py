@@ -0,0 +1,180 @@
+# test_model_registry.py
+# Tests for single-flight model loading and memory-budgeted residency
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import threading
+
+import pytest
+import torch
+
+from kabardian_translator.cancellation import Cancelled
+from kabardian_translator.model_registry import ModelRegistry, estimate_size
+
+
+def get_in_threads(registry, name, loader, count):
+    """Call registry.get from `count` threads; returns (threads, outcomes)"""
+    outcomes = [None] * count
+
+    def target(i):
+        try:
+            outcomes[i] = ('value', registry.get(name, loader))
+        except BaseException as e:
+            outcomes[i] = ('error', e)
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def wait_until_loading(registry):
+    for _ in range(200):
+        if registry.is_loading():
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("load did not start")
+
+
+def test_concurrent_callers_share_one_load():
+    registry = ModelRegistry()
+    release = threading.Event()
+    loads = []
+    model = object()
+
+    def loader():
+        loads.append(1)
+        release.wait(timeout=2)
+        return model
+
+    threads, outcomes = get_in_threads(registry, 'nllb200', loader, 4)
+    wait_until_loading(registry)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=2)
+
+    assert loads == [1]
+    assert outcomes == [('value', model)] * 4
+    assert registry.peek('nllb200') is model
+    assert registry.status()['nllb200']['loads'] == 1
+
+
+def test_failed_load_is_reported_and_retried():
+    registry = ModelRegistry()
+
+    def failing():
+        raise OSError("missing weights")
+
+    with pytest.raises(OSError):
+        registry.get('marian', failing)
+    assert registry.status()['marian']['state'] == 'failed'
+    assert registry.get('marian', lambda: 'model') == 'model'
+
+
+def test_interrupted_load_is_taken_over_by_a_waiter():
+    registry = ModelRegistry()
+    started, release = threading.Event(), threading.Event()
+
+    def cancelled_loader():
+        started.set()
+        release.wait(timeout=2)
+        raise Cancelled('client disconnected')
+
+    owner, owner_outcome = get_in_threads(registry, 'nllb200', cancelled_loader, 1)
+    assert started.wait(timeout=2)
+    waiter, waiter_outcome = get_in_threads(registry, 'nllb200', lambda: 'model', 1)
+    # Let the waiter reach the wait on the loading entry before the owner gives up
+    threading.Event().wait(0.05)
+    release.set()
+    for thread in owner + waiter:
+        thread.join(timeout=2)
+
+    assert owner_outcome[0][0] == 'error'
+    assert isinstance(owner_outcome[0][1], Cancelled)
+    assert waiter_outcome == [('value', 'model')]
+    assert not registry.is_loading()
+
+
+def test_use_pins_the_model_against_eviction():
+    registry = ModelRegistry(max_memory_mb=1)
+    with registry.use('marian', lambda: 'pinned'):
+        registry._entries['marian']['size_bytes'] = 2 * 1024 * 1024
+        registry._make_room(None, 0)
+        assert registry.peek('marian') == 'pinned'
+    registry._make_room(None, 0)
+    assert registry.peek('marian') is None
+
+
+def test_only_first_loads_count_as_not_ready():
+    registry = ModelRegistry()
+    registry.get('marian', lambda: 'model')
+    registry.release('marian')
+    release = threading.Event()
+
+    def slow(value):
+        def loader():
+            release.wait(timeout=2)
+            return value
+        return loader
+
+    threads, _ = get_in_threads(registry, 'marian', slow('model'), 1)
+    more, _ = get_in_threads(registry, 'nllb200', slow('nllb'), 1)
+    for _ in range(200):
+        if len(registry.loading()['first'] + registry.loading()['reload']) == 2:
+            break
+        threading.Event().wait(0.01)
+    try:
+        assert registry.loading() == {'first': ['nllb200'], 'reload': ['marian']}
+    finally:
+        release.set()
+        for thread in threads + more:
+            thread.join(timeout=2)
+    assert registry.loading() == {'first': [], 'reload': []}
+
+
+def half_mb_model():
+    # 256 x 512 float32 weights (+ bias): ~0.5MB
+    return torch.nn.Linear(512, 256)
+
+
+def test_loading_over_budget_evicts_the_least_recently_used_model():
+    registry = ModelRegistry(max_memory_mb=1.2)
+    registry.get('marian_ru_kbd', half_mb_model)
+    registry.get('marian_kbd_ru', half_mb_model)
+    # Touch the first model: the second one is now the least recently used
+    threading.Event().wait(0.01)
+    registry.get('marian_ru_kbd', half_mb_model)
+
+    registry.get('nllb200', lambda: ('tokenizer', half_mb_model()))
+    stats = registry.get_stats()
+    assert stats['resident_models'] == ['marian_ru_kbd', 'nllb200']
+    assert stats['evictions'] == 1
+    assert registry.status()['marian_kbd_ru']['state'] == 'evicted'
+
+    # Reloading makes room for its known size before the loader runs
+    sizes_at_load = []
+
+    def reload():
+        sizes_at_load.append(registry.get_stats()['resident_mb'])
+        return half_mb_model()
+
+    registry.get('marian_kbd_ru', reload)
+    assert sizes_at_load == [0.5]
+    assert registry.get_stats()['resident_models'] == ['marian_kbd_ru', 'nllb200']
+    assert registry.status()['marian_kbd_ru']['loads'] == 2
+
+
+def test_idle_models_are_swept_after_the_ttl():
+    registry = ModelRegistry(idle_ttl=60)
+    registry.get('marian_ru_kbd', half_mb_model)
+    assert registry.sweep() == []
+
+    registry._entries['marian_ru_kbd']['last_used'] -= 61
+    assert registry.sweep() == ['marian_ru_kbd']
+    assert registry.peek('marian_ru_kbd') is None
+
+
+def test_estimated_size_counts_models_inside_tuples():
+    model = half_mb_model()
+    assert estimate_size(model) == (512 * 256 + 256) * 4
+    assert estimate_size(('tokenizer', model)) == estimate_size(model)
@@ -0,0 +1,93 @@
+# test_prefork.py
+# Tests for the pre-fork server: forked workers, restarts and shutdown
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+import urllib.request
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="pre-fork serving needs fork()")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVER = textwrap.dedent("""
+    import json, os, sys
+    from kabardian_translator.prefork import PreforkServer
+
+    loaded = {}
+
+    def before_fork():
+        loaded['master_pid'] = os.getpid()
+
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'application/json')])
+        return [json.dumps({'pid': os.getpid(), **loaded}).encode()]
+
+    PreforkServer(app, '127.0.0.1', int(sys.argv[1]), workers=2, torch_threads=1).serve(before_fork)
+""")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def fetch(port, timeout=30):
+    """GET / from the server, retrying until a worker answers"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=2) as response:
+                return json.loads(response.read())
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+@pytest.fixture
+def server(tmp_path):
+    port = free_port()
+    # A file rather than a pipe: request logs must not fill a buffer nobody reads yet
+    log = open(tmp_path / "server.log", 'w+')
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER, str(port)], cwd=REPO_ROOT, stdout=log, stderr=subprocess.STDOUT,
+    )
+    yield process, port, log
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+    log.close()
+
+
+def test_workers_share_the_master_models_and_are_restarted(server):
+    process, port, log = server
+    first = fetch(port)
+    # The worker serves what the master loaded before forking
+    assert first['master_pid'] == process.pid
+    assert first['pid'] != process.pid
+
+    os.kill(first['pid'], signal.SIGKILL)
+    pids = {first['pid']}
+    deadline = time.monotonic() + 30
+    while len(pids) < 3 and time.monotonic() < deadline:
+        pids.add(fetch(port)['pid'])
+    # Both live workers answered after the killed one: it was replaced
+    assert len(pids) == 3
+
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=30) == 0
+    log.seek(0)
+    output = log.read()
+    assert f"pid {first['pid']}) exited" in output
+    assert "All workers stopped" in output
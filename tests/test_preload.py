@@ -0,0 +1,83 @@
+# test_preload.py
+# Tests for background model preload and warmup
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import threading
+
+from kabardian_translator.preload import Preloader
+from kabardian_translator.translation_service import TranslationService
+
+
+class FakeModels:
+    """Stand-in for the translation or TTS service: preload() returns fixed timings or raises"""
+
+    def __init__(self, timings=None, error=None, gate=None):
+        self.timings = timings or {}
+        self.error = error
+        self.gate = gate
+        self.warmup = None
+        self.started = threading.Event()
+
+    def preload(self, warmup=True):
+        self.warmup = warmup
+        self.started.set()
+        if self.gate:
+            self.gate.wait(timeout=5)
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.timings
+
+
+def test_states_from_pending_to_ready():
+    gate = threading.Event()
+    translator = FakeModels({'nllb200': {'load_seconds': 1.0, 'warmup_seconds': 0.5}}, gate=gate)
+    tts = FakeModels({'silero_tts': {'load_seconds': 2.0}})
+    preloader = Preloader(translator, tts, warmup=False)
+    assert preloader.get_status()['state'] == 'pending'
+
+    preloader.start()
+    assert translator.started.wait(timeout=2)
+    assert preloader.state == 'loading'
+    assert not preloader.ready
+    gate.set()
+    assert preloader.wait(timeout=2)
+
+    status = preloader.get_status()
+    assert status['state'] == 'ready'
+    assert set(status['timings']) == {'nllb200', 'silero_tts'}
+    assert 'error' not in status and 'warmup_errors' not in status
+    assert translator.warmup is False and tts.warmup is False
+
+
+def test_failed_preload_reports_the_error():
+    preloader = Preloader(FakeModels(error="MarianMT model not found"))
+    preloader.run()
+    assert preloader.failed and not preloader.ready
+    assert preloader.get_status()['error'] == "MarianMT model not found"
+
+
+def test_warmup_errors_are_surfaced():
+    translator = FakeModels({
+        'marian_ru_kbd': {'load_seconds': 1.0, 'warmup_seconds': 0.1, 'warmup_error': "CUDA error"},
+        'marian_kbd_ru': {'load_seconds': 1.0, 'warmup_seconds': 0.1},
+    })
+    preloader = Preloader(translator)
+    preloader.run()
+    assert preloader.ready
+    assert preloader.get_status()['warmup_errors'] == {'marian_ru_kbd': "CUDA error"}
+
+
+def test_service_preload_records_failed_warmup_translations(tmp_path, monkeypatch):
+    service = TranslationService(device='cpu', models_dir=tmp_path, cache_size=0)
+    monkeypatch.setattr(service.nllb_service, '_check_nllb_available', lambda: False)
+    monkeypatch.setattr(service.marian_service, 'load', lambda direction: None)
+
+    def translate_chunks(chunks, source_lang, target_lang, tier=None):
+        error = "out of memory" if source_lang == 'kbd_Cyrl' else None
+        return [{'translation': '' if error else 'ok', 'time_ms': 0, 'error': error} for _ in chunks]
+
+    monkeypatch.setattr(service, '_translate_chunks', translate_chunks)
+    timings = service.preload(warmup=True)
+    assert 'warmup_error' not in timings['marian_ru_kbd']
+    assert timings['marian_kbd_ru']['warmup_error'] == "out of memory"
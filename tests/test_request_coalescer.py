@@ -0,0 +1,152 @@
+# test_request_coalescer.py
+# Tests for single-flight deduplication of identical requests
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import threading
+
+import pytest
+
+from kabardian_translator.cancellation import (
+    CancellationToken, Cancelled, cancellation_scope, current_token,
+)
+from kabardian_translator.request_coalescer import RequestCoalescer
+
+
+def run_in_thread(coalescer, key, compute, token=None):
+    """Call coalescer.run in a thread; returns (thread, outcome dict)"""
+    outcome = {}
+
+    def target():
+        try:
+            with cancellation_scope(token):
+                outcome['value'] = coalescer.run(key, compute)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, outcome
+
+
+def wait_for_followers(coalescer, count):
+    """Block until `count` callers are attached to an in-flight computation"""
+    for _ in range(200):
+        if coalescer.get_stats()['waiting'] >= count:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("followers did not attach")
+
+
+def test_concurrent_callers_share_one_computation():
+    coalescer = RequestCoalescer()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=2)
+        return 'result'
+
+    leader, leader_outcome = run_in_thread(coalescer, 'key', compute)
+    assert started.wait(timeout=2)
+    follower, follower_outcome = run_in_thread(coalescer, 'key', compute)
+    wait_for_followers(coalescer, 1)
+    release.set()
+    leader.join(timeout=2)
+    follower.join(timeout=2)
+
+    assert calls == [1]
+    assert leader_outcome['value'] == ('result', False)
+    assert follower_outcome['value'] == ('result', True)
+    assert coalescer.get_stats()['in_flight'] == 0
+
+
+def test_errors_are_shared_and_not_kept():
+    coalescer = RequestCoalescer()
+
+    def compute():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        coalescer.run('key', compute)
+    assert coalescer.run('key', lambda: 'fresh') == ('fresh', False)
+
+
+def test_cancelled_follower_leaves_the_computation_running():
+    coalescer = RequestCoalescer()
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(timeout=2)
+        current_token().check()
+        return 'result'
+
+    leader, leader_outcome = run_in_thread(coalescer, 'key', compute, CancellationToken())
+    assert started.wait(timeout=2)
+    follower_token = CancellationToken()
+    follower, follower_outcome = run_in_thread(coalescer, 'key', compute, follower_token)
+    wait_for_followers(coalescer, 1)
+
+    follower_token.cancel('superseded')
+    follower.join(timeout=2)
+    assert isinstance(follower_outcome['error'], Cancelled)
+    assert str(follower_outcome['error']) == 'superseded'
+
+    release.set()
+    leader.join(timeout=2)
+    assert leader_outcome['value'] == ('result', False)
+
+
+def test_computation_is_cancelled_once_every_participant_is():
+    coalescer = RequestCoalescer()
+    started = threading.Event()
+
+    def compute():
+        started.set()
+        token = current_token()
+        assert token.wait(timeout=2)
+        token.check()
+
+    leader_token, follower_token = CancellationToken(), CancellationToken()
+    leader, leader_outcome = run_in_thread(coalescer, 'key', compute, leader_token)
+    assert started.wait(timeout=2)
+    follower, follower_outcome = run_in_thread(coalescer, 'key', compute, follower_token)
+    wait_for_followers(coalescer, 1)
+
+    follower_token.cancel('superseded')
+    follower.join(timeout=2)
+    leader_token.cancel('client disconnected')
+    leader.join(timeout=2)
+
+    # Each caller sees its own reason
+    assert str(follower_outcome['error']) == 'superseded'
+    assert isinstance(leader_outcome['error'], Cancelled)
+    assert str(leader_outcome['error']) == 'client disconnected'
+    assert coalescer.get_stats()['cancelled_computations'] == 1
+
+
+def test_participant_without_token_keeps_the_computation_alive():
+    coalescer = RequestCoalescer()
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(timeout=2)
+        current_token().check()
+        return 'result'
+
+    leader_token = CancellationToken()
+    leader, leader_outcome = run_in_thread(coalescer, 'key', compute, leader_token)
+    assert started.wait(timeout=2)
+    follower, follower_outcome = run_in_thread(coalescer, 'key', compute)
+    wait_for_followers(coalescer, 1)
+
+    leader_token.cancel('client disconnected')
+    release.set()
+    leader.join(timeout=2)
+    follower.join(timeout=2)
+
+    assert follower_outcome['value'] == ('result', True)
@@ -0,0 +1,33 @@
+# test_sentence_packer.py
+# Tests for token-budget chunking
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+from kabardian_translator.sentence_packer import SentencePacker
+
+
+def test_one_chunk_per_sentence_by_default():
+    chunks, separators = SentencePacker().split("Hi. How are you?\nFine!")
+    assert chunks == ["Hi.", "How are you?", "Fine!"]
+    assert separators == [" ", "\n", ""]
+
+
+def test_packing_joins_short_sentences_but_not_across_lines():
+    packer = SentencePacker(pack_tokens=20)
+    chunks, separators = packer.split("Hi. How are you?\nFine! Thanks.")
+    assert chunks == ["Hi. How are you?", "Fine! Thanks."]
+    assert separators == ["\n", ""]
+
+
+def test_long_sentences_are_split_within_max_tokens():
+    packer = SentencePacker(max_tokens=10)
+    text = "one two three, four five six, seven eight nine ten eleven twelve."
+    chunks, separators = packer.split(text)
+
+    assert len(chunks) > 1
+    assert ''.join(c + s for c, s in zip(chunks, separators)) == text
+    assert all(count <= 10 for count in (len(c.split()) * 2 + 1 for c in chunks[:-1]))
+
+
+def test_empty_text():
+    assert SentencePacker().split("   ") == ([], [])
@@ -0,0 +1,173 @@
+# test_shortlist.py
+# Tests for target-language shortlist decoding (tiny random model, no downloads)
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import threading
+
+import pytest
+import torch
+from transformers import M2M100Config, M2M100ForConditionalGeneration
+
+from kabardian_translator import translation_service
+from kabardian_translator.shortlist import ShortlistProjection, install_shortlist_projection, sequence_confidence
+from kabardian_translator.translation_service import TranslationService
+
+VOCAB_SIZE = 48
+FORCED_BOS = 40
+
+
+def tiny_nllb():
+    torch.manual_seed(0)
+    config = M2M100Config(
+        vocab_size=VOCAB_SIZE, d_model=16, encoder_layers=1, decoder_layers=1,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=32, decoder_ffn_dim=32,
+        max_position_embeddings=32, pad_token_id=1, bos_token_id=0, eos_token_id=2,
+        decoder_start_token_id=2,
+    )
+    return M2M100ForConditionalGeneration(config).eval()
+
+
+@pytest.fixture
+def model():
+    model = tiny_nllb()
+    assert isinstance(install_shortlist_projection(model), ShortlistProjection)
+    return model
+
+
+@pytest.fixture
+def nllb(tmp_path):
+    """LazyNLLBService of a service with shortlists on (no model files needed for _generate_shortlisted)"""
+    service = TranslationService(device='cpu', models_dir=tmp_path, cache_size=0)
+    service.nllb_shortlist = True
+    return service.nllb_service
+
+
+def batch():
+    input_ids = torch.tensor([[5, 6, 7, 8, 2], [9, 10, 11, 2, 1]])
+    return {'input_ids': input_ids, 'attention_mask': input_ids.ne(1).long()}
+
+
+def generate_kwargs(**overrides):
+    kwargs = dict(batch(), forced_bos_token_id=FORCED_BOS, max_new_tokens=8, min_new_tokens=6, do_sample=False)
+    kwargs.update(overrides)
+    return kwargs
+
+
+def test_restricted_projection_scores_only_the_shortlist():
+    torch.manual_seed(0)
+    projection = ShortlistProjection(torch.nn.Linear(8, 20))
+    hidden = torch.randn(3, 8)
+
+    assert torch.equal(projection(hidden), projection.full(hidden))
+    with projection.restrict([9, 2, 5]):
+        assert projection.ids.tolist() == [2, 5, 9]
+        assert torch.allclose(projection(hidden), projection.full(hidden)[:, [2, 5, 9]])
+        assert projection.to_shortlist(9) == 2
+        assert projection.to_vocabulary(torch.tensor([[0, 2], [1, 1]])).tolist() == [[2, 9], [5, 5]]
+        with pytest.raises(ValueError):
+            projection.to_shortlist(7)
+    assert projection.ids is None
+    assert projection(hidden).shape == (3, 20)
+
+
+def test_restriction_is_per_thread():
+    projection = ShortlistProjection(torch.nn.Linear(8, 20))
+    inside, done = threading.Event(), threading.Event()
+    shapes = {}
+
+    def restricted():
+        with projection.restrict([1, 2, 3]):
+            inside.set()
+            done.wait(timeout=2)
+            shapes['restricted'] = projection(torch.randn(1, 8)).shape[-1]
+
+    thread = threading.Thread(target=restricted)
+    thread.start()
+    assert inside.wait(timeout=2)
+    shapes['other'] = projection(torch.randn(1, 8)).shape[-1]
+    done.set()
+    thread.join(timeout=2)
+    assert shapes == {'restricted': 3, 'other': 20}
+
+
+def test_install_wraps_once(model):
+    projection = model.lm_head
+    assert install_shortlist_projection(model) is projection
+    assert model.get_output_embeddings() is projection
+
+
+class MaskedHead(torch.nn.Module):
+    """Reference lm_head: full-vocabulary logits with every token outside `allowed` at -inf"""
+
+    def __init__(self, lm_head, allowed):
+        super().__init__()
+        self.full = lm_head
+        self.mask = torch.full((lm_head.out_features,), float('-inf'))
+        self.mask[sorted(allowed)] = 0.0
+
+    def forward(self, hidden_states):
+        return self.full(hidden_states) + self.mask
+
+
+@pytest.mark.parametrize('num_beams', [1, 3])
+def test_shortlisted_decoding_matches_masked_full_decoding(model, nllb, num_beams):
+    shortlist_ids = set(range(3, 20)) | {FORCED_BOS}
+    # Special ids are added to the shortlist by _generate_shortlisted
+    allowed = shortlist_ids | {0, 1, 2}
+    reference = tiny_nllb()
+    reference.lm_head = MaskedHead(reference.lm_head, allowed)
+
+    nllb.parent_service.shortlist_min_score = None
+    with torch.no_grad():
+        sequences = nllb._generate_shortlisted(
+            model, (model.lm_head, shortlist_ids), generate_kwargs(num_beams=num_beams)
+        )
+        expected = reference.generate(**generate_kwargs(num_beams=num_beams))
+
+    assert [row.tolist() for row in sequences] == expected.tolist()
+    assert all(token in allowed for row in expected.tolist() for token in row)
+
+
+def test_no_confidence_pass_without_a_minimum_score(model, nllb, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("confidence computed although no minimum score is set")
+
+    monkeypatch.setattr(translation_service, 'sequence_confidence', fail)
+    nllb.parent_service.shortlist_min_score = None
+    with torch.no_grad():
+        nllb._generate_shortlisted(model, (model.lm_head, set(range(3, 20))), generate_kwargs())
+    assert nllb.parent_service._shortlist_stats['fallbacks'] == 0
+
+
+def test_low_confidence_falls_back_to_the_full_vocabulary(model, nllb):
+    # Every log-probability is below 0: every sentence is decoded again
+    nllb.parent_service.shortlist_min_score = 0.0
+    with torch.no_grad():
+        sequences = nllb._generate_shortlisted(model, (model.lm_head, set(range(3, 8))), generate_kwargs())
+        expected = model.generate(**generate_kwargs())
+
+    assert [row.tolist() for row in sequences] == expected.tolist()
+    assert nllb.parent_service._shortlist_stats['fallbacks'] == 2
+
+
+def test_confidence_reuses_encoder_states(model):
+    inputs = batch()
+    with torch.no_grad():
+        sequences = model.generate(**generate_kwargs())
+        encoder_states = model.get_encoder()(**inputs).last_hidden_state
+        scores = sequence_confidence(model, inputs, sequences, pad_token_id=1)
+        reused = sequence_confidence(
+            model, {'attention_mask': inputs['attention_mask']}, sequences, pad_token_id=1,
+            encoder_hidden_states=encoder_states,
+        )
+
+        # Reference: mean log-probability of the generated tokens after the forced language token
+        logits = model(**inputs, decoder_input_ids=sequences[:, :-1]).logits
+        log_probs = torch.log_softmax(logits, dim=-1).gather(-1, sequences[:, 1:].unsqueeze(-1)).squeeze(-1)
+        mask = sequences[:, 1:].ne(1)
+        mask[:, 0] = False
+        expected = ((log_probs * mask).sum(-1) / mask.sum(-1)).tolist()
+
+    assert scores == pytest.approx(reused)
+    assert scores == pytest.approx(expected, abs=1e-5)
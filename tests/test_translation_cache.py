@@ -0,0 +1,59 @@
+# test_translation_cache.py
+# Tests for the sentence translation cache
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+from kabardian_translator import translation_cache
+from kabardian_translator.translation_cache import TranslationCache
+
+
+def test_hits_misses_and_lru_eviction():
+    cache = TranslationCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    # 'b' was the least recently used entry
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+    stats = cache.get_stats()
+    assert (stats['entries'], stats['hits'], stats['misses'], stats['evictions']) == (2, 3, 1, 1)
+    assert stats['hit_rate'] == 0.75
+
+
+def test_expired_entries_are_misses(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(translation_cache.time, 'time', lambda: now[0])
+    cache = TranslationCache(ttl_seconds=60)
+    cache.put('a', 1)
+
+    now[0] += 60
+    assert cache.get('a') == 1
+    now[0] += 1
+    assert cache.get('a') is None
+
+    stats = cache.get_stats()
+    assert (stats['entries'], stats['hits'], stats['misses'], stats['expirations']) == (0, 1, 1, 1)
+
+
+def test_zero_size_cache_stores_nothing():
+    cache = TranslationCache(max_entries=0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+    assert cache.get_stats()['entries'] == 0
+
+
+def test_clear_keeps_counters():
+    cache = TranslationCache()
+    cache.put('a', 1)
+    cache.get('a')
+    cache.clear()
+    assert cache.get('a') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_normalize_collapses_whitespace():
+    assert TranslationCache.normalize("  Привет \n  мир ") == "Привет мир"
@@ -0,0 +1,68 @@
+# test_translation_memory.py
+# Tests for the persistent translation memory
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import threading
+
+from kabardian_translator.translation_memory import TranslationMemory
+
+
+def scanned_totals(memory):
+    """(entries, size) counted from the translations table itself"""
+    conn = memory._connect()
+    return tuple(conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM translations").fetchone())
+
+
+def test_put_and_get_round_trip(tmp_path):
+    memory = TranslationMemory(tmp_path / "tm.sqlite")
+    key = ['Привет', 'rus_Cyrl', 'kbd_Cyrl', 'balanced']
+    assert memory.get(key) is None
+    memory.put(key, {'translation': 'Сэлам'})
+    assert memory.get(key) == {'translation': 'Сэлам'}
+    assert (memory.hits, memory.misses, memory.writes) == (1, 1, 1)
+
+
+def test_totals_follow_inserts_updates_and_evictions(tmp_path):
+    memory = TranslationMemory(tmp_path / "tm.sqlite", max_size_mb=0.002)
+    for i in range(50):
+        memory.put(['text', i], {'translation': 'x' * 50})
+    memory.put(['text', 0], {'translation': 'y' * 200})
+
+    stats = memory.get_stats()
+    assert (stats['entries'], memory._total_size(memory._connect())) == scanned_totals(memory)
+
+    memory.evict()
+    entries, size = scanned_totals(memory)
+    assert memory._totals(memory._connect()) == (entries, size)
+    assert size <= memory.max_bytes
+    assert entries < 50
+
+
+def test_export_import_round_trip(tmp_path):
+    source = TranslationMemory(tmp_path / "a.sqlite")
+    source.put(['Привет', 'rus_Cyrl', 'kbd_Cyrl'], {'translation': 'Сэлам'})
+    assert source.export_file(tmp_path / "tm.jsonl") == 1
+
+    target = TranslationMemory(tmp_path / "b.sqlite")
+    assert target.import_file(tmp_path / "tm.jsonl") == 1
+    assert target.get(['Привет', 'rus_Cyrl', 'kbd_Cyrl']) == {'translation': 'Сэлам'}
+
+
+def test_counters_are_exact_under_concurrent_use(tmp_path):
+    memory = TranslationMemory(tmp_path / "tm.sqlite")
+    memory.put(['shared'], {'translation': 'x'})
+
+    def reader():
+        for _ in range(50):
+            memory.get(['shared'])
+            memory.get(['missing'])
+
+    threads = [threading.Thread(target=reader) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = memory.get_stats()
+    assert (stats['hits'], stats['misses']) == (400, 400)
@@ -0,0 +1,321 @@
+# test_translation_service.py
+# Tests for TranslationService request handling (no models are loaded)
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import threading
+
+import pytest
+
+from kabardian_translator.translation_service import MAX_DECODE_SECONDS, TranslationService, _decode_limits, _sub_batches
+
+
+@pytest.fixture
+def service(tmp_path):
+    return TranslationService(device='cpu', models_dir=tmp_path, cache_size=0)
+
+
+@pytest.fixture
+def fake_models(service, monkeypatch):
+    """Sentence-per-chunk splitting and a fake decoder that fails for rus_Cyrl→bel_Cyrl"""
+    calls = []
+
+    def split(text, source_lang, target_lang=None):
+        sentences = [s for s in text.split('. ') if s]
+        return sentences, [' '] * len(sentences)
+
+    def translate_cached(sentences, source_lang, target_lang, use_scheduler=True, tier=None):
+        calls.append((source_lang, target_lang, list(sentences)))
+        if target_lang == 'bel_Cyrl':
+            raise RuntimeError("NLLB-200 model not available")
+        return [{
+            'translation': f"{target_lang}:{sentence}",
+            'time_ms': 0.1,
+            'model_used': 'fake',
+            'error': None,
+        } for sentence in sentences]
+
+    monkeypatch.setattr(service, '_split_into_chunks', split)
+    monkeypatch.setattr(service, '_translate_cached', translate_cached)
+    return calls
+
+
+def test_translate_many_isolates_failing_pairs(service, fake_models):
+    response = service.translate_many([
+        ("Привет", 'rus_Cyrl', 'ukr_Cyrl'),
+        ("Привет", 'rus_Cyrl', 'bel_Cyrl'),
+        ("Пока. Привет", 'rus_Cyrl', 'ukr_Cyrl'),
+    ])
+
+    results = response['results']
+    assert [r['index'] for r in results] == [0, 1, 2]
+    assert results[0]['translation'] == "ukr_Cyrl:Привет"
+    assert results[0]['error'] is None
+    assert "NLLB-200 model not available" in results[1]['error']
+    assert results[2]['translation'] == "ukr_Cyrl:Пока ukr_Cyrl:Привет"
+    assert response['errors'] == 1
+    assert response['language_pairs'] == 2
+
+
+def test_translate_many_translates_identical_texts_once(service, fake_models):
+    response = service.translate_many([
+        ("Привет", 'rus_Cyrl', 'ukr_Cyrl'),
+        ("Привет ", 'rus_Cyrl', 'ukr_Cyrl'),
+    ])
+
+    assert response['unique_texts'] == 1
+    assert fake_models == [('rus_Cyrl', 'ukr_Cyrl', ["Привет"])]
+    assert [r['translation'] for r in response['results']] == ["ukr_Cyrl:Привет"] * 2
+
+
+def test_translate_many_rejects_bad_items_individually(service, fake_models):
+    response = service.translate_many([
+        ("Привет", 'rus_Cyrl', 'ukr_Cyrl'),
+        ("Привет", 'rus_Cyrl', 'xx_Latn'),
+        ("Привет", None, 'ukr_Cyrl'),
+        (42, 'rus_Cyrl', 'ukr_Cyrl'),
+        ("   ", 'rus_Cyrl', 'ukr_Cyrl'),
+    ])
+
+    results = response['results']
+    assert results[0]['error'] is None
+    assert "Language not supported: rus_Cyrl→xx_Latn" in results[1]['error']
+    assert "Item languages must be strings" in results[2]['error']
+    assert "Item text must be a string" in results[3]['error']
+    assert results[4]['translation'] == ''
+    assert not results[4].get('error')
+    assert response['errors'] == 3
+    assert fake_models == [('rus_Cyrl', 'ukr_Cyrl', ["Привет"])]
+
+
+def test_translate_many_rejects_unknown_tier(service, fake_models):
+    response = service.translate_many([("Привет", 'rus_Cyrl', 'ukr_Cyrl')], tier='nonexistent')
+    assert "Unknown quality tier" in response['results'][0]['error']
+    assert fake_models == []
+
+
+def test_chunk_times_are_summed_without_float_noise(service, capsys):
+    chunks = [{'translation': 'a', 'time_ms': 0.1, 'model_used': 'fake'} for _ in range(3)]
+    service._assemble_response("a. a. a", chunks, 'rus_Cyrl', 'ukr_Cyrl', 0.0)
+    assert "(processing: 0.3ms)" in capsys.readouterr().out
+
+
+@pytest.fixture
+def cached_service(tmp_path):
+    return TranslationService(device='cpu', models_dir=tmp_path, cache_size=100)
+
+
+@pytest.fixture
+def fake_multi(cached_service, monkeypatch):
+    """Stub MarianMT (through _translate_cached) and NLLB-200 multi-target decoding"""
+    calls = {'marian': [], 'nllb': []}
+    failing = {'pivot': set(), 'nllb': False}
+
+    def split(text, source_lang, target_lang=None):
+        sentences = [s for s in text.split('. ') if s]
+        return sentences, [' '] * len(sentences)
+
+    def translate_cached(sentences, source_lang, target_lang, use_scheduler=True, tier=None):
+        calls['marian'].append((source_lang, target_lang, list(sentences)))
+        return [
+            {'translation': '', 'time_ms': 0, 'error': "pivot failed"}
+            if sentence in failing['pivot'] else
+            {'translation': f"{target_lang}:{sentence}", 'time_ms': 0.1, 'model_used': 'marian', 'error': None}
+            for sentence in sentences
+        ]
+
+    def generate_multi(texts, source_nllb, target_rows, preset=None):
+        calls['nllb'].append((source_nllb, {t: [texts[i] for i in rows] for t, rows in target_rows.items()}))
+        if failing['nllb']:
+            raise RuntimeError("out of memory")
+        return {t: {i: f"{t}:{texts[i]}" for i in rows} for t, rows in target_rows.items()}
+
+    monkeypatch.setattr(cached_service, '_split_into_chunks', split)
+    monkeypatch.setattr(cached_service, '_translate_cached', translate_cached)
+    monkeypatch.setattr(cached_service.nllb_service, '_check_nllb_available', lambda: True)
+    monkeypatch.setattr(cached_service.nllb_service, 'generate_multi', generate_multi)
+    return calls, failing
+
+
+def test_translate_multi_encodes_the_source_once_for_all_nllb_targets(cached_service, fake_multi):
+    calls, _ = fake_multi
+    response = cached_service.translate_multi("Привет. Пока", 'rus_Cyrl', ['ukr_Cyrl', 'bel_Cyrl'])
+
+    assert calls['nllb'] == [('rus_Cyrl', {
+        'ukr_Cyrl': ["Привет", "Пока"], 'bel_Cyrl': ["Привет", "Пока"],
+    })]
+    assert response['results']['ukr_Cyrl']['translation'] == "ukr_Cyrl:Привет ukr_Cyrl:Пока"
+    assert response['results']['bel_Cyrl']['error'] is None
+
+
+def test_translate_multi_reaches_kabardian_through_the_russian_output(cached_service, fake_multi):
+    calls, _ = fake_multi
+    response = cached_service.translate_multi("Привіт", 'ukr_Cyrl', ['kbd_Cyrl', 'bel_Cyrl'])
+
+    # kbd_Cyrl rides on the rus_Cyrl decode of the same encoder pass, then MarianMT ru→kbd
+    assert calls['nllb'] == [('ukr_Cyrl', {'bel_Cyrl': ["Привіт"], 'rus_Cyrl': ["Привіт"]})]
+    assert calls['marian'] == [('rus_Cyrl', 'kbd_Cyrl', ["rus_Cyrl:Привіт"])]
+    assert response['results']['kbd_Cyrl']['translation'] == "kbd_Cyrl:rus_Cyrl:Привіт"
+    assert 'rus_Cyrl' not in response['results']
+
+
+def test_translate_multi_writes_fresh_results_back_to_the_cache(cached_service, fake_multi):
+    calls, _ = fake_multi
+    first = cached_service.translate_multi("Привет", 'rus_Cyrl', ['ukr_Cyrl', 'kbd_Cyrl'])
+    second = cached_service.translate_multi("Привет", 'rus_Cyrl', ['ukr_Cyrl', 'kbd_Cyrl'])
+
+    assert len(calls['nllb']) == 1
+    assert second['results']['ukr_Cyrl']['translation'] == first['results']['ukr_Cyrl']['translation']
+    assert second['results']['ukr_Cyrl']['cached_chunks'] == 1
+    # translate() shares the keys, so it is served from the same entries
+    key = cached_service._cache_key("Привет", 'rus_Cyrl', 'ukr_Cyrl', cached_service.default_tier)
+    assert cached_service._lookup_cached(key)['translation'] == "ukr_Cyrl:Привет"
+
+
+def test_translate_multi_failed_pivot_chunk_only_fails_that_chunk(cached_service, fake_multi):
+    calls, failing = fake_multi
+    failing['pivot'].add("Бзэ")
+    response = cached_service.translate_multi("Сэлам. Бзэ", 'kbd_Cyrl', ['rus_Cyrl', 'ukr_Cyrl'])
+
+    # The MarianMT target keeps its translation of the good chunk; NLLB-200 only sees good pivots
+    assert calls['nllb'] == [('rus_Cyrl', {'ukr_Cyrl': ["rus_Cyrl:Сэлам"]})]
+    assert "pivot failed" in response['results']['ukr_Cyrl']['error']
+    assert "pivot failed" in response['results']['rus_Cyrl']['error']
+    key = cached_service._cache_key("Сэлам", 'kbd_Cyrl', 'ukr_Cyrl', cached_service.default_tier)
+    assert cached_service._lookup_cached(key)['translation'] == "ukr_Cyrl:rus_Cyrl:Сэлам"
+
+
+def test_translate_multi_nllb_failure_keeps_marian_targets(cached_service, fake_multi):
+    _, failing = fake_multi
+    failing['nllb'] = True
+    response = cached_service.translate_multi("Привет", 'rus_Cyrl', ['kbd_Cyrl', 'ukr_Cyrl'])
+
+    assert response['results']['kbd_Cyrl']['translation'] == "kbd_Cyrl:Привет"
+    assert "out of memory" in response['results']['ukr_Cyrl']['error']
+
+
+def test_translate_multi_rejects_unsupported_languages_per_target(cached_service, fake_multi):
+    calls, _ = fake_multi
+    response = cached_service.translate_multi("Привет", 'rus_Cyrl', ['ukr_Cyrl', 'xx_Latn'])
+    assert response['results']['ukr_Cyrl']['error'] is None
+    assert "Language not supported: rus_Cyrl→xx_Latn" in response['results']['xx_Latn']['error']
+
+    response = cached_service.translate_multi("Привет", 'xx_Latn', ['ukr_Cyrl'])
+    assert "Language not supported" in response['results']['ukr_Cyrl']['error']
+    assert len(calls['nllb']) == 1
+
+
+def test_health_stays_healthy_while_a_model_reloads(service):
+    service.registry.get('nllb200', lambda: 'model')
+    service.registry.release('nllb200')
+    release, started = threading.Event(), threading.Event()
+
+    def reload():
+        started.set()
+        release.wait(timeout=2)
+        return 'model'
+
+    thread = threading.Thread(target=service.registry.get, args=('nllb200', reload))
+    thread.start()
+    try:
+        assert started.wait(timeout=2)
+        health = service.health_check()
+        assert health['status'] == 'healthy'
+        assert health['models_loading']['reload'] == ['nllb200']
+    finally:
+        release.set()
+        thread.join(timeout=2)
+
+
+def test_token_streaming_rejects_non_greedy_tiers(service):
+    events = list(service.translate_tokens("Привет", 'rus_Cyrl', 'ukr_Cyrl', tier='quality'))
+    assert len(events) == 1
+    assert events[0]['type'] == 'error'
+    assert "only the 'fast' tier" in events[0]['error']
+
+
+def test_whitespace_variants_are_not_coalesced(service, monkeypatch):
+    # Both computations must be in flight at once to pass the barrier
+    barrier = threading.Barrier(2, timeout=2)
+
+    def translate_request(text, source_lang, target_lang, requested_tier):
+        barrier.wait()
+        return {'translation': text.strip(), 'original_length': len(text)}
+
+    monkeypatch.setattr(service, '_translate_request', translate_request)
+    responses = {}
+
+    def call(text):
+        responses[text] = service.translate(text, 'rus_Cyrl', 'ukr_Cyrl')
+
+    threads = [threading.Thread(target=call, args=(text,)) for text in ("Привет", "Привет  ")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert responses["Привет"] == {'translation': "Привет", 'original_length': 6}
+    assert responses["Привет  "] == {'translation': "Привет", 'original_length': 8}
+
+
+def test_tiers_override_the_pair_presets(service):
+    assert service._preset_for('rus_Cyrl', 'kbd_Cyrl', 'fast')['num_beams'] == 1
+    assert service._preset_for('rus_Cyrl', 'kbd_Cyrl', 'balanced')['num_beams'] == 4
+    best = service._preset_for('rus_Cyrl', 'ukr_Cyrl', 'best')
+    assert (best['num_beams'], best['max_length'], best['tier']) == (8, 512, 'best')
+    assert service._preset_for('rus_Cyrl', 'ukr_Cyrl')['tier'] == 'balanced'
+
+    service.configure_quality(default_tier='fast')
+    assert service._preset_for('rus_Cyrl', 'ukr_Cyrl')['num_beams'] == 1
+    with pytest.raises(ValueError):
+        service.configure_quality(default_tier='nonexistent')
+
+
+def test_requests_are_downgraded_with_load(service):
+    service.configure_quality(downgrade_threshold=2)
+    # 1-2 in flight: as requested; 3-4: one tier down; 5+: two tiers down
+    tiers = [service._begin_request('best') for _ in range(5)]
+    assert tiers == ['best', 'best', 'balanced', 'balanced', 'fast']
+    assert service._begin_request('fast') == 'fast'
+    assert service._tier_stats['downgrades'] == 3
+
+    for _ in range(6):
+        service._end_request()
+    assert service._begin_request('best') == 'best'
+
+
+def test_no_downgrade_without_a_threshold(service):
+    assert [service._begin_request('best') for _ in range(20)] == ['best'] * 20
+    assert service._tier_stats['downgrades'] == 0
+
+
+def test_translate_reports_requested_and_effective_tier(service, monkeypatch):
+    service.configure_quality(downgrade_threshold=1)
+    service._begin_request('balanced')
+    used = []
+
+    def translate_text(text, source_lang, target_lang, tier):
+        used.append(tier)
+        return {'translation': text}
+
+    monkeypatch.setattr(service, '_translate_text', translate_text)
+    response = service.translate("Привет", 'rus_Cyrl', 'ukr_Cyrl', tier='best')
+    assert used == ['balanced']
+    assert (response['tier'], response['tier_requested']) == ('balanced', 'best')
+    assert service._in_flight == 1
+
+
+def test_decode_limits_scale_with_the_bucketed_source_length():
+    preset = {'length_ratio': 1.5, 'length_offset': 10, 'max_length': 40}
+    # 5 tokens fall in the 8-token bucket: 1.5 * 8 + 10
+    assert _decode_limits(preset, 5) == {'max_new_tokens': 22, 'max_time': MAX_DECODE_SECONDS}
+    assert _decode_limits(preset, 8)['max_new_tokens'] == 22
+    assert _decode_limits(preset, 9)['max_new_tokens'] == 34
+    assert _decode_limits(preset, 100)['max_new_tokens'] == 40
+
+
+def test_sub_batches_group_by_length_bucket_shortest_first():
+    lengths = [20, 3, 7, 17, 2, 9, 4]
+    batches = list(_sub_batches(lengths, max_batch_size=2))
+    assert batches == [(8, [4, 1]), (8, [6, 2]), (16, [5]), (24, [3, 0])]
+    assert sorted(i for _, indices in batches for i in indices) == list(range(len(lengths)))
@@ -0,0 +1,95 @@
+# test_vocab_trim.py
+# Tests for the vocabulary-trimmed NLLB-200 build (tiny random model, no downloads)
+# License: CC BY-NC 4.0 (Non-Commercial Use Only)
+# Version 2.0.0
+
+import copy
+
+import pytest
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import M2M100Config, M2M100ForConditionalGeneration, PreTrainedTokenizerFast
+
+from kabardian_translator.vocab_trim import TrimmedTokenizer, _trim_model
+
+SPECIAL = ['<s>', '<pad>', '</s>', '<unk>', 'eng_Latn', 'rus_Cyrl']
+WORDS = ['hello', 'world', 'good', 'morning', 'привет', 'мир', 'доброе', 'утро', 'rare', 'unused']
+
+
+@pytest.fixture
+def tokenizer():
+    vocab = {token: i for i, token in enumerate(SPECIAL + WORDS)}
+    backend = Tokenizer(models.WordLevel(vocab, unk_token='<unk>'))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    return PreTrainedTokenizerFast(
+        tokenizer_object=backend, bos_token='<s>', eos_token='</s>', pad_token='<pad>', unk_token='<unk>',
+        additional_special_tokens=['eng_Latn', 'rus_Cyrl'],
+    )
+
+
+@pytest.fixture
+def kept_ids(tokenizer):
+    # Everything except 'rare' and 'unused'
+    return sorted(tokenizer.convert_tokens_to_ids(SPECIAL + WORDS[:8]))
+
+
+def tiny_nllb(vocab_size):
+    torch.manual_seed(0)
+    config = M2M100Config(
+        vocab_size=vocab_size, d_model=16, encoder_layers=1, decoder_layers=1,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=32, decoder_ffn_dim=32,
+        max_position_embeddings=32, pad_token_id=1, bos_token_id=0, eos_token_id=2,
+        decoder_start_token_id=2,
+    )
+    return M2M100ForConditionalGeneration(config).eval()
+
+
+def test_trimmed_tokenizer_round_trips_ids(tokenizer, kept_ids):
+    trimmed = TrimmedTokenizer(tokenizer, kept_ids)
+    texts = ["hello world", "привет мир доброе утро"]
+
+    encoded = trimmed(texts, add_special_tokens=False)['input_ids']
+    original = tokenizer(texts, add_special_tokens=False)['input_ids']
+    assert encoded == [[kept_ids.index(i) for i in row] for row in original]
+    assert trimmed.batch_decode(encoded) == texts
+    assert trimmed.decode(torch.tensor(encoded[0])) == texts[0]
+
+    assert len(trimmed) == len(kept_ids)
+    assert trimmed.convert_tokens_to_ids('rus_Cyrl') == kept_ids.index(tokenizer.convert_tokens_to_ids('rus_Cyrl'))
+    assert trimmed.pad_token_id == kept_ids.index(tokenizer.pad_token_id)
+
+
+def test_tokens_outside_the_trimmed_vocabulary_become_unk(tokenizer, kept_ids):
+    trimmed = TrimmedTokenizer(tokenizer, kept_ids)
+    encoded = trimmed(["hello rare"], add_special_tokens=False, return_tensors='pt')['input_ids']
+    assert encoded.tolist() == [[kept_ids.index(tokenizer.convert_tokens_to_ids('hello')), trimmed.unk_token_id]]
+
+
+def test_trimmed_model_decodes_token_for_token_like_the_full_model(tokenizer, kept_ids):
+    full = tiny_nllb(len(tokenizer))
+    trimmed_model = copy.deepcopy(full)
+    _trim_model(trimmed_model, kept_ids)
+    trimmed = TrimmedTokenizer(tokenizer, kept_ids)
+    assert trimmed_model.config.vocab_size == len(kept_ids)
+
+    texts = ["hello world", "good morning hello"]
+    full_inputs = tokenizer(texts, return_tensors='pt', padding=True)
+    trimmed_inputs = trimmed(texts, return_tensors='pt', padding=True)
+    forced = tokenizer.convert_tokens_to_ids('rus_Cyrl')
+
+    # The full model may only emit kept tokens for the outputs to be comparable
+    dropped = [i for i in range(len(tokenizer)) if i not in kept_ids]
+    with torch.no_grad():
+        full_out = full.generate(
+            **full_inputs, forced_bos_token_id=forced, max_new_tokens=8, min_new_tokens=8, num_beams=1,
+            do_sample=False, suppress_tokens=dropped,
+        )
+        trimmed_out = trimmed_model.generate(
+            **trimmed_inputs, forced_bos_token_id=trimmed.convert_tokens_to_ids('rus_Cyrl'),
+            max_new_tokens=8, min_new_tokens=8, num_beams=1, do_sample=False,
+        )
+
+    assert full_out.shape[1] > 3
+    assert [[kept_ids[i] for i in row] for row in trimmed_out.tolist()] == full_out.tolist()
+    assert trimmed.batch_decode(trimmed_out, skip_special_tokens=True) == \
+        tokenizer.batch_decode(full_out, skip_special_tokens=True)